@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.core.dependencies import get_db, get_current_user
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.core.dependencies import get_async_db, get_current_user, UsuarioCacheado
+from app.core.security import create_access_token
+from app.core.hashing import get_password_hash_async, verify_password_async
+from app.core.metrics import registrar_login
 from app.models.usuario import Usuario
 from app.schemas.auth import Token
 from app.schemas.usuario import UsuarioCreate, UsuarioOut
@@ -14,47 +17,62 @@ router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
 # ===== REGISTRO DE NUEVO USUARIO =====
-@router.post("/register", response_model=UsuarioOut, status_code=status.HTTP_201_CREATED)
-def register(user: UsuarioCreate, db: Session = Depends(get_db)):
-    """
-    Registra un nuevo usuario en el sistema.
-    
-    - **username**: Nombre de usuario único
-    - **email**: Correo electrónico único
-    - **password**: Contraseña (será hasheada)
-    """
+async def _verificar_registro_disponible(user: UsuarioCreate, db: AsyncSession) -> None:
     # Verificar si el email ya existe
-    if db.query(Usuario).filter(Usuario.email == user.email).first():
+    if await db.scalar(select(Usuario.id).where(Usuario.email == user.email)):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, 
             detail="El correo electrónico ya está registrado"
         )
     
     # Verificar si el username ya existe
-    if db.query(Usuario).filter(Usuario.username == user.username).first():
+    if await db.scalar(select(Usuario.id).where(Usuario.username == user.username)):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, 
             detail="El nombre de usuario ya está en uso"
         )
-    
+
+
+async def _guardar_usuario(user: UsuarioCreate, password_hash: str, db: AsyncSession) -> Usuario:
     # ✅ Crear nuevo usuario con campos correctos
     nuevo_usuario = Usuario(
         username=user.username,  # ✅ username
         email=user.email,
-        password_hash=get_password_hash(user.password),  # ✅ password_hash
+        password_hash=password_hash,  # ✅ password_hash
         is_admin=False  # ✅ is_admin
     )
     
     db.add(nuevo_usuario)
-    db.commit()
-    db.refresh(nuevo_usuario)
+    await db.commit()
+    await db.refresh(nuevo_usuario)
     
     return nuevo_usuario
 
 
+@router.post("/register", response_model=UsuarioOut, status_code=status.HTTP_201_CREATED)
+async def register(user: UsuarioCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Registra un nuevo usuario en el sistema.
+    
+    - **username**: Nombre de usuario único
+    - **email**: Correo electrónico único
+    - **password**: Contraseña (será hasheada)
+
+    El hash se calcula en el pool de procesos de hashing y las consultas usan
+    la sesión asíncrona, así el event loop nunca queda bloqueado.
+    """
+    await _verificar_registro_disponible(user, db)
+    password_hash = await get_password_hash_async(user.password)
+    return await _guardar_usuario(user, password_hash, db)
+
+
 # ===== LOGIN (INICIAR SESIÓN) =====
+async def _buscar_usuario_por_email(email: str, db: AsyncSession) -> Usuario | None:
+    return await db.scalar(select(Usuario).where(Usuario.email == email))
+
+
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Inicia sesión y devuelve un token JWT.
     
@@ -64,21 +82,25 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     Returns: access_token y token_type
     """
     # Buscar usuario por email (username en el form es el email)
-    usuario = db.query(Usuario).filter(Usuario.email == form_data.username).first()
+    usuario = await _buscar_usuario_por_email(form_data.username, db)
     
     if not usuario:
+        registrar_login("usuario_desconocido")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuario no encontrado. Verifica el correo electrónico."
         )
     
     # ✅ Verificar contraseña con campo correcto
-    if not verify_password(form_data.password, usuario.password_hash):  # ✅ password_hash
+    if not await verify_password_async(form_data.password, usuario.password_hash):  # ✅ password_hash
+        registrar_login("password_incorrecta")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Contraseña incorrecta"
         )
     
+    registrar_login("ok")
+
     # Generar token JWT
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -94,7 +116,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
 # ===== OBTENER INFORMACIÓN DEL USUARIO ACTUAL =====
 @router.get("/me", response_model=UsuarioOut)
-def get_current_user_info(current_user: Usuario = Depends(get_current_user)):
+async def get_current_user_info(current_user: UsuarioCacheado = Depends(get_current_user)):
     """
     Obtiene la información del usuario autenticado actualmente.
     
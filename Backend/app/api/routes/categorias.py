@@ -1,20 +1,44 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.dependencies import get_db, require_admin
+from app.core.catalog import (
+    TAG_CATEGORIAS, cabeceras_cache, catalog_cache, etag_catalogo, etag_coincide,
+    invalidar_categorias, no_modificado,
+)
+from app.core.config import settings
+from app.core.dependencies import get_async_db, get_db, require_admin
 from app.models.categoria import Categoria
 from app.schemas.categoria import CategoriaCreate, CategoriaResponse
 
 # ✅ CORRECCIÓN: Agregar prefix /api para que coincida con el frontend
 router = APIRouter(prefix="/api/categorias", tags=["categorias"])
 
+_lista_categorias = TypeAdapter(List[CategoriaResponse])
+
 @router.get("/", response_model=List[CategoriaResponse])
-def listar_categorias(db: Session = Depends(get_db)):
+async def listar_categorias(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Obtener todas las categorías disponibles.
-    No requiere autenticación.
+    No requiere autenticación. Se sirve desde la caché del catálogo y
+    responde 304 si ``If-None-Match`` coincide con la versión del catálogo.
     """
-    return db.query(Categoria).all()
+    etag = etag_catalogo()
+    if etag_coincide(request, etag):
+        return no_modificado(etag, settings.CACHE_CONTROL_CATEGORIAS)
+
+    async def calcular():
+        categorias = (await db.scalars(select(Categoria))).all()
+        cuerpo = _lista_categorias.dump_json(_lista_categorias.validate_python(categorias, from_attributes=True))
+        return cuerpo, len(cuerpo), {TAG_CATEGORIAS}
+
+    cuerpo = await catalog_cache.get_or_compute(("categorias",), calcular)
+    return Response(
+        content=cuerpo, media_type="application/json",
+        headers=cabeceras_cache(etag, settings.CACHE_CONTROL_CATEGORIAS),
+    )
 
 @router.post("/", response_model=CategoriaResponse, status_code=status.HTTP_201_CREATED,
              dependencies=[Depends(require_admin)])
@@ -29,6 +53,7 @@ def crear_categoria(data: CategoriaCreate, db: Session = Depends(get_db)):
     db.add(nueva)
     db.commit()
     db.refresh(nueva)
+    invalidar_categorias()
     return nueva
 
 @router.delete("/{categoria_id}", status_code=status.HTTP_204_NO_CONTENT,
@@ -42,4 +67,5 @@ def eliminar_categoria(categoria_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     db.delete(categoria)
     db.commit()
+    invalidar_categorias()
     return None
@@ -0,0 +1,248 @@
+# app/api/routes/exportar.py
+"""
+Exportación de datos para el dashboard de administración (CSV o NDJSON).
+
+Las respuestas se generan en streaming. Cada exportación abre su propia
+sesión (la de la petición ya está cerrada cuando se envía el cuerpo), lee
+con ``yield_per`` + ``stream_results`` (cursor del lado del servidor en
+PostgreSQL) y escribe un bloque de filas cada vez, así que la memoria usada
+no depende del número de filas exportadas.
+
+- ``GET /api/exportar/pedidos``: en CSV, una fila por línea de pedido (los
+  pedidos sin items salen con las columnas del item vacías); en NDJSON, un
+  objeto por pedido con su lista de ``items``. Filtros: ``desde``,
+  ``hasta``, ``estado`` y ``tipo``.
+- ``GET /api/exportar/productos``: filtros ``categoria`` y ``activo``.
+- ``GET /api/exportar/fidelizacion``: miembros del programa de fidelización.
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Literal, Optional, Sequence
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Row
+
+from app.core.dependencies import require_admin
+from app.core.responses import a_json
+from app.db.database import SessionLocal
+from app.models.fidelizacion import Fidelizacion
+from app.models.pedido import Pedido, PedidoItem
+from app.models.producto import Producto
+
+router = APIRouter(prefix="/api/exportar", tags=["exportar"], dependencies=[Depends(require_admin)])
+
+Formato = Literal["csv", "ndjson"]
+
+# Filas leídas de la base de datos (y escritas a la respuesta) por bloque
+FILAS_POR_BLOQUE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNAS_PEDIDO = (
+    Pedido.id.label("pedido_id"),
+    Pedido.created_at,
+    Pedido.estado,
+    Pedido.tipo,
+    Pedido.total,
+    Pedido.contacto_nombre,
+    Pedido.contacto_email,
+    Pedido.contacto_telefono,
+    Pedido.direccion,
+    Pedido.metodo_pago,
+    Pedido.nombre_personalizado,
+    Pedido.precio_personalizado,
+)
+COLUMNAS_ITEM = (
+    PedidoItem.producto_id,
+    PedidoItem.nombre.label("producto_nombre"),
+    PedidoItem.cantidad,
+    PedidoItem.precio_unitario.label("precio"),
+)
+COLUMNAS_PRODUCTO = (
+    Producto.id,
+    Producto.nombre,
+    Producto.descripcion,
+    Producto.precio,
+    Producto.stock,
+    Producto.categoria,
+    Producto.color,
+    Producto.tamano,
+    Producto.material,
+    Producto.activo,
+    Producto.imagen_url,
+)
+COLUMNAS_FIDELIZACION = (
+    Fidelizacion.id,
+    Fidelizacion.correo,
+    Fidelizacion.nombre_completo,
+    Fidelizacion.fecha_nacimiento,
+    Fidelizacion.direccion,
+    Fidelizacion.puntos,
+    Fidelizacion.proximo_regalo,
+    Fidelizacion.redes,
+    Fidelizacion.tutoriales,
+)
+
+
+# ===== Lectura y escritura por bloques =====
+
+def _leer_bloques(query: Select) -> Iterator[Sequence[Row]]:
+    """Ejecuta ``query`` en una sesión propia y devuelve las filas por bloques."""
+    db = SessionLocal()
+    try:
+        resultado = db.execute(
+            query.execution_options(yield_per=FILAS_POR_BLOQUE, stream_results=True)
+        )
+        yield from resultado.partitions()
+    finally:
+        db.close()
+
+
+def _csv(columnas: Sequence[str], bloques: Iterable[Iterable[Sequence]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # BOM para que Excel detecte UTF-8 (tildes y eñes)
+    buffer.write("\ufeff")
+    escritor.writerow(columnas)
+    for bloque in bloques:
+        escritor.writerows(bloque)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson(bloques: Iterable[Iterable[dict]]) -> Iterator[bytes]:
+    for bloque in bloques:
+        yield b"".join(a_json(objeto) + b"\n" for objeto in bloque)
+
+
+def _como_dicts(bloques: Iterable[Sequence[Row]]) -> Iterator[List[dict]]:
+    for bloque in bloques:
+        yield [fila._asdict() for fila in bloque]
+
+
+def _mapear(bloques: Iterable[Sequence[Row]], funcion: Callable[[Row], Sequence]) -> Iterator[list]:
+    for bloque in bloques:
+        yield [funcion(fila) for fila in bloque]
+
+
+def _respuesta(nombre: str, formato: Formato, cuerpo: Iterator) -> StreamingResponse:
+    archivo = f"{nombre}-{datetime.now():%Y%m%d}.{formato}"
+    return StreamingResponse(
+        cuerpo,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{archivo}"'},
+    )
+
+
+# ===== Pedidos =====
+
+def _pedidos_agrupados(bloques: Iterable[Sequence[Row]]) -> Iterator[List[dict]]:
+    """
+    Une las filas pedido+item (ordenadas por pedido) en un objeto por
+    pedido. Solo se retiene el pedido en curso entre un bloque y el siguiente.
+    """
+    columnas_pedido = [columna.key for columna in COLUMNAS_PEDIDO]
+    columnas_item = [columna.key for columna in COLUMNAS_ITEM]
+    actual: Optional[dict] = None
+    for bloque in bloques:
+        completos = []
+        for fila in bloque:
+            datos = fila._mapping
+            if actual is None or actual["pedido_id"] != datos["pedido_id"]:
+                if actual is not None:
+                    completos.append(actual)
+                actual = {columna: datos[columna] for columna in columnas_pedido}
+                actual["items"] = []
+            if datos["producto_id"] is not None:
+                actual["items"].append({columna: datos[columna] for columna in columnas_item})
+        if completos:
+            yield completos
+    if actual is not None:
+        yield [actual]
+
+
+@router.get("/pedidos")
+async def exportar_pedidos(
+    formato: Formato = Query("csv"),
+    desde: Optional[datetime] = Query(None, description="Creados desde (incluido)"),
+    hasta: Optional[datetime] = Query(None, description="Creados hasta (excluido)"),
+    estado: Optional[str] = Query(None),
+    tipo: Optional[str] = Query(None, description="estandar | personalizado"),
+):
+    """Exportar pedidos con sus líneas (solo admin)"""
+    query = (
+        select(*COLUMNAS_PEDIDO, *COLUMNAS_ITEM)
+        .outerjoin(PedidoItem, PedidoItem.pedido_id == Pedido.id)
+        .order_by(Pedido.created_at, Pedido.id, PedidoItem.id)
+    )
+    if desde is not None:
+        query = query.where(Pedido.created_at >= desde)
+    if hasta is not None:
+        query = query.where(Pedido.created_at < hasta)
+    if estado:
+        query = query.where(Pedido.estado == estado)
+    if tipo:
+        query = query.where(Pedido.tipo == tipo)
+
+    bloques = _leer_bloques(query)
+    if formato == "ndjson":
+        cuerpo = _ndjson(_pedidos_agrupados(bloques))
+    else:
+        columnas = [columna.key for columna in (*COLUMNAS_PEDIDO, *COLUMNAS_ITEM)]
+        cuerpo = _csv(columnas, bloques)
+    return _respuesta("pedidos", formato, cuerpo)
+
+
+# ===== Productos =====
+
+@router.get("/productos")
+async def exportar_productos(
+    formato: Formato = Query("csv"),
+    categoria: Optional[str] = Query(None, description="Slug de categoría"),
+    activo: Optional[bool] = Query(None),
+):
+    """Exportar el catálogo de productos (solo admin)"""
+    query = select(*COLUMNAS_PRODUCTO).order_by(Producto.id)
+    if categoria:
+        query = query.where(Producto.categoria == categoria)
+    if activo is not None:
+        query = query.where(Producto.activo == activo)
+
+    bloques = _leer_bloques(query)
+    if formato == "ndjson":
+        cuerpo = _ndjson(_como_dicts(bloques))
+    else:
+        cuerpo = _csv([columna.key for columna in COLUMNAS_PRODUCTO], bloques)
+    return _respuesta("productos", formato, cuerpo)
+
+
+# ===== Fidelización =====
+
+def _fila_fidelizacion_csv(fila: Row) -> list:
+    # Las listas (redes, tutoriales) van como JSON dentro de la celda
+    *simples, redes, tutoriales = fila
+    return [*simples, a_json(redes or []).decode(), a_json(tutoriales or []).decode()]
+
+
+@router.get("/fidelizacion")
+async def exportar_fidelizacion(formato: Formato = Query("csv")):
+    """Exportar los miembros del programa de fidelización (solo admin)"""
+    bloques = _leer_bloques(select(*COLUMNAS_FIDELIZACION).order_by(Fidelizacion.id))
+    if formato == "ndjson":
+        cuerpo = _ndjson(_como_dicts(bloques))
+    else:
+        cuerpo = _csv(
+            [columna.key for columna in COLUMNAS_FIDELIZACION],
+            _mapear(bloques, _fila_fidelizacion_csv),
+        )
+    return _respuesta("fidelizacion", formato, cuerpo)
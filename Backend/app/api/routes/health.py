@@ -0,0 +1,131 @@
+# app/api/routes/health.py
+"""
+Sondas de salud para el balanceador / orquestador.
+
+- ``/health/live``: el proceso responde (el event loop no está bloqueado).
+  Nunca consulta nada externo.
+- ``/health/ready``: el worker puede atender tráfico. Comprueba una ida y
+  vuelta a la base de datos con timeout (una lectura de ``schema_version``,
+  que cubre también las migraciones pendientes), que el pool de conexiones
+  no esté agotado, el espacio libre en el disco de ``uploads`` y la cola del
+  threadpool. Responde 503 si algo falla.
+
+  La sonda solo lee: no toma el bloqueo de escritura de SQLite ni abre
+  transacciones de escritura, así que no compite con las peticiones.
+
+El resultado de ``ready`` se cachea ``HEALTH_CACHE_SECONDS`` y solo una
+sonda a la vez ejecuta las comprobaciones: aunque el balanceador consulte
+muy a menudo, la carga extra es como mucho una consulta por intervalo.
+"""
+
+import asyncio
+import shutil
+import time
+from typing import Optional
+
+import anyio.to_thread
+from fastapi import APIRouter, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.storage import UPLOAD_DIR
+from app.db.database import async_engine
+from app.db.migrate import cargar_migraciones, schema_version
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+_ultimo_resultado: Optional[dict] = None
+_ultimo_instante = 0.0
+_lock = asyncio.Lock()
+_versiones_esperadas: Optional[set] = None
+
+
+async def _comprobar_db() -> dict:
+    global _versiones_esperadas
+
+    if _versiones_esperadas is None:
+        _versiones_esperadas = {m.version for m in cargar_migraciones()}
+
+    async def consultar() -> set:
+        async with async_engine.connect() as conn:
+            return set((await conn.execute(select(schema_version.c.version))).scalars())
+
+    inicio = time.perf_counter()
+    try:
+        aplicadas = await asyncio.wait_for(consultar(), timeout=settings.HEALTH_DB_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"timeout ({settings.HEALTH_DB_TIMEOUT_SECONDS}s)"}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+    ms = round((time.perf_counter() - inicio) * 1000, 2)
+    pendientes = sorted(_versiones_esperadas - aplicadas)
+    if pendientes:
+        return {"ok": False, "ms": ms, "error": f"migraciones pendientes: {pendientes}"}
+    return {"ok": True, "ms": ms}
+
+
+def _comprobar_disco() -> dict:
+    try:
+        libre_mb = shutil.disk_usage(UPLOAD_DIR).free // (1024 * 1024)
+    except OSError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": libre_mb >= settings.HEALTH_MIN_FREE_DISK_MB, "free_mb": libre_mb}
+
+
+def _comprobar_pool() -> dict:
+    pool = async_engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"ok": True}
+    en_uso = pool.checkedout()
+    # DB_MAX_OVERFLOW = -1: sin límite de conexiones extra
+    if settings.DB_MAX_OVERFLOW < 0:
+        return {"ok": True, "in_use": en_uso}
+    limite = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    return {"ok": en_uso < limite, "in_use": en_uso, "max": limite}
+
+
+def _comprobar_threadpool() -> dict:
+    estadisticas = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {
+        "ok": estadisticas.tasks_waiting <= settings.HEALTH_MAX_THREADPOOL_WAITING,
+        "busy": estadisticas.borrowed_tokens,
+        "total": estadisticas.total_tokens,
+        "waiting": estadisticas.tasks_waiting,
+    }
+
+
+async def _evaluar() -> dict:
+    # La cola del threadpool se mide antes de usarlo para el disco
+    threadpool = _comprobar_threadpool()
+    checks = {
+        "db": await _comprobar_db(),
+        "pool": _comprobar_pool(),
+        # disk_usage es una llamada al sistema bloqueante
+        "disk": await run_in_threadpool(_comprobar_disco),
+        "threadpool": threadpool,
+    }
+    listo = all(check["ok"] for check in checks.values())
+    return {"status": "ok" if listo else "fail", "checks": checks}
+
+
+@router.get("/live")
+async def live():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    global _ultimo_resultado, _ultimo_instante
+
+    async with _lock:
+        if _ultimo_resultado is None or time.monotonic() - _ultimo_instante >= settings.HEALTH_CACHE_SECONDS:
+            _ultimo_resultado = await _evaluar()
+            _ultimo_instante = time.monotonic()
+        resultado = _ultimo_resultado
+
+    codigo = status.HTTP_200_OK if resultado["status"] == "ok" else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(resultado, status_code=codigo)
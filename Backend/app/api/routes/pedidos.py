@@ -1,14 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Body
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status, Body
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from datetime import datetime
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 import uuid
 
 # ✅ Imports correctos de dependencias
-from app.core.dependencies import get_db, require_admin, get_current_user
+from app.core.dependencies import get_async_db, require_admin, get_current_user
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.catalog import invalidar_productos_async
+from app.core.idempotency import con_idempotencia
+from app.core.metrics import registrar_pedido_creado, registrar_sin_stock
+from app.core.order_status import cambiar_estado, conteos_por_estado, normalizar_estado, registrar_creacion
+from app.core.responses import respuesta_confiable
 
 # ✅ Imports de modelos de base de datos
-from app.models.pedido import Pedido, PedidoItem
+from app.models.pedido import Pedido, PedidoEvento, PedidoItem
 from app.models.producto import Producto
 
 # ✅ Imports de schemas (Pydantic)
@@ -17,8 +26,7 @@ from app.schemas.pedido import (
     PedidoResponse,
     PedidoPersonalizado,
     PedidoUpdateEstado,
-    PedidoItem as PedidoItemSchema,
-    Contacto,
+    PedidoItemCreate,
     GuestOrderCreate,
     GuestOrderResponse
 )
@@ -26,41 +34,147 @@ from app.schemas.pedido import (
 router = APIRouter(prefix="/api/pedidos", tags=["pedidos"])
 
 # ✅ Helper function CON imagen_url
-def to_response(p: Pedido, db: Session) -> PedidoResponse:
-    # ✅ Agregar nombres, precios E IMÁGENES de productos
-    items_with_names = []
-    for it in p.items:
-        producto = db.query(Producto).filter(Producto.id == it.producto_id).first()
-        items_with_names.append(
-            PedidoItemSchema(
-                producto_id=it.producto_id,
-                nombre=producto.nombre if producto else "Producto no encontrado",
-                cantidad=it.cantidad,
-                precio=producto.precio if producto else 0,
-                imagen_url=producto.imagen_url if producto else None  # ✅ AGREGADO
-            )
+def to_responses(pedidos: List[Pedido]) -> List[dict]:
+    """
+    Serializa una lista de pedidos sin consultas adicionales.
+
+    Nombre, precio e imagen salen de cada línea (``pedido_items``), que los
+    guarda al crear el pedido: el historial no cambia si luego cambia el
+    producto. Los pedidos deben venir con ``items`` ya cargados
+    (``selectinload``).
+
+    Devuelve dicts con la forma de ``PedidoResponse`` construidos desde las
+    filas, sin instanciar modelos: los listados los envían tal cual con
+    ``respuesta_confiable`` y en el resto FastAPI los valida una sola vez.
+    """
+    respuestas = []
+    for p in pedidos:
+        # ✅ Agregar nombres, precios E IMÁGENES de productos
+        items_with_names = [
+            {
+                "producto_id": it.producto_id,
+                "nombre": it.nombre or "Producto no encontrado",
+                "cantidad": it.cantidad,
+                "precio": it.precio_unitario,
+                "imagen_url": it.imagen_url,  # ✅ AGREGADO
+            }
+            for it in p.items
+        ]
+
+        respuestas.append({
+            "pedido_id": p.id,
+            "estado": p.estado,
+            "tipo": p.tipo,
+            "total": p.total,
+            "descripcion": p.descripcion,
+            "imagen_referencia": p.imagen_referencia,
+            "nombre_personalizado": p.nombre_personalizado,
+            "precio_personalizado": p.precio_personalizado,
+            "comentario_vendedor": p.comentario_vendedor,
+            "comentario_cancelacion": p.comentario_cancelacion,
+            "contacto": {
+                "nombre": p.contacto_nombre,
+                "email": p.contacto_email,
+                "telefono": p.contacto_telefono,
+            },
+            "items": items_with_names,
+            "direccion": p.direccion,
+            "metodo_pago": p.metodo_pago,
+        })
+
+    return respuestas
+
+
+def to_response(p: Pedido) -> dict:
+    return to_responses([p])[0]
+
+
+async def reservar_stock(items: List[PedidoItemCreate], db: AsyncSession) -> List[PedidoItem]:
+    """
+    Descuenta el stock de todos los items y devuelve las líneas del pedido,
+    con nombre, precio e imagen del producto copiados en ese momento.
+
+    Cada línea se reserva con un UPDATE condicional
+    (``stock = stock - n WHERE id = :id AND stock >= n``), de modo que dos
+    compras concurrentes no pueden dejar el stock en negativo. Si alguna
+    línea no se puede reservar se hace rollback y se responde 409.
+    """
+    cantidades: Dict[int, int] = {}
+    for it in items:
+        cantidades[it.producto_id] = cantidades.get(it.producto_id, 0) + it.cantidad
+
+    productos = {
+        prod.id: prod
+        for prod in await db.scalars(select(Producto).where(Producto.id.in_(cantidades)))
+    }
+    for producto_id in cantidades:
+        if producto_id not in productos:
+            raise HTTPException(status_code=404, detail=f"Producto {producto_id} no existe")
+
+    # Orden fijo de ids para que transacciones concurrentes bloqueen en el mismo orden
+    for producto_id in sorted(cantidades):
+        cantidad = cantidades[producto_id]
+        resultado = await db.execute(
+            update(Producto)
+            .where(Producto.id == producto_id, Producto.stock >= cantidad)
+            .values(stock=Producto.stock - cantidad)
+            .execution_options(synchronize_session=False)
         )
-    
-    return PedidoResponse(
-        pedido_id=p.id,
-        estado=p.estado,
-        tipo=p.tipo,
-        total=p.total,
-        descripcion=p.descripcion,
-        imagen_referencia=p.imagen_referencia,
-        nombre_personalizado=p.nombre_personalizado,
-        precio_personalizado=p.precio_personalizado,
-        comentario_vendedor=p.comentario_vendedor,
-        comentario_cancelacion=p.comentario_cancelacion,
-        contacto=Contacto(
-            nombre=p.contacto_nombre,
-            email=p.contacto_email,
-            telefono=p.contacto_telefono
-        ),
-        items=items_with_names,
-        direccion=p.direccion,
-        metodo_pago=p.metodo_pago
-    )
+        if resultado.rowcount != 1:
+            # El nombre se lee antes del rollback, que expira los objetos
+            nombre = productos[producto_id].nombre
+            await db.rollback()
+            registrar_sin_stock()
+            raise HTTPException(
+                status_code=409,
+                detail=f"Sin stock suficiente para {nombre}"
+            )
+
+    lineas = []
+    for it in items:
+        producto = productos[it.producto_id]
+        lineas.append(PedidoItem(
+            producto_id=it.producto_id,
+            cantidad=it.cantidad,
+            precio_unitario=producto.precio,
+            nombre=producto.nombre,
+            imagen_url=producto.imagen_url,
+        ))
+    return lineas
+
+
+# Tamaño de página por defecto cuando se pagina solo con cursor
+PEDIDOS_LIMIT_DEFAULT = 50
+
+
+async def paginar_pedidos(
+    db: AsyncSession, query, response: Response, limit: Optional[int], cursor: Optional[str]
+) -> List[Pedido]:
+    """
+    Ordena los pedidos del más reciente al más antiguo y, si se pide,
+    pagina por keyset sobre ``(created_at, id)``.
+
+    Sin ``limit`` ni ``cursor`` devuelve todos los pedidos (compatibilidad con
+    el dashboard actual). Si la página está completa, el cursor de la
+    siguiente se devuelve en el header ``X-Next-Cursor``.
+    """
+    query = query.order_by(Pedido.created_at.desc(), Pedido.id.desc())
+    if limit is None and cursor is None:
+        return (await db.scalars(query)).all()
+
+    limit = limit or PEDIDOS_LIMIT_DEFAULT
+    if cursor is not None:
+        created_at, pedido_id = decode_cursor(cursor, datetime, str)
+        query = query.where(or_(
+            Pedido.created_at < created_at,
+            and_(Pedido.created_at == created_at, Pedido.id < pedido_id)
+        ))
+
+    pedidos = (await db.scalars(query.limit(limit))).all()
+    if len(pedidos) == limit:
+        ultimo = pedidos[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(ultimo.created_at, ultimo.id)
+    return pedidos
 
 # ✅ Schema para actualizar pedido personalizado
 class ActualizarPedidoPersonalizadoRequest(BaseModel):
@@ -73,149 +187,161 @@ class ActualizarPedidoPersonalizadoRequest(BaseModel):
 # ============================================
 
 @router.post("/", response_model=PedidoResponse, status_code=status.HTTP_201_CREATED)
-def crear_pedido(
+async def crear_pedido(
     pedido: PedidoCreate,
+    request: Request,
     current_user=Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Crear pedido estándar para usuario autenticado"""
-    if not pedido.items:
-        raise HTTPException(status_code=422, detail="El pedido debe tener items")
-    
-    # Validar y descontar stock
-    total = 0.0
-    for it in pedido.items:
-        prod = db.query(Producto).filter(Producto.id == it.producto_id).first()
-        if not prod:
-            raise HTTPException(status_code=404, detail=f"Producto {it.producto_id} no existe")
-        if prod.stock is None or prod.stock < it.cantidad:
-            raise HTTPException(status_code=409, detail=f"Sin stock suficiente para {prod.nombre}")
-        prod.stock -= it.cantidad
-        total += prod.precio * it.cantidad
-    
-    # ✅ Crear pedido
-    nuevo = Pedido(
-        id=str(uuid.uuid4()),
-        estado="pendiente",
-        tipo="estandar",
-        total=total,
-        contacto_nombre=pedido.contacto.nombre,
-        contacto_email=current_user.email,
-        contacto_telefono=pedido.contacto.telefono,
-        direccion=pedido.direccion,
-        metodo_pago=pedido.metodo_pago
-    )
+    """Crear pedido estándar para usuario autenticado (admite Idempotency-Key)"""
+    async def crear(confirmar):
+        if not pedido.items:
+            raise HTTPException(status_code=422, detail="El pedido debe tener items")
     
-    db.add(nuevo)
-    db.flush()
+        # Validar y reservar stock de forma atómica
+        lineas = await reservar_stock(pedido.items, db)
     
-    for it in pedido.items:
-        db.add(PedidoItem(pedido_id=nuevo.id, producto_id=it.producto_id, cantidad=it.cantidad))
+        # ✅ Crear pedido
+        nuevo = Pedido(
+            id=str(uuid.uuid4()),
+            estado="pendiente",
+            tipo="estandar",
+            total=sum(linea.precio_unitario * linea.cantidad for linea in lineas),
+            contacto_nombre=pedido.contacto.nombre,
+            contacto_email=current_user.email,
+            contacto_telefono=pedido.contacto.telefono,
+            direccion=pedido.direccion,
+            metodo_pago=pedido.metodo_pago,
+            # Items asignados en memoria: quedan cargados tras el commit (sin lazy load)
+            items=lineas
+        )
     
-    db.commit()
-    db.refresh(nuevo)
+        db.add(nuevo)
+        await registrar_creacion(db, nuevo, actor=current_user.email)
+        respuesta = to_response(nuevo)
+        # Commit del pedido junto con la respuesta de la Idempotency-Key
+        await confirmar(db, respuesta)
+        registrar_pedido_creado(nuevo.tipo)
+        # El stock de esos productos cambió: fuera de la caché del catálogo
+        await invalidar_productos_async(it.producto_id for it in pedido.items)
     
-    return to_response(nuevo, db)
+        return respuesta
+
+    return await con_idempotencia(request, f"usuario:{current_user.id}", crear, status.HTTP_201_CREATED)
 
 # ============================================
 # CREAR PEDIDO (INVITADO - GUEST)
 # ============================================
 
 @router.post("/guest", response_model=GuestOrderResponse, status_code=status.HTTP_201_CREATED)
-def crear_pedido_invitado(pedido: GuestOrderCreate, db: Session = Depends(get_db)):
-    """Crear pedido sin autenticación (usuario invitado)"""
-    if not pedido.items:
-        raise HTTPException(status_code=422, detail="El pedido debe tener items")
-    
-    # Validar stock
-    total = 0.0
-    for it in pedido.items:
-        prod = db.query(Producto).filter(Producto.id == it.producto_id).first()
-        if not prod:
-            raise HTTPException(status_code=404, detail=f"Producto {it.producto_id} no existe")
-        if prod.stock is None or prod.stock < it.cantidad:
-            raise HTTPException(status_code=409, detail=f"Sin stock suficiente para {prod.nombre}")
-        prod.stock -= it.cantidad
-        total += prod.precio * it.cantidad
-    
-    # ✅ Crear pedido invitado
-    nuevo = Pedido(
-        id=f"GUEST-{uuid.uuid4().hex[:8].upper()}",
-        estado="pendiente",
-        tipo="estandar",
-        total=total,
-        contacto_nombre=pedido.contacto.nombre,
-        contacto_email=pedido.contacto.email,
-        contacto_telefono=pedido.contacto.telefono,
-        direccion=pedido.direccion,
-        metodo_pago=pedido.metodo_pago
-    )
+async def crear_pedido_invitado(
+    pedido: GuestOrderCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Crear pedido sin autenticación (usuario invitado, admite Idempotency-Key)"""
+    async def crear(confirmar):
+        if not pedido.items:
+            raise HTTPException(status_code=422, detail="El pedido debe tener items")
     
-    db.add(nuevo)
-    db.flush()
+        # Validar y reservar stock de forma atómica
+        lineas = await reservar_stock(pedido.items, db)
     
-    for it in pedido.items:
-        db.add(PedidoItem(pedido_id=nuevo.id, producto_id=it.producto_id, cantidad=it.cantidad))
+        # ✅ Crear pedido invitado
+        nuevo = Pedido(
+            id=f"GUEST-{uuid.uuid4().hex[:8].upper()}",
+            estado="pendiente",
+            tipo="estandar",
+            total=sum(linea.precio_unitario * linea.cantidad for linea in lineas),
+            contacto_nombre=pedido.contacto.nombre,
+            contacto_email=pedido.contacto.email,
+            contacto_telefono=pedido.contacto.telefono,
+            direccion=pedido.direccion,
+            metodo_pago=pedido.metodo_pago,
+            items=lineas
+        )
     
-    db.commit()
+        db.add(nuevo)
+        await registrar_creacion(db, nuevo, actor=pedido.contacto.email or "invitado")
+        respuesta = GuestOrderResponse(message="Pedido creado exitosamente", pedido_id=nuevo.id).model_dump()
+        # Commit del pedido junto con la respuesta de la Idempotency-Key
+        await confirmar(db, respuesta)
+        registrar_pedido_creado(nuevo.tipo)
+        # El stock de esos productos cambió: fuera de la caché del catálogo
+        await invalidar_productos_async(it.producto_id for it in pedido.items)
     
-    return GuestOrderResponse(message="Pedido creado exitosamente", pedido_id=nuevo.id)
+        return respuesta
+
+    return await con_idempotencia(request, "invitado", crear, status.HTTP_201_CREATED)
 
 # ============================================
 # MIS PEDIDOS (USUARIO AUTENTICADO)
 # ============================================
 
 @router.get("/mis-pedidos", response_model=List[PedidoResponse])
-def obtener_mis_pedidos(
-    db: Session = Depends(get_db),
+async def obtener_mis_pedidos(
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Obtener pedidos del usuario autenticado"""
-    pedidos_db = db.query(Pedido).filter(
+    pedidos_db = await db.scalars(select(Pedido).options(selectinload(Pedido.items)).where(
         Pedido.contacto_email == current_user.email
-    ).all()
+    ))
     
-    return [to_response(p, db) for p in pedidos_db]
+    return respuesta_confiable(to_responses(pedidos_db.all()))
 
 # ============================================
 # PEDIDO PERSONALIZADO
 # ============================================
 
 @router.post("/personalizado", response_model=PedidoResponse, status_code=status.HTTP_201_CREATED)
-def crear_pedido_personalizado(
+async def crear_pedido_personalizado(
     pedido: PedidoPersonalizado,
+    request: Request,
     current_user=Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Crear un pedido personalizado"""
-    nuevo = Pedido(
-        id=f"CUSTOM-{uuid.uuid4().hex[:8].upper()}",
-        estado="pendiente",
-        tipo="personalizado",
-        descripcion=pedido.descripcion,
-        imagen_referencia=pedido.imagen_referencia,
-        nombre_personalizado=pedido.nombre_personalizado,
-        contacto_nombre=pedido.contacto.nombre,
-        contacto_email=current_user.email,
-        contacto_telefono=pedido.contacto.telefono,
-        direccion=pedido.direccion,
-        metodo_pago=pedido.metodo_pago
-    )
+    """Crear un pedido personalizado (admite Idempotency-Key)"""
+    async def crear(confirmar):
+        nuevo = Pedido(
+            id=f"CUSTOM-{uuid.uuid4().hex[:8].upper()}",
+            estado="pendiente",
+            tipo="personalizado",
+            descripcion=pedido.descripcion,
+            imagen_referencia=pedido.imagen_referencia,
+            nombre_personalizado=pedido.nombre_personalizado,
+            contacto_nombre=pedido.contacto.nombre,
+            contacto_email=current_user.email,
+            contacto_telefono=pedido.contacto.telefono,
+            direccion=pedido.direccion,
+            metodo_pago=pedido.metodo_pago,
+            items=[]
+        )
     
-    db.add(nuevo)
-    db.commit()
-    db.refresh(nuevo)
+        db.add(nuevo)
+        await registrar_creacion(db, nuevo, actor=current_user.email)
+        respuesta = to_response(nuevo)
+        # Commit del pedido junto con la respuesta de la Idempotency-Key
+        await confirmar(db, respuesta)
+        registrar_pedido_creado(nuevo.tipo)
     
-    return to_response(nuevo, db)
+        return respuesta
+
+    return await con_idempotencia(request, f"usuario:{current_user.id}", crear, status.HTTP_201_CREATED)
 
 # ============================================
 # ADMIN: VER TODOS LOS PEDIDOS
 # ============================================
 
 @router.get("/", dependencies=[Depends(require_admin)])
-def obtener_todos_pedidos(db: Session = Depends(get_db)):
-    """Obtener todos los pedidos (solo admin)"""
-    pedidos = db.query(Pedido).all()
+async def obtener_todos_pedidos(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener todos los pedidos (solo admin), opcionalmente paginados por cursor"""
+    pedidos = await paginar_pedidos(db, select(Pedido), response, limit, cursor)
     return pedidos
 
 # ============================================
@@ -223,56 +349,110 @@ def obtener_todos_pedidos(db: Session = Depends(get_db)):
 # ============================================
 
 @router.get("/normales", response_model=List[PedidoResponse], dependencies=[Depends(require_admin)])
-def obtener_pedidos_normales(db: Session = Depends(get_db)):
-    """Obtener todos los pedidos normales/estándar (solo admin)"""
-    pedidos = db.query(Pedido).filter(Pedido.tipo == "estandar").all()
-    return [to_response(p, db) for p in pedidos]
+async def obtener_pedidos_normales(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener todos los pedidos normales/estándar (solo admin), opcionalmente paginados por cursor"""
+    query = select(Pedido).options(selectinload(Pedido.items)).where(
+        Pedido.tipo == "estandar"
+    )
+    pedidos = await paginar_pedidos(db, query, response, limit, cursor)
+    return respuesta_confiable(to_responses(pedidos), response)
 
 # ============================================
 # ADMIN: OBTENER PEDIDOS PERSONALIZADOS
 # ============================================
 
 @router.get("/personalizados", response_model=List[PedidoResponse], dependencies=[Depends(require_admin)])
-def obtener_pedidos_personalizados(db: Session = Depends(get_db)):
-    """Obtener todos los pedidos personalizados (solo admin)"""
-    pedidos = db.query(Pedido).filter(Pedido.tipo == "personalizado").all()
-    return [to_response(p, db) for p in pedidos]
+async def obtener_pedidos_personalizados(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtener todos los pedidos personalizados (solo admin), opcionalmente paginados por cursor"""
+    query = select(Pedido).options(selectinload(Pedido.items)).where(
+        Pedido.tipo == "personalizado"
+    )
+    pedidos = await paginar_pedidos(db, query, response, limit, cursor)
+    return respuesta_confiable(to_responses(pedidos), response)
 
 # ============================================
 # ADMIN: ACTUALIZAR ESTADO DEL PEDIDO
 # ============================================
 
-@router.put("/{pedido_id}/estado", dependencies=[Depends(require_admin)])
-def actualizar_estado_pedido(
+@router.put("/{pedido_id}/estado")
+async def actualizar_estado_pedido(
     pedido_id: str,
     estado: str = Body(...),
     comentario_cancelacion: Optional[str] = Body(None),
-    db: Session = Depends(get_db)
+    admin=Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    pedido = db.query(Pedido).filter(Pedido.id == pedido_id).first()
+    """
+    Cambiar el estado de un pedido (solo admin) siguiendo el ciclo de vida:
+    pendiente -> revision -> elaborando -> terminado -> despachado, o
+    cancelado antes de despachar. Cada cambio queda en el historial.
+    """
+    pedido = await db.get(Pedido, pedido_id)
     if not pedido:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
+
+    comentario = comentario_cancelacion if normalizar_estado(estado) == "cancelado" else None
+    if comentario:
+        pedido.comentario_cancelacion = comentario
+    await cambiar_estado(db, pedido, estado, actor=admin.email, comentario=comentario)
     
-    pedido.estado = estado
-    if estado == "cancelado" and comentario_cancelacion:
-        pedido.comentario_cancelacion = comentario_cancelacion
-    
-    db.commit()
-    db.refresh(pedido)
+    await db.commit()
+    await db.refresh(pedido)
     return pedido
 
+# ============================================
+# ADMIN: CONTEO E HISTORIAL DE ESTADOS
+# ============================================
+
+@router.get("/conteos", dependencies=[Depends(require_admin)])
+async def contar_pedidos_por_estado(db: AsyncSession = Depends(get_async_db)):
+    """Pedidos por estado para el dashboard (solo admin), sin recorrer la tabla de pedidos"""
+    return await conteos_por_estado(db)
+
+
+@router.get("/{pedido_id}/eventos", dependencies=[Depends(require_admin)])
+async def historial_pedido(pedido_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Historial de cambios de estado de un pedido (solo admin)"""
+    if await db.get(Pedido, pedido_id) is None:
+        raise HTTPException(status_code=404, detail="Pedido no encontrado")
+    eventos = await db.scalars(
+        select(PedidoEvento)
+        .where(PedidoEvento.pedido_id == pedido_id)
+        .order_by(PedidoEvento.creado_en, PedidoEvento.id)
+    )
+    return respuesta_confiable([
+        {
+            "estado_anterior": e.estado_anterior,
+            "estado_nuevo": e.estado_nuevo,
+            "actor": e.actor,
+            "comentario": e.comentario,
+            "creado_en": e.creado_en,
+        }
+        for e in eventos
+    ])
+
 # ============================================
 # ADMIN: ACTUALIZAR PEDIDO PERSONALIZADO
 # ============================================
 
 @router.patch("/{pedido_id}/personalizado", dependencies=[Depends(require_admin)])
-def actualizar_pedido_personalizado(
+async def actualizar_pedido_personalizado(
     pedido_id: str,
     data: ActualizarPedidoPersonalizadoRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Actualizar campos personalizados de un pedido (solo admin)"""
-    pedido = db.query(Pedido).filter(Pedido.id == pedido_id).first()
+    pedido = await db.get(Pedido, pedido_id)
     if not pedido:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
     
@@ -285,6 +465,6 @@ def actualizar_pedido_personalizado(
     if data.comentario_vendedor is not None:
         pedido.comentario_vendedor = data.comentario_vendedor
     
-    db.commit()
-    db.refresh(pedido)
+    await db.commit()
+    await db.refresh(pedido)
     return pedido
\ No newline at end of file
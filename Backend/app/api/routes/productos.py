@@ -1,48 +1,179 @@
 from typing import List, Optional
-import time
-import shutil
-from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, File, UploadFile, Form
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, File, UploadFile, Form
+from pydantic import TypeAdapter
+from sqlalchemy import and_, exists, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db, require_admin
+from app.core.catalog import (
+    TAG_PRODUCTOS, cabeceras_cache, catalog_cache, etag_catalogo, etag_coincide,
+    invalidar_productos_async, no_modificado, normalizar_busqueda, tag_producto,
+)
+from app.core.dependencies import get_async_db, require_admin
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.config import settings
+from app.core.storage import confirmar_imagen_async, guardar_imagen_async, liberar_imagen_async
+from app.core.thumbnails import programar_derivados
+from app.db.search import expresion_busqueda, fts_disponible, subconsulta_coincidencias
+from app.models.pedido import PedidoItem
 from app.models.producto import Producto as ProductoModel
 from app.schemas.producto import ProductoCreate, ProductoUpdate, ProductoOut
 
 router = APIRouter(prefix="/api/productos", tags=["productos"])
 
-# 📁 Carpeta donde se guardarán las imágenes
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+_lista_productos = TypeAdapter(List[ProductoOut])
 
 # ✅ ENDPOINT DE LISTADO
 @router.get("/", response_model=List[ProductoOut])
-def list_productos(
+async def list_productos(
+    request: Request,
     q: Optional[str] = Query(None),
     categoria: Optional[str] = Query(None, description="Filtrar por slug de categoría"),
     offset: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lista todos los productos con búsqueda opcional y filtro por categoría (slug).
+
+    La búsqueda usa el índice FTS5 (prefijos, ordenado por relevancia BM25)
+    cuando está disponible; si no, recurre a ILIKE sobre nombre y descripción.
+
+    Paginación: si se envía ``cursor`` se usa keyset (se ignora ``offset``)
+    sobre el orden del listado: ``id`` o, en una búsqueda con FTS,
+    ``(relevancia, id)``. Si la página está completa, el cursor de la
+    siguiente se devuelve en el header ``X-Next-Cursor``. Sin cursor,
+    ``offset``/``limit`` siguen funcionando.
+
+    La respuesta ya serializada se guarda en la caché del catálogo; las
+    escrituras sobre productos (incluido el stock de un checkout) la invalidan.
+    Con ``If-None-Match`` igual a la versión del catálogo se responde 304.
     """
-    query = db.query(ProductoModel).filter(ProductoModel.activo == True)
+    etag = etag_catalogo()
+    if etag_coincide(request, etag):
+        return no_modificado(etag, settings.CACHE_CONTROL_PRODUCTOS)
+
+    q = normalizar_busqueda(q)
+    if cursor is not None:
+        offset = 0
+    clave = ("productos", q, categoria, offset, limit, cursor)
+
+    async def calcular():
+        productos, siguiente = await _consultar_productos(db, q, categoria, offset, limit, cursor)
+        cuerpo = _lista_productos.dump_json(_lista_productos.validate_python(productos, from_attributes=True))
+        tags = {TAG_PRODUCTOS, *(tag_producto(p.id) for p in productos)}
+        return (cuerpo, siguiente), len(cuerpo), tags
+
+    cuerpo, siguiente = await catalog_cache.get_or_compute(clave, calcular)
+    headers = cabeceras_cache(etag, settings.CACHE_CONTROL_PRODUCTOS)
+    if siguiente:
+        headers[NEXT_CURSOR_HEADER] = siguiente
+    return Response(content=cuerpo, media_type="application/json", headers=headers)
+
+
+async def _consultar_productos(
+    db: AsyncSession,
+    q: Optional[str],
+    categoria: Optional[str],
+    offset: int,
+    limit: int,
+    cursor: Optional[str],
+):
+    """Consulta de una página del listado; devuelve (productos, cursor siguiente)."""
+    query = select(ProductoModel).where(ProductoModel.activo == True)
     
     # Filtro por nombre (búsqueda)
-    if q:
-        query = query.filter(or_(
+    expresion = expresion_busqueda(q) if q else None
+    coincidencias = None
+    if expresion and fts_disponible():
+        coincidencias = subconsulta_coincidencias(expresion)
+        # Por relevancia y, a igual relevancia, por id (orden estable para el cursor)
+        query = (
+            query.add_columns(coincidencias.c.rank)
+            .join(coincidencias, coincidencias.c.id == ProductoModel.id)
+            .order_by(coincidencias.c.rank, ProductoModel.id)
+        )
+    elif q:
+        query = query.where(or_(
             ProductoModel.nombre.ilike(f"%{q}%"),
             ProductoModel.descripcion.ilike(f"%{q}%")
         ))
     
     # ✅ Filtro por slug de categoría
     if categoria:
-        query = query.filter(ProductoModel.categoria == categoria)
+        query = query.where(ProductoModel.categoria == categoria)
     
-    return query.offset(offset).limit(limit).all()
+    if coincidencias is None:
+        query = query.order_by(ProductoModel.id)
+
+    if cursor is None:
+        query = query.offset(offset)
+    elif coincidencias is not None:
+        ultimo_rank, ultimo_id = decode_cursor(cursor, float, int)
+        query = query.where(or_(
+            coincidencias.c.rank > ultimo_rank,
+            and_(coincidencias.c.rank == ultimo_rank, ProductoModel.id > ultimo_id)
+        ))
+    else:
+        (ultimo_id,) = decode_cursor(cursor, int)
+        query = query.where(ProductoModel.id > ultimo_id)
+
+    if coincidencias is None:
+        productos = (await db.scalars(query.limit(limit))).all()
+        siguiente = encode_cursor(productos[-1].id) if len(productos) == limit else None
+        return productos, siguiente
+
+    filas = (await db.execute(query.limit(limit))).all()
+    productos = [producto for producto, _ in filas]
+    siguiente = None
+    if len(filas) == limit:
+        ultimo, rank = filas[-1]
+        siguiente = encode_cursor(float(rank), ultimo.id)
+    return productos, siguiente
+
+async def _guardar_imagen_subida(imagen: UploadFile) -> str:
+    """Guarda la imagen en streaming, sin bloquear el event loop."""
+    try:
+        return await guardar_imagen_async(imagen, settings.MAX_UPLOAD_BYTES)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al guardar imagen: {str(e)}")
+
+
+async def _obtener_producto(db: AsyncSession, producto_id: int) -> ProductoModel:
+    producto = await db.get(ProductoModel, producto_id)
+    if not producto:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    return producto
+
+
+async def _actualizar_producto(
+    db: AsyncSession, producto: ProductoModel, cambios: dict, nueva_url: Optional[str]
+) -> ProductoModel:
+    for campo, valor in cambios.items():
+        setattr(producto, campo, valor)
+
+    imagen_anterior = None
+    if nueva_url and nueva_url != producto.imagen_url:
+        imagen_anterior = producto.imagen_url
+        producto.imagen_url = nueva_url
+        producto.imagen_srcset = None
+
+    try:
+        await db.commit()
+    finally:
+        # Restaura el archivo si se reutilizó y otra petición lo borró antes del commit
+        await confirmar_imagen_async(nueva_url)
+    await invalidar_productos_async([producto.id], listados=True)
+
+    # Eliminar la imagen anterior solo si ningún otro producto (ni pedido) la usa
+    await liberar_imagen_async(imagen_anterior, db)
+
+    await db.refresh(producto)
+    return producto
+
 
 # ✅ ENDPOINT DE CREACIÓN CON IMAGEN
 @router.post("/", response_model=ProductoOut, status_code=status.HTTP_201_CREATED, 
@@ -58,25 +189,20 @@ async def create_producto(
     categoria: Optional[str] = Form(None),
     activo: str = Form("true"),
     imagen: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """
+    Crear un producto con imagen opcional.
+    La imagen se copia en streaming y la base de datos se usa con la sesión
+    asíncrona, así el event loop no se bloquea durante la subida.
+    """
     activo_bool = activo.lower() == "true"
     img_url = None
     
     if imagen and imagen.filename and imagen.size > 0:
-        timestamp = str(int(time.time() * 1000))
-        clean_name = imagen.filename.replace(" ", "_")
-        file_name = f"{timestamp}_{clean_name}"
-        file_path = UPLOAD_DIR / file_name
-        
-        try:
-            with file_path.open("wb") as buffer:
-                shutil.copyfileobj(imagen.file, buffer)
-            img_url = f"/uploads/{file_name}"
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error al guardar imagen: {str(e)}")
+        img_url = await _guardar_imagen_subida(imagen)
     
-    nuevo_producto = ProductoModel(
+    producto = ProductoModel(
         nombre=nombre,
         descripcion=descripcion,
         precio=precio,
@@ -88,11 +214,18 @@ async def create_producto(
         stock=stock,
         categoria=categoria
     )
-    
-    db.add(nuevo_producto)
-    db.commit()
-    db.refresh(nuevo_producto)
-    return nuevo_producto
+    db.add(producto)
+    try:
+        await db.commit()
+    finally:
+        # Restaura el archivo si se reutilizó y otra petición lo borró antes del commit
+        await confirmar_imagen_async(img_url)
+    await db.refresh(producto)
+    await invalidar_productos_async([producto.id], listados=True)
+
+    # Miniaturas en segundo plano (no retrasan la respuesta)
+    programar_derivados(producto.id, producto.imagen_url)
+    return producto
 
 # ✅ ENDPOINT DE ACTUALIZACIÓN
 @router.put("/{producto_id}", response_model=ProductoOut, dependencies=[Depends(require_admin)])
@@ -108,7 +241,7 @@ async def update_producto(
     categoria: Optional[str] = Form(None),
     activo: Optional[str] = Form(None),
     imagen: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Actualizar un producto existente.
@@ -116,72 +249,53 @@ async def update_producto(
     Soporta actualización de imagen mediante FormData.
     """
     # Buscar el producto
-    producto = db.query(ProductoModel).filter(ProductoModel.id == producto_id).first()
-    if not producto:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    producto = await _obtener_producto(db, producto_id)
     
     # Actualizar solo los campos que se proporcionaron
-    if nombre is not None:
-        producto.nombre = nombre
-    if descripcion is not None:
-        producto.descripcion = descripcion
-    if precio is not None:
-        producto.precio = precio
-    if stock is not None:
-        producto.stock = stock
-    if color is not None:
-        producto.color = color
-    if tamano is not None:
-        producto.tamano = tamano
-    if material is not None:
-        producto.material = material
-    if categoria is not None:
-        producto.categoria = categoria
+    cambios = {
+        campo: valor
+        for campo, valor in dict(
+            nombre=nombre,
+            descripcion=descripcion,
+            precio=precio,
+            stock=stock,
+            color=color,
+            tamano=tamano,
+            material=material,
+            categoria=categoria,
+        ).items()
+        if valor is not None
+    }
     if activo is not None:
-        producto.activo = activo.lower() == "true"
+        cambios["activo"] = activo.lower() == "true"
     
     # Manejar actualización de imagen
+    nueva_url = None
     if imagen and imagen.filename and imagen.size > 0:
-        timestamp = str(int(time.time() * 1000))
-        clean_name = imagen.filename.replace(" ", "_")
-        file_name = f"{timestamp}_{clean_name}"
-        file_path = UPLOAD_DIR / file_name
-        
-        try:
-            with file_path.open("wb") as buffer:
-                shutil.copyfileobj(imagen.file, buffer)
-            
-            # Eliminar imagen anterior si existe
-            if producto.imagen_url:
-                old_image_path = Path(producto.imagen_url.lstrip("/"))
-                if old_image_path.exists():
-                    old_image_path.unlink()
-            
-            producto.imagen_url = f"/uploads/{file_name}"
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error al guardar imagen: {str(e)}")
+        nueva_url = await _guardar_imagen_subida(imagen)
     
-    db.commit()
-    db.refresh(producto)
+    producto = await _actualizar_producto(db, producto, cambios, nueva_url)
+
+    # Miniaturas en segundo plano para la imagen nueva
+    if nueva_url:
+        programar_derivados(producto.id, producto.imagen_url)
     return producto
 
 # ✅ ENDPOINT DE ELIMINACIÓN CORREGIDO
 @router.delete("/{producto_id}", status_code=status.HTTP_204_NO_CONTENT,
                dependencies=[Depends(require_admin)])
-def delete_producto(producto_id: int, db: Session = Depends(get_db)):
+async def delete_producto(producto_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Eliminar un producto y su imagen asociada del servidor.
     No se puede eliminar si tiene pedidos asociados.
     """
-    from app.models.pedido import PedidoItem  # Import dentro de la función
-    
     # Buscar el producto
-    producto = db.query(ProductoModel).filter(ProductoModel.id == producto_id).first()
-    if not producto:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    producto = await _obtener_producto(db, producto_id)
     
     # ✅ VERIFICAR SI TIENE PEDIDOS ASOCIADOS
-    pedidos_asociados = db.query(PedidoItem).filter(PedidoItem.producto_id == producto_id).first()
+    pedidos_asociados = await db.scalar(
+        select(exists().where(PedidoItem.producto_id == producto_id))
+    )
     if pedidos_asociados:
         raise HTTPException(
             status_code=400, 
@@ -189,28 +303,33 @@ def delete_producto(producto_id: int, db: Session = Depends(get_db)):
                    "Considere desactivarlo en lugar de eliminarlo."
         )
     
-    # Eliminar imagen asociada antes de borrar el producto
-    if producto.imagen_url:
-        try:
-            image_path = Path(producto.imagen_url.lstrip("/"))
-            if image_path.exists():
-                image_path.unlink()
-                print(f"✅ Imagen eliminada: {image_path}")
-        except Exception as e:
-            # Log del error pero no fallar la eliminación
-            print(f"⚠️ Error al eliminar imagen: {e}")
-    
     # Eliminar producto de la base de datos
-    db.delete(producto)
-    db.commit()
+    imagen_url = producto.imagen_url
+    await db.delete(producto)
+    await db.commit()
+    await invalidar_productos_async([producto_id], listados=True)
+
+    # Eliminar imagen asociada solo si ningún otro producto (ni pedido) la usa
+    await liberar_imagen_async(imagen_url, db)
     
     return None
 
 # ✅ OBTENER UN PRODUCTO POR ID (DEBE IR AL FINAL)
 @router.get("/{producto_id}", response_model=ProductoOut)
-def get_producto(producto_id: int, db: Session = Depends(get_db)):
+async def get_producto(producto_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Obtener un producto específico por ID"""
-    producto = db.query(ProductoModel).filter(ProductoModel.id == producto_id).first()
-    if not producto:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return producto
+    etag = etag_catalogo()
+    if etag_coincide(request, etag):
+        return no_modificado(etag, settings.CACHE_CONTROL_PRODUCTO)
+
+    async def calcular():
+        # Un 404 se propaga a quien espere la misma clave y no se cachea
+        producto = await _obtener_producto(db, producto_id)
+        cuerpo = ProductoOut.model_validate(producto).model_dump_json().encode()
+        return cuerpo, len(cuerpo), {tag_producto(producto_id)}
+
+    cuerpo = await catalog_cache.get_or_compute(("producto", producto_id), calcular)
+    return Response(
+        content=cuerpo, media_type="application/json",
+        headers=cabeceras_cache(etag, settings.CACHE_CONTROL_PRODUCTO),
+    )
@@ -0,0 +1,251 @@
+# app/core/cache.py
+"""
+Caché en memoria del proceso.
+
+``TTLCache`` es un diccionario acotado con expulsión LRU y expiración por
+tiempo, seguro para usarse desde los hilos del threadpool de FastAPI.
+
+``TaggedCache`` añade límite en bytes, invalidación por etiquetas y cálculo
+único de claves frías (para respuestas serializadas del catálogo).
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from app.core.metrics import registrar_cache
+
+
+class TTLCache:
+    """
+    Caché LRU con tiempo de vida por entrada.
+
+    Args:
+        max_size (int): Número máximo de entradas (0 desactiva la caché)
+        ttl_seconds (float): Segundos que una entrada se considera válida
+        name (str): Nombre en las métricas de aciertos/fallos (None = sin métricas)
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, name: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Devuelve el valor cacheado o None si no existe o expiró."""
+        valor = self._get(key)
+        if self.name is not None:
+            registrar_cache(self.name, valor is not None)
+        return valor
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entrada = self._data.get(key)
+            if entrada is None:
+                self.misses += 1
+                return None
+
+            valor, expira = entrada
+            if expira <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return valor
+
+    def set(self, key: Hashable, valor: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (valor, time.monotonic() + self.ttl_seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de aciertos/fallos y tamaño actual."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class TaggedCache:
+    """
+    Caché LRU acotada en bytes, con etiquetas para invalidar en bloque y
+    protección contra estampidas.
+
+    - Cada entrada declara su tamaño y un conjunto de etiquetas
+      (``"productos"``, ``"producto:3"``...). ``invalidate_tags`` borra todas
+      las entradas con alguna de esas etiquetas.
+    - ``get_or_compute`` calcula una clave fría una sola vez: las peticiones
+      concurrentes a la misma clave esperan el mismo resultado.
+    - Si una etiqueta se invalida mientras se calculaba un valor, ese valor
+      (posiblemente obsoleto) no se guarda.
+
+    Args:
+        max_bytes (int): Tamaño máximo total de los valores (0 desactiva la caché)
+        ttl_seconds (float): Vida máxima de una entrada
+        name (str): Nombre en las métricas de aciertos/fallos
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, name: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        # clave -> (valor, tamaño, etiquetas, expira)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._por_etiqueta: Dict[str, set] = {}
+        # Generación de la última invalidación de cada etiqueta
+        self._generacion = 0
+        self._invalidada_en: Dict[str, int] = {}
+        self._vaciada_en = 0
+        self._en_curso: Dict[Hashable, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entrada = self._data.get(key)
+            if entrada is not None and entrada[3] <= time.monotonic():
+                self._quitar(key)
+                entrada = None
+            if entrada is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if self.name is not None:
+            registrar_cache(self.name, entrada is not None)
+        return None if entrada is None else entrada[0]
+
+    def set(self, key: Hashable, valor: Any, size: int, tags: Iterable[str] = (),
+            generation: Optional[int] = None) -> bool:
+        """
+        Guarda un valor. Con ``generation`` (la de ``current_generation()``
+        antes de calcularlo) no se guarda si alguna etiqueta se invalidó, o
+        la caché se vació, después. Devuelve si se guardó.
+        """
+        tags = frozenset(tags)
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return False
+        with self._lock:
+            if generation is not None and (
+                self._vaciada_en > generation
+                or any(self._invalidada_en.get(tag, -1) > generation for tag in tags)
+            ):
+                return False
+            if key in self._data:
+                self._quitar(key)
+            self._data[key] = (valor, size, tags, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            for tag in tags:
+                self._por_etiqueta.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._data)))
+        return True
+
+    def current_generation(self) -> int:
+        with self._lock:
+            self._generacion += 1
+            return self._generacion
+
+    def invalidate_tags(self, *tags: str) -> None:
+        with self._lock:
+            self._generacion += 1
+            for tag in tags:
+                self._invalidada_en[tag] = self._generacion
+                for key in self._por_etiqueta.pop(tag, ()):
+                    if key in self._data:
+                        self._quitar(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generacion += 1
+            self._vaciada_en = self._generacion
+            self._data.clear()
+            self._por_etiqueta.clear()
+            self._bytes = 0
+
+    def _quitar(self, key: Hashable) -> None:
+        """Borra una entrada (con el lock tomado)."""
+        _, size, tags, _ = self._data.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            claves = self._por_etiqueta.get(tag)
+            if claves is not None:
+                claves.discard(key)
+                if not claves:
+                    del self._por_etiqueta[tag]
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Tuple[Any, int, Iterable[str]]]],
+    ) -> Any:
+        """
+        Devuelve el valor cacheado o lo calcula una sola vez.
+
+        ``compute`` devuelve ``(valor, tamaño_en_bytes, etiquetas)``. Si la
+        petición que lo estaba calculando se cancela (cliente desconectado),
+        las que esperaban no reciben ``CancelledError``: una de ellas lo
+        calcula con su propio ``compute``.
+        """
+        while True:
+            valor = self.get(key)
+            if valor is not None:
+                return valor
+
+            en_curso = self._en_curso.get(key)
+            if en_curso is None:
+                break
+            try:
+                return await asyncio.shield(en_curso)
+            except asyncio.CancelledError:
+                if not en_curso.cancelled():
+                    # La cancelada es esta petición, no la que calculaba
+                    raise
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_curso[key] = futuro
+        generacion = self.current_generation()
+        try:
+            valor, size, tags = await compute()
+            self.set(key, valor, size, tags, generation=generacion)
+            futuro.set_result(valor)
+            return valor
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            # Evita el aviso "exception was never retrieved" si nadie esperaba
+            futuro.exception()
+            raise
+        finally:
+            self._en_curso.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "bytes": self._bytes,
+            }
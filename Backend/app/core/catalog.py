@@ -0,0 +1,176 @@
+# app/core/catalog.py
+"""
+Caché de respuestas del catálogo (productos y categorías).
+
+Las rutas públicas del catálogo guardan aquí el JSON ya serializado, con
+clave por la consulta normalizada. Las etiquetas permiten invalidar solo lo
+afectado por cada escritura:
+
+- ``productos``: todos los listados (cualquier alta/edición/baja puede
+  cambiar qué productos aparecen y en qué orden).
+- ``producto:<id>``: el detalle del producto y los listados que lo
+  incluyen (p. ej. al cambiar el stock en un checkout).
+- ``categorias``: el listado de categorías.
+
+Versión del catálogo: cada escritura de productos o categorías reescribe
+``CATALOG_VERSION_FILE``, un archivo compartido por todos los workers. Su
+contenido forma el ETag débil de las rutas públicas del catálogo, de modo
+que un ``If-None-Match`` se contesta con 304 sin consultar la base de datos
+ni serializar nada. Cuando un worker ve que la versión cambió (la escribió
+otro), vacía su caché local.
+
+El stock forma parte del producto: un checkout también cambia la versión
+(``invalidar_productos_async`` tras el commit del pedido), así que un
+cliente con el ETag anterior nunca recibe 304 con un stock desactualizado.
+"""
+
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.cache import TaggedCache
+from app.core.config import settings
+
+TAG_PRODUCTOS = "productos"
+TAG_CATEGORIAS = "categorias"
+
+catalog_cache = TaggedCache(
+    max_bytes=settings.CATALOG_CACHE_MAX_BYTES,
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+    name="catalogo",
+)
+
+
+# Carpeta Backend: una ruta relativa no depende del directorio de arranque,
+# así todos los workers leen y escriben el mismo archivo
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def _ruta_version(configurada: str) -> Path:
+    ruta = Path(configurada)
+    return ruta if ruta.is_absolute() else BACKEND_DIR / ruta
+
+
+VERSION_FILE = _ruta_version(settings.CATALOG_VERSION_FILE)
+
+# (inodo, mtime) del archivo de versión -> versión leída
+_version_vista: Optional[Tuple[Tuple[int, int], str]] = None
+_version_lock = threading.Lock()
+
+
+def tag_producto(producto_id: int) -> str:
+    return f"producto:{producto_id}"
+
+
+def normalizar_busqueda(q: Optional[str]) -> Optional[str]:
+    """Misma clave (y misma consulta) para " grulla  dorada" y "grulla dorada"."""
+    if q is None:
+        return None
+    return re.sub(r"\s+", " ", q).strip() or None
+
+
+def _tags_productos(producto_ids: Iterable[int], listados: bool) -> list:
+    tags = [tag_producto(producto_id) for producto_id in producto_ids]
+    if listados:
+        tags.append(TAG_PRODUCTOS)
+    return tags
+
+
+def invalidar_productos(producto_ids: Iterable[int], listados: bool = False) -> None:
+    """
+    Invalida el detalle y los listados que incluyen esos productos; con
+    ``listados`` invalida además todos los listados. Llamar tras el commit.
+    """
+    catalog_cache.invalidate_tags(*_tags_productos(producto_ids, listados))
+    incrementar_version()
+
+
+async def invalidar_productos_async(producto_ids: Iterable[int], listados: bool = False) -> None:
+    """Versión de ``invalidar_productos`` para rutas ``async`` (el archivo se escribe en el threadpool)."""
+    catalog_cache.invalidate_tags(*_tags_productos(producto_ids, listados))
+    await run_in_threadpool(incrementar_version)
+
+
+def invalidar_categorias() -> None:
+    catalog_cache.invalidate_tags(TAG_CATEGORIAS)
+    incrementar_version()
+
+
+# ===== Versión compartida y respuestas condicionales =====
+
+def _clave_archivo() -> Tuple[int, int]:
+    estado = os.stat(VERSION_FILE)
+    return estado.st_ino, estado.st_mtime_ns
+
+
+def incrementar_version() -> str:
+    """Escribe una versión nueva (reemplazo atómico) y la devuelve."""
+    global _version_vista
+
+    version = f"{time.time_ns():x}-{os.getpid():x}"
+    VERSION_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=VERSION_FILE.parent, prefix=f"{VERSION_FILE.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            tmp.write(version)
+        os.replace(tmp_path, VERSION_FILE)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    with _version_lock:
+        _version_vista = (_clave_archivo(), version)
+    return version
+
+
+def version_catalogo() -> str:
+    """
+    Versión actual del catálogo. Solo hace un ``stat`` salvo que el archivo
+    haya cambiado; en ese caso lo relee y vacía la caché local, que puede
+    tener respuestas anteriores a una escritura hecha en otro worker.
+    """
+    global _version_vista
+
+    try:
+        clave = _clave_archivo()
+    except FileNotFoundError:
+        return incrementar_version()
+
+    vista = _version_vista
+    if vista is not None and vista[0] == clave:
+        return vista[1]
+
+    version = VERSION_FILE.read_text().strip()
+    with _version_lock:
+        if _version_vista is not None and _version_vista[1] != version:
+            catalog_cache.clear()
+        _version_vista = (clave, version)
+    return version
+
+
+def etag_catalogo() -> str:
+    return f'W/"{version_catalogo()}"'
+
+
+def etag_coincide(request: Request, etag: str) -> bool:
+    """Comparación débil de ``If-None-Match`` (RFC 9110)."""
+    cabecera = request.headers.get("if-none-match")
+    if not cabecera:
+        return False
+    valores = {valor.strip().removeprefix("W/") for valor in cabecera.split(",")}
+    return "*" in valores or etag.removeprefix("W/") in valores
+
+
+def cabeceras_cache(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def no_modificado(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers=cabeceras_cache(etag, cache_control))
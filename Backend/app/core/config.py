@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # CORS
@@ -11,6 +11,94 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Base de datos: None = SQLite en app/db/BDproyectoorigami.db
+    DATABASE_URL: Optional[str] = None
+    DB_POOL: str = "queue"  # queue | static | null | singleton
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # segundos (-1 = nunca)
+    DB_POOL_PRE_PING: Optional[bool] = None  # None = solo en servidores (no SQLite)
+
+    # SQLite: perfil "production" (WAL + pragmas) o "dev"
+    DB_PROFILE: str = "production"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+
+    # Migraciones al arrancar: None = solo en env "dev" (en producción se
+    # ejecuta "python -m app.db.migrate" antes de desplegar)
+    DB_AUTO_MIGRATE: Optional[bool] = None
+
+    # Conteo/tiempo de SQL por petición (Server-Timing): None = solo en env "dev"
+    SQL_INSTRUMENTATION: Optional[bool] = None
+    # Máximo de sentencias SQL por petición (0 = sin límite); en "dev" falla la petición
+    SQL_STATEMENT_BUDGET: int = 0
+
+    # Caché de usuarios autenticados (get_current_user)
+    USER_CACHE_MAX_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
+    # Caché de respuestas del catálogo (productos y categorías)
+    CATALOG_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    CATALOG_CACHE_TTL_SECONDS: float = 60.0
+
+    # Versión del catálogo (ETag) compartida por todos los workers: un archivo
+    # que se reescribe en cada escritura de productos/categorías. Una ruta
+    # relativa se toma desde la carpeta Backend, no desde el directorio de arranque
+    CATALOG_VERSION_FILE: str = "app/db/catalog.version"
+    # Cache-Control de las rutas públicas del catálogo
+    CACHE_CONTROL_PRODUCTOS: str = "public, max-age=0, stale-while-revalidate=60"
+    CACHE_CONTROL_PRODUCTO: str = "public, max-age=0, stale-while-revalidate=60"
+    CACHE_CONTROL_CATEGORIAS: str = "public, max-age=60, stale-while-revalidate=600"
+
+    # Hashing de contraseñas en pool de procesos (0 workers = threadpool)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Header Idempotency-Key en la creación de pedidos
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # espera máxima a un duplicado en curso
+    IDEMPOTENCY_LEASE_SECONDS: float = 30.0  # tras esto, una petición en curso se puede retomar
+    IDEMPOTENCY_SWEEP_SECONDS: float = 600.0  # intervalo del barrido (0 = sin barrido)
+
+    # Tamaño máximo de una imagen subida (bytes)
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    # Margen sobre MAX_UPLOAD_BYTES para el cuerpo completo de una petición
+    # (envoltorio multipart y resto de campos del formulario)
+    REQUEST_BODY_OVERHEAD_BYTES: int = 1024 * 1024
+
+    # Endpoint /metrics (Prometheus); multiproceso con PROMETHEUS_MULTIPROC_DIR
+    METRICS_ENABLED: bool = True
+
+    # Sonda /health/ready
+    HEALTH_CACHE_SECONDS: float = 2.0
+    HEALTH_DB_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_MIN_FREE_DISK_MB: int = 100
+    HEALTH_MAX_THREADPOOL_WAITING: int = 20
+
+    # Hilos para generar miniaturas de imágenes (0 = desactivado)
+    THUMBNAIL_WORKERS: int = 2
+
+    @property
+    def auto_migrate(self) -> bool:
+        if self.DB_AUTO_MIGRATE is None:
+            return self.env == "dev"
+        return self.DB_AUTO_MIGRATE
+
+    @property
+    def max_request_body_bytes(self) -> int:
+        """Límite del cuerpo de cualquier petición (0 = sin límite)."""
+        if self.MAX_UPLOAD_BYTES <= 0:
+            return 0
+        return self.MAX_UPLOAD_BYTES + self.REQUEST_BODY_OVERHEAD_BYTES
+
+    @property
+    def sql_instrumentation(self) -> bool:
+        if self.SQL_INSTRUMENTATION is None:
+            return self.env == "dev"
+        return self.SQL_INSTRUMENTATION
+
     class Config:
         env_file = ".env"
         env_prefix = ""
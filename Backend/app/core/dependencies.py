@@ -5,12 +5,17 @@ Módulo de dependencias para FastAPI.
 Gestiona la inyección de dependencias en las rutas de la API.
 """
 
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 
-from app.db.database import SessionLocal
+from app.db.database import AsyncSessionLocal, SessionLocal
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.models.usuario import Usuario
 
@@ -19,6 +24,82 @@ from app.models.usuario import Usuario
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+@dataclass(frozen=True)
+class UsuarioCacheado:
+    """
+    Copia ligera (sin sesión de SQLAlchemy) de los campos de Usuario que
+    necesitan las rutas. Es la que devuelven get_current_user y compañía.
+    """
+    id: int
+    username: str
+    email: str
+    is_admin: bool
+    activo: bool
+
+    @classmethod
+    def desde_modelo(cls, usuario: Usuario) -> "UsuarioCacheado":
+        return cls(
+            id=usuario.id,
+            username=usuario.username,
+            email=usuario.email,
+            is_admin=bool(usuario.is_admin),
+            activo=bool(usuario.activo),
+        )
+
+
+# Caché de usuarios por "sub" del token (email), compartida por el proceso
+user_cache = TTLCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    name="usuarios",
+)
+
+
+def _emails_afectados(usuario: Usuario) -> set:
+    """Email actual y, si cambió en este flush, el anterior."""
+    historial = inspect(usuario).attrs.email.history
+    return {e for e in (usuario.email, *historial.deleted) if e}
+
+
+@event.listens_for(Usuario, "after_update")
+@event.listens_for(Usuario, "after_delete")
+def _invalidar_usuario(mapper, connection, usuario: Usuario) -> None:
+    """
+    Invalida la caché cuando un usuario se modifica o elimina.
+
+    Se invalida en el flush y otra vez tras el commit, para que una petición
+    concurrente no vuelva a cachear la versión anterior entre ambos momentos.
+    """
+    emails = _emails_afectados(usuario)
+    for email in emails:
+        user_cache.invalidate(email)
+
+    session = Session.object_session(usuario)
+    if session is not None:
+        session.info.setdefault("usuarios_modificados", set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_usuarios_confirmados(session: Session) -> None:
+    for email in session.info.pop("usuarios_modificados", ()):
+        user_cache.invalidate(email)
+
+
+async def _obtener_usuario(email: str, db: AsyncSession) -> UsuarioCacheado | None:
+    """Busca el usuario en la caché y, si no está, en la base de datos."""
+    usuario = user_cache.get(email)
+    if usuario is not None:
+        return usuario
+
+    modelo = await db.scalar(select(Usuario).where(Usuario.email == email))
+    if modelo is None:
+        return None
+
+    usuario = UsuarioCacheado.desde_modelo(modelo)
+    user_cache.set(email, usuario)
+    return usuario
+
+
 def get_db():
     """
     Crea y gestiona una sesión de base de datos.
@@ -36,25 +117,46 @@ def get_db():
         db.close()
 
 
-def get_current_user(
+async def get_async_db():
+    """
+    Crea y gestiona una sesión asíncrona de base de datos.
+
+    Las rutas ``async def`` que la usan no ocupan un hilo del threadpool
+    mientras esperan a la base de datos. No hay lazy loads: las relaciones
+    deben cargarse de forma explícita (``selectinload``).
+
+    Yields:
+        AsyncSession: Sesión asíncrona de SQLAlchemy
+
+    Uso:
+        db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
-) -> Usuario:
+    db: AsyncSession = Depends(get_async_db)
+) -> UsuarioCacheado:
     """
     Obtiene el usuario actual autenticado desde el token JWT.
+
+    El usuario se resuelve a través de ``user_cache``, así que en la mayoría
+    de peticiones no se consulta la base de datos.
     
     Args:
         token (str): Token JWT del header Authorization
-        db (Session): Sesión de base de datos
+        db (AsyncSession): Sesión asíncrona de base de datos
     
     Returns:
-        Usuario: Objeto Usuario autenticado
+        UsuarioCacheado: Datos del usuario autenticado
     
     Raises:
         HTTPException: 401 si el token es inválido o el usuario no existe
     
     Uso:
-        current_user: Usuario = Depends(get_current_user)
+        current_user: UsuarioCacheado = Depends(get_current_user)
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,31 +176,31 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    # Buscar usuario en la base de datos
-    usuario = db.query(Usuario).filter(Usuario.email == email).first()
+    # Buscar usuario (caché o base de datos)
+    usuario = await _obtener_usuario(email, db)
     if usuario is None:
         raise credentials_exception
     
     return usuario
 
 
-def require_admin(current_user: Usuario = Depends(get_current_user)) -> Usuario:
+async def require_admin(current_user: UsuarioCacheado = Depends(get_current_user)) -> UsuarioCacheado:
     """
     Verifica que el usuario actual sea administrador.
     
     Esta dependencia se usa para proteger rutas que solo pueden acceder administradores.
     
     Args:
-        current_user (Usuario): Usuario autenticado actual
+        current_user (UsuarioCacheado): Usuario autenticado actual
     
     Returns:
-        Usuario: El mismo usuario si es admin
+        UsuarioCacheado: El mismo usuario si es admin
     
     Raises:
         HTTPException: 403 Forbidden si el usuario no es administrador
     
     Uso:
-        current_admin: Usuario = Depends(require_admin)
+        current_admin: UsuarioCacheado = Depends(require_admin)
     """
     if not current_user.is_admin:  # ✅ is_admin
         raise HTTPException(
@@ -108,10 +210,10 @@ def require_admin(current_user: Usuario = Depends(get_current_user)) -> Usuario:
     return current_user
 
 
-def get_optional_user(
+async def get_optional_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Usuario | None:
+    db: AsyncSession = Depends(get_async_db)
+) -> UsuarioCacheado | None:
     """
     Obtiene el usuario actual si está autenticado, o None si no lo está.
     
@@ -119,13 +221,13 @@ def get_optional_user(
     
     Args:
         token (str): Token JWT opcional
-        db (Session): Sesión de base de datos
+        db (AsyncSession): Sesión asíncrona de base de datos
     
     Returns:
-        Usuario | None: Usuario autenticado o None
+        UsuarioCacheado | None: Usuario autenticado o None
     
     Uso:
-        optional_user: Usuario | None = Depends(get_optional_user)
+        optional_user: UsuarioCacheado | None = Depends(get_optional_user)
     """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -134,8 +236,7 @@ def get_optional_user(
         if email is None:
             return None
             
-        usuario = db.query(Usuario).filter(Usuario.email == email).first()
-        return usuario
+        return await _obtener_usuario(email, db)
         
     except JWTError:
         return None
@@ -0,0 +1,113 @@
+# app/core/hashing.py
+"""
+Servicio asíncrono de hashing de contraseñas.
+
+pbkdf2_sha256 es costoso a propósito. Ejecutarlo en el threadpool de
+Starlette hace que una ráfaga de logins acapare los hilos (y el GIL) que usan
+el resto de endpoints síncronos. Este servicio lo ejecuta en un
+``ProcessPoolExecutor`` dedicado, con una cola acotada: si hay demasiadas
+operaciones pendientes se responde 503 en lugar de acumular latencia.
+
+Si un proceso del pool muere (OOM, segfault) el ``ProcessPoolExecutor``
+queda roto para siempre: se descarta, se crea uno nuevo y la operación se
+reintenta una vez; si vuelve a fallar se responde 503.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+
+
+class PasswordHasher:
+    """
+    Pool de procesos para hashing/verificación de contraseñas.
+
+    Args:
+        workers (int): Procesos del pool (0 = usar el threadpool, útil en desarrollo)
+        max_pending (int): Operaciones en curso o en cola antes de rechazar con 503
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pendientes = 0
+
+    def start(self) -> None:
+        if self.workers > 0 and self._executor is None:
+            # "spawn" evita hacer fork de un proceso con hilos (uvicorn/anyio)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def _reiniciar(self, roto: ProcessPoolExecutor) -> None:
+        """Sustituye un pool roto (solo la primera de las peticiones que lo detectan)."""
+        if self._executor is not roto:
+            return
+        print("⚠️ Pool de hashing de contraseñas roto (murió un proceso); se crea uno nuevo")
+        self._executor = None
+        roto.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _ejecutar(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # El contador solo se toca desde el event loop, no necesita lock
+        if self._pendientes >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio de autenticación saturado, inténtalo de nuevo",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pendientes += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            loop = asyncio.get_running_loop()
+            for _ in range(2):
+                self.start()
+                executor = self._executor
+                try:
+                    return await loop.run_in_executor(executor, fn, *args)
+                except BrokenProcessPool:
+                    self._reiniciar(executor)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio de autenticación no disponible, inténtalo de nuevo",
+                headers={"Retry-After": "1"},
+            )
+        finally:
+            self._pendientes -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._ejecutar(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._ejecutar(verify_password, plain_password, hashed_password)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
@@ -0,0 +1,282 @@
+# app/core/idempotency.py
+"""
+Claves de idempotencia (header ``Idempotency-Key``) para crear pedidos.
+
+Un cliente que reintenta una petición con la misma clave recibe la
+respuesta guardada de la primera, sin que el pedido se cree (ni el stock se
+descuente) otra vez:
+
+1. La primera petición reclama la clave insertando una fila "en curso" en
+   ``claves_idempotencia`` (clave primaria ``(alcance, clave)``, así que
+   solo una petición puede ganar, aunque lleguen a workers distintos).
+2. El estado HTTP y el cuerpo de la respuesta se guardan en la misma
+   transacción que crea el pedido (``confirmar``): o existen los dos o
+   ninguno.
+3. Un duplicado que llega mientras la original sigue en curso espera su
+   resultado (hasta ``IDEMPOTENCY_WAIT_SECONDS``, luego 409). Si llega
+   después, recibe la respuesta guardada con ``Idempotent-Replayed: true``.
+
+La reclamación es un arriendo de ``IDEMPOTENCY_LEASE_SECONDS``: si la
+petición original muere sin terminar (caída del proceso), pasado ese tiempo
+otra petición con la misma clave puede retomarla. Si la original seguía
+viva, al confirmar ve que perdió la reclamación (``reclamado_en`` cambió),
+deshace su pedido y responde 409, así que nunca se crean dos pedidos.
+
+- El alcance es la ruta más el usuario, así que dos usuarios no comparten
+  claves. La misma clave con otro cuerpo responde 422.
+- Si la petición original falla (p. ej. 409 por falta de stock), la clave
+  se libera y el cliente puede reintentar con ella.
+- Las filas caducan a los ``IDEMPOTENCY_TTL_SECONDS``; una tarea en segundo
+  plano las borra cada ``IDEMPOTENCY_SWEEP_SECONDS``.
+"""
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, a_json
+from app.db.database import async_engine
+from app.models.idempotencia import ClaveIdempotencia
+
+HEADER = "Idempotency-Key"
+HEADER_REPETIDA = "Idempotent-Replayed"
+MAX_CLAVE = 255
+
+tabla = ClaveIdempotencia.__table__
+
+# Peticiones originales en curso en este worker: los duplicados que llegan
+# al mismo worker despiertan en cuanto terminan, sin esperar al sondeo
+_en_curso: Dict[Tuple[str, str], asyncio.Event] = {}
+_barrido: Optional["asyncio.Task"] = None
+
+# confirmar(db, contenido): guarda la respuesta y hace commit de ``db``
+Confirmar = Callable[[AsyncSession, Any], Awaitable[None]]
+
+
+async def _solo_commit(db: AsyncSession, contenido: Any) -> None:
+    await db.commit()
+
+
+async def con_idempotencia(
+    request: Request,
+    sujeto: str,
+    crear: Callable[[Confirmar], Awaitable[Any]],
+    status_code: int = 200,
+) -> Response:
+    """
+    Ejecuta ``crear`` como mucho una vez por ``Idempotency-Key``.
+
+    ``crear(confirmar)`` prepara el pedido sin hacer commit y llama a
+    ``await confirmar(db, contenido)`` con el contenido JSON de la respuesta
+    (ya con la forma del esquema): eso guarda la respuesta y hace el commit.
+    Lo que haga después del commit (métricas, cachés) no afecta a la clave.
+    ``sujeto`` identifica al usuario (id o "invitado"). Sin header se
+    comporta como una llamada normal.
+    """
+    clave = request.headers.get(HEADER)
+    if clave is None:
+        return FastJSONResponse(await crear(_solo_commit), status_code=status_code)
+    if not clave or len(clave) > MAX_CLAVE:
+        raise HTTPException(status_code=400, detail=f"{HEADER} debe tener entre 1 y {MAX_CLAVE} caracteres")
+
+    alcance = f"{request.method} {request.url.path} {sujeto}"[:255]
+    huella = hashlib.sha256(await request.body()).hexdigest()
+    fin = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    pausa = 0.02
+
+    while True:
+        reclamada = await _reclamar(alcance, clave, huella)
+        if reclamada is not None:
+            return await _ejecutar(alcance, clave, reclamada, crear, status_code)
+
+        fila = await _leer(alcance, clave)
+        if fila is None:
+            # La original falló y liberó la clave: volver a reclamarla
+            continue
+        ahora = datetime.utcnow()
+        if fila.expira_en < ahora:
+            await _borrar(alcance, clave, caducada=True)
+            continue
+        if fila.huella != huella:
+            raise HTTPException(
+                status_code=422,
+                detail=f"{HEADER} ya se usó con un cuerpo de petición distinto",
+            )
+        if fila.estado_http is not None:
+            return Response(
+                content=fila.cuerpo,
+                status_code=fila.estado_http,
+                media_type="application/json",
+                headers={HEADER_REPETIDA: "true"},
+            )
+        reclamado_en = fila.reclamado_en or fila.creado_en
+        if reclamado_en + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS) < ahora:
+            # La original no terminó dentro de su arriendo: retomarla
+            # (si otra petición se adelantó, se espera a su resultado)
+            reclamada = await _retomar(alcance, clave, fila.reclamado_en)
+            if reclamada is not None:
+                return await _ejecutar(alcance, clave, reclamada, crear, status_code)
+        if time.monotonic() >= fin:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Una petición con esta {HEADER} sigue en curso",
+            )
+
+        evento = _en_curso.get((alcance, clave))
+        try:
+            if evento is not None:
+                await asyncio.wait_for(evento.wait(), pausa)
+            else:
+                await asyncio.sleep(pausa)
+        except asyncio.TimeoutError:
+            pass
+        pausa = min(pausa * 2, 0.5)
+
+
+async def _ejecutar(
+    alcance: str,
+    clave: str,
+    reclamada: datetime,
+    crear: Callable[[Confirmar], Awaitable[Any]],
+    status_code: int,
+) -> Response:
+    evento = _en_curso[(alcance, clave)] = asyncio.Event()
+    cuerpo: Optional[bytes] = None
+
+    async def confirmar(db: AsyncSession, contenido: Any) -> None:
+        nonlocal cuerpo
+        serializado = a_json(contenido)
+        resultado = await db.execute(
+            update(tabla)
+            .where(_condicion(alcance, clave), tabla.c.reclamado_en == reclamada)
+            .values(estado_http=status_code, cuerpo=serializado.decode("utf-8"))
+        )
+        if resultado.rowcount != 1:
+            # Otra petición retomó la clave tras vencer el arriendo
+            await db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail=f"La petición con esta {HEADER} se retomó en otra petición",
+            )
+        await db.commit()
+        cuerpo = serializado
+
+    try:
+        try:
+            contenido = await crear(confirmar)
+        except BaseException:
+            # Solo libera la clave si la respuesta no llegó a guardarse
+            await asyncio.shield(_borrar(alcance, clave, reclamada=reclamada))
+            raise
+        if cuerpo is None:
+            raise RuntimeError("crear() debe llamar a confirmar() para guardar la respuesta")
+        return Response(content=cuerpo, status_code=status_code, media_type="application/json")
+    finally:
+        _en_curso.pop((alcance, clave), None)
+        evento.set()
+
+
+# ===== Acceso a la tabla =====
+
+def _condicion(alcance: str, clave: str):
+    return (tabla.c.alcance == alcance) & (tabla.c.clave == clave)
+
+
+async def _reclamar(alcance: str, clave: str, huella: str) -> Optional[datetime]:
+    """Inserta la fila "en curso"; devuelve su ``reclamado_en`` o None si ya existía."""
+    ahora = datetime.utcnow()
+    try:
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(tabla).values(
+                alcance=alcance,
+                clave=clave,
+                huella=huella,
+                creado_en=ahora,
+                reclamado_en=ahora,
+                expira_en=ahora + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+            ))
+    except IntegrityError:
+        return None
+    return ahora
+
+
+async def _retomar(alcance: str, clave: str, anterior: Optional[datetime]) -> Optional[datetime]:
+    """Renueva el arriendo vencido de otra petición; None si otra se adelantó."""
+    ahora = datetime.utcnow()
+    condicion = _condicion(alcance, clave) & tabla.c.estado_http.is_(None)
+    if anterior is None:
+        condicion &= tabla.c.reclamado_en.is_(None)
+    else:
+        condicion &= tabla.c.reclamado_en == anterior
+    async with async_engine.begin() as conn:
+        resultado = await conn.execute(update(tabla).where(condicion).values(reclamado_en=ahora))
+    return ahora if resultado.rowcount == 1 else None
+
+
+async def _leer(alcance: str, clave: str):
+    async with async_engine.connect() as conn:
+        return (await conn.execute(select(tabla).where(_condicion(alcance, clave)))).first()
+
+
+async def _borrar(
+    alcance: str, clave: str, caducada: bool = False, reclamada: Optional[datetime] = None
+) -> None:
+    condicion = _condicion(alcance, clave)
+    if caducada:
+        condicion &= tabla.c.expira_en < datetime.utcnow()
+    if reclamada is not None:
+        # Solo la reclamación propia y sin respuesta guardada
+        condicion &= (tabla.c.reclamado_en == reclamada) & tabla.c.estado_http.is_(None)
+    async with async_engine.begin() as conn:
+        await conn.execute(delete(tabla).where(condicion))
+
+
+# ===== Barrido de claves caducadas =====
+
+async def barrer_caducadas() -> int:
+    """Borra las claves caducadas y devuelve cuántas."""
+    async with async_engine.begin() as conn:
+        resultado = await conn.execute(delete(tabla).where(tabla.c.expira_en < datetime.utcnow()))
+    return resultado.rowcount
+
+
+async def _barrer_periodicamente() -> None:
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_SWEEP_SECONDS)
+        try:
+            borradas = await barrer_caducadas()
+        except Exception as e:
+            print(f"⚠️ Error en el barrido de claves de idempotencia: {e}")
+            continue
+        if borradas:
+            print(f"🧹 {borradas} claves de idempotencia caducadas eliminadas")
+
+
+def iniciar_barrido() -> None:
+    """Arranca el barrido periódico (llamar desde el event loop, al arrancar)."""
+    global _barrido
+
+    if _barrido is None and settings.IDEMPOTENCY_SWEEP_SECONDS > 0:
+        _barrido = asyncio.get_running_loop().create_task(_barrer_periodicamente())
+
+
+async def detener_barrido() -> None:
+    global _barrido
+
+    if _barrido is None:
+        return
+    _barrido.cancel()
+    try:
+        await _barrido
+    except asyncio.CancelledError:
+        pass
+    _barrido = None
@@ -0,0 +1,58 @@
+# app/core/limits.py
+"""
+Límite de tamaño del cuerpo de las peticiones.
+
+Se aplica mientras el cuerpo se recibe: si el ``Content-Length`` declarado
+supera el límite se responde 413 sin leer nada, y si el cuerpo llega en
+streaming se cuentan los bytes y se aborta en cuanto se excede, antes de que
+el parser de multipart termine de volcar la subida a disco.
+"""
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DETALLE_413 = "La petición supera el tamaño máximo permitido"
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        for nombre, valor in scope.get("headers", []):
+            if nombre == b"content-length":
+                try:
+                    declarado = int(valor)
+                except ValueError:
+                    declarado = 0
+                if declarado > self.max_bytes:
+                    respuesta = JSONResponse(
+                        {"detail": DETALLE_413},
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    )
+                    await respuesta(scope, receive, send)
+                    return
+                break
+
+        recibidos = 0
+
+        async def receive_limitado() -> Message:
+            nonlocal recibidos
+            mensaje = await receive()
+            if mensaje["type"] == "http.request":
+                recibidos += len(mensaje.get("body", b""))
+                if recibidos > self.max_bytes:
+                    # FastAPI relanza HTTPException durante el parseo del body
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=DETALLE_413,
+                    )
+            return mensaje
+
+        await self.app(scope, receive_limitado, send)
@@ -0,0 +1,204 @@
+# app/core/metrics.py
+"""
+Métricas en formato Prometheus (``GET /metrics``).
+
+- HTTP: peticiones por ruta/método/estado, histograma de latencia y
+  peticiones en curso, etiquetadas con la plantilla de la ruta
+  (``/api/productos/{producto_id}``), nunca con la URL concreta.
+- Base de datos: espera para obtener una conexión del pool y timeouts.
+- Threadpool de anyio: hilos ocupados y tareas esperando hilo.
+- Cachés: aciertos y fallos por caché.
+- Negocio: pedidos creados, pedidos rechazados por falta de stock, logins.
+
+Varios workers (``uvicorn --workers N`` / gunicorn): definir la variable de
+entorno ``PROMETHEUS_MULTIPROC_DIR`` con un directorio vacío y escribible
+antes de arrancar. Cada proceso escribe sus valores en archivos ``mmap`` de
+ese directorio y ``/metrics`` los agrega al servirlos, así que da igual qué
+worker atienda el scrape.
+
+Requiere ``prometheus_client``; si no está instalado (o con
+``METRICS_ENABLED=false``) todas las funciones de registro son no-ops.
+"""
+
+import os
+from time import perf_counter
+from typing import Optional, Sequence
+
+from starlette.responses import Response
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.routing import SIN_RUTA, plantilla_ruta, resolver_plantilla
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+        REGISTRY, generate_latest, multiprocess,
+    )
+except ImportError:  # pragma: no cover - prometheus_client es opcional
+    Counter = None
+
+MULTIPROCESO = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Latencias HTTP (segundos)
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Espera por una conexión del pool (segundos): casi siempre ~0
+BUCKETS_POOL = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+def metricas_disponibles() -> bool:
+    return Counter is not None and settings.METRICS_ENABLED
+
+
+if metricas_disponibles():
+    HTTP_PETICIONES = Counter(
+        "http_requests_total", "Peticiones HTTP atendidas",
+        ["method", "route", "status"],
+    )
+    HTTP_LATENCIA = Histogram(
+        "http_request_duration_seconds", "Duración de las peticiones HTTP",
+        ["method", "route"], buckets=BUCKETS_HTTP,
+    )
+    HTTP_EN_CURSO = Gauge(
+        "http_requests_in_progress", "Peticiones HTTP en curso",
+        ["method", "route"], multiprocess_mode="livesum",
+    )
+    POOL_ESPERA = Histogram(
+        "db_pool_checkout_seconds", "Espera para obtener una conexión del pool",
+        buckets=BUCKETS_POOL,
+    )
+    POOL_TIMEOUTS = Counter(
+        "db_pool_checkout_timeouts_total", "Peticiones sin conexión tras DB_POOL_TIMEOUT",
+    )
+    THREADPOOL_OCUPADOS = Gauge(
+        "threadpool_busy_threads", "Hilos del threadpool de anyio en uso",
+        multiprocess_mode="livesum",
+    )
+    THREADPOOL_ESPERANDO = Gauge(
+        "threadpool_waiting_tasks", "Tareas esperando un hilo libre del threadpool",
+        multiprocess_mode="livesum",
+    )
+    THREADPOOL_TOTAL = Gauge(
+        "threadpool_total_threads", "Tamaño del threadpool de anyio",
+        multiprocess_mode="livesum",
+    )
+    CACHE_CONSULTAS = Counter(
+        "cache_requests_total", "Consultas a cachés en memoria",
+        ["cache", "result"],
+    )
+    PEDIDOS_CREADOS = Counter(
+        "orders_created_total", "Pedidos creados", ["tipo"],
+    )
+    PEDIDOS_SIN_STOCK = Counter(
+        "orders_rejected_out_of_stock_total", "Pedidos rechazados por falta de stock",
+    )
+    LOGINS = Counter(
+        "logins_total", "Intentos de login", ["result"],
+    )
+
+
+# ===== Registro (no-op si las métricas están desactivadas) =====
+
+def observar_espera_pool(segundos: float, timeout: bool = False) -> None:
+    if not metricas_disponibles():
+        return
+    POOL_ESPERA.observe(segundos)
+    if timeout:
+        POOL_TIMEOUTS.inc()
+
+
+def registrar_cache(nombre: str, acierto: bool) -> None:
+    if metricas_disponibles():
+        CACHE_CONSULTAS.labels(nombre, "hit" if acierto else "miss").inc()
+
+
+def registrar_pedido_creado(tipo: str) -> None:
+    if metricas_disponibles():
+        PEDIDOS_CREADOS.labels(tipo).inc()
+
+
+def registrar_sin_stock() -> None:
+    if metricas_disponibles():
+        PEDIDOS_SIN_STOCK.inc()
+
+
+def registrar_login(resultado: str) -> None:
+    if metricas_disponibles():
+        LOGINS.labels(resultado).inc()
+
+
+def _muestrear_threadpool() -> None:
+    """Ocupación del limitador por defecto de anyio (el de run_in_threadpool)."""
+    try:
+        import anyio.to_thread
+
+        limitador = anyio.to_thread.current_default_thread_limiter()
+        estadisticas = limitador.statistics()
+    except Exception:
+        return
+    THREADPOOL_OCUPADOS.set(estadisticas.borrowed_tokens)
+    THREADPOOL_ESPERANDO.set(estadisticas.tasks_waiting)
+    THREADPOOL_TOTAL.set(estadisticas.total_tokens)
+
+
+def respuesta_metricas() -> Response:
+    """Cuerpo de ``/metrics`` (agregando todos los workers en modo multiproceso)."""
+    if MULTIPROCESO:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def proceso_terminado() -> None:
+    """Al apagar un worker, descarta sus gauges "livesum" del directorio compartido."""
+    if metricas_disponibles() and MULTIPROCESO:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    Registra cada petición HTTP. Solo toca contadores de prometheus_client
+    (un lock por serie, sin locks globales) y resuelve la plantilla de ruta
+    recorriendo las rutas de la aplicación.
+    """
+
+    def __init__(self, app: ASGIApp, rutas: Sequence[BaseRoute], excluir: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.rutas = rutas
+        self.excluir = set(excluir)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluir:
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        ruta = resolver_plantilla(self.rutas, scope)
+        estado: Optional[int] = None
+
+        async def send_con_estado(mensaje: Message) -> None:
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        _muestrear_threadpool()
+        en_curso = HTTP_EN_CURSO.labels(metodo, ruta)
+        en_curso.inc()
+        inicio = perf_counter()
+        try:
+            await self.app(scope, receive, send_con_estado)
+        except Exception:
+            estado = estado or 500
+            raise
+        finally:
+            en_curso.dec()
+            # Tras el enrutado, la ruta elegida por FastAPI es la referencia
+            final = plantilla_ruta(scope)
+            if final == SIN_RUTA:
+                final = ruta
+            HTTP_LATENCIA.labels(metodo, final).observe(perf_counter() - inicio)
+            HTTP_PETICIONES.labels(metodo, final, str(estado or 500)).inc()
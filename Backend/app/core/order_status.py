@@ -0,0 +1,164 @@
+# app/core/order_status.py
+"""
+Ciclo de vida de los pedidos.
+
+    pendiente -> revision -> elaborando -> terminado -> despachado
+    (revision es opcional: un pedido estándar puede pasar directo a elaborando)
+    cancelado: desde cualquier estado anterior a despachado
+
+Cada cambio, en la misma transacción que lo aplica:
+
+- Se aplica con un UPDATE condicional (``WHERE estado = <actual>``): si otro
+  administrador cambió el pedido a la vez, el segundo recibe 409 en vez de
+  pisar el cambio.
+- Inserta una fila en ``pedido_eventos`` con el estado anterior, el nuevo,
+  el actor y la fecha.
+- Mueve una unidad entre filas de ``pedido_conteos``, así que el dashboard
+  lee los totales por estado sin recorrer ``pedidos``.
+
+Cada estado tiene ``FRAGMENTOS_CONTEO`` filas de contador y cada cambio
+suma o resta en una al azar: dos pedidos simultáneos casi nunca esperan por
+la misma fila. El total de un estado es la suma de sus fragmentos.
+
+Los nombres anteriores a la migración 0007 (``en_proceso``, ``completado``)
+se siguen aceptando como alias para clientes que aún los envíen.
+"""
+
+import random
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pedido import Pedido, PedidoConteo, PedidoEvento
+
+# Filas de contador por estado (la migración 0007 crea las de los estados del ciclo)
+FRAGMENTOS_CONTEO = 8
+
+TRANSICIONES: Dict[str, set] = {
+    "pendiente": {"revision", "elaborando", "cancelado"},
+    "revision": {"elaborando", "cancelado"},
+    "elaborando": {"terminado", "cancelado"},
+    "terminado": {"despachado", "cancelado"},
+    "despachado": set(),
+    "cancelado": set(),
+}
+
+ALIAS = {
+    "revisión": "revision",
+    "en_proceso": "elaborando",
+    "elaboración": "elaborando",
+    "elaboracion": "elaborando",
+    "completado": "terminado",
+}
+
+
+def normalizar_estado(estado: str) -> str:
+    """Nombre canónico de un estado; 422 si no es un estado conocido."""
+    valor = estado.strip().lower()
+    valor = ALIAS.get(valor, valor)
+    if valor not in TRANSICIONES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Estado desconocido: {estado!r}. Válidos: {', '.join(TRANSICIONES)}",
+        )
+    return valor
+
+
+async def _sumar_conteo(db: AsyncSession, estado: str, fragmento: int, delta: int) -> bool:
+    resultado = await db.execute(
+        update(PedidoConteo)
+        .where(PedidoConteo.estado == estado, PedidoConteo.fragmento == fragmento)
+        .values(total=PedidoConteo.total + delta)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount == 1
+
+
+async def _mover_conteo(db: AsyncSession, estado: str, delta: int) -> None:
+    fragmento = random.randrange(FRAGMENTOS_CONTEO)
+    if await _sumar_conteo(db, estado, fragmento, delta):
+        return
+    # Fila que aún no existe (estado fuera del ciclo): si otra transacción
+    # la crea a la vez, se deshace solo el savepoint y se suma sobre la suya
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(PedidoConteo).values(estado=estado, fragmento=fragmento, total=delta))
+    except IntegrityError:
+        await _sumar_conteo(db, estado, fragmento, delta)
+
+
+async def registrar_creacion(db: AsyncSession, pedido: Pedido, actor: str) -> None:
+    """Evento y conteo de un pedido nuevo (antes del commit que lo crea)."""
+    # El pedido se inserta antes que su evento (clave foránea)
+    await db.flush()
+    db.add(PedidoEvento(
+        pedido_id=pedido.id,
+        estado_nuevo=pedido.estado,
+        actor=actor,
+        creado_en=datetime.utcnow(),
+    ))
+    await _mover_conteo(db, pedido.estado, +1)
+
+
+async def cambiar_estado(
+    db: AsyncSession,
+    pedido: Pedido,
+    nuevo: str,
+    actor: str,
+    comentario: Optional[str] = None,
+) -> bool:
+    """
+    Aplica una transición (sin commit). Devuelve False si el pedido ya
+    estaba en ese estado (no se registra nada).
+
+    Raises:
+        HTTPException: 422 si la transición no está permitida, 409 si el
+            pedido cambió de estado mientras tanto
+    """
+    actual = pedido.estado
+    nuevo = normalizar_estado(nuevo)
+    if nuevo == actual:
+        return False
+    # Un estado fuera del ciclo (datos antiguos) puede pasar a cualquiera
+    permitidos = TRANSICIONES.get(actual)
+    if permitidos is not None and nuevo not in permitidos:
+        raise HTTPException(
+            status_code=422,
+            detail=f"No se puede pasar un pedido de {actual!r} a {nuevo!r}",
+        )
+
+    resultado = await db.execute(
+        update(Pedido)
+        .where(Pedido.id == pedido.id, Pedido.estado == actual)
+        .values(estado=nuevo)
+        .execution_options(synchronize_session=False)
+    )
+    if resultado.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="El pedido cambió de estado; recarga e inténtalo de nuevo")
+
+    db.add(PedidoEvento(
+        pedido_id=pedido.id,
+        estado_anterior=actual,
+        estado_nuevo=nuevo,
+        actor=actor,
+        comentario=comentario,
+        creado_en=datetime.utcnow(),
+    ))
+    await _mover_conteo(db, actual, -1)
+    await _mover_conteo(db, nuevo, +1)
+    return True
+
+
+async def conteos_por_estado(db: AsyncSession) -> Dict[str, int]:
+    """Pedidos por estado, en el orden del ciclo de vida (incluye los que están a 0)."""
+    totales = dict.fromkeys(TRANSICIONES, 0)
+    filas = await db.execute(
+        select(PedidoConteo.estado, func.sum(PedidoConteo.total)).group_by(PedidoConteo.estado)
+    )
+    totales.update(filas.all())
+    return totales
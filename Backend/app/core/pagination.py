@@ -0,0 +1,62 @@
+# app/core/pagination.py
+"""
+Utilidades de paginación por cursor (keyset).
+
+El cursor es un token opaco (JSON en base64 url-safe) con los valores de la
+clave de ordenación del último elemento de la página. La siguiente página se
+obtiene filtrando por "mayor/menor que" esos valores, de modo que el coste de
+cada página no depende de lo profundo que se haya desplazado el cliente.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import HTTPException, status
+
+# Header en el que se devuelve el cursor de la siguiente página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _serializar(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return {"dt": valor.isoformat()}
+    return valor
+
+
+def _deserializar(valor: Any) -> Any:
+    if isinstance(valor, dict) and "dt" in valor:
+        return datetime.fromisoformat(valor["dt"])
+    return valor
+
+
+def encode_cursor(*valores: Any) -> str:
+    """Codifica los valores de la clave de ordenación en un cursor opaco."""
+    crudo = json.dumps([_serializar(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *tipos: type) -> List[Any]:
+    """
+    Decodifica un cursor generado por ``encode_cursor``.
+
+    ``tipos`` indica el tipo esperado de cada valor de la clave.
+
+    Raises:
+        HTTPException: 400 si el cursor no es válido
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valores, list) or len(valores) != len(tipos):
+            raise ValueError("longitud incorrecta")
+        valores = [_deserializar(v) for v in valores]
+        if not all(isinstance(v, t) for v, t in zip(valores, tipos)):
+            raise ValueError("tipo incorrecto")
+        return valores
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
@@ -0,0 +1,61 @@
+# app/core/responses.py
+"""
+Respuestas JSON rápidas.
+
+- ``FastJSONResponse``: clase de respuesta por defecto de la aplicación.
+  Codifica con ``orjson`` (varias veces más rápido que ``json`` y entiende
+  ``datetime``/``UUID``/``Decimal`` sin pasos extra); si no está instalado,
+  usa la codificación estándar de Starlette.
+- ``respuesta_confiable``: camino rápido para datos que ya tienen la forma
+  del ``response_model`` porque se construyen desde filas de la base de
+  datos (p. ej. los listados de pedidos). Devolver la respuesta directamente
+  evita que FastAPI vuelva a validar cada objeto contra el modelo; el
+  ``response_model`` de la ruta se mantiene para la documentación OpenAPI.
+"""
+
+import json
+from typing import Any, Optional
+
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+def a_json(contenido: Any) -> bytes:
+    """Codifica a JSON (UTF-8); las fechas salen en ISO 8601 con o sin orjson."""
+    if orjson is None:
+        return json.dumps(contenido, ensure_ascii=False, separators=(",", ":"), default=_por_defecto).encode("utf-8")
+    return orjson.dumps(contenido, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _por_defecto(valor: Any) -> Any:
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    return str(valor)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return a_json(content)
+
+
+def respuesta_confiable(
+    contenido: Any, response: Optional[Response] = None, status_code: int = 200
+) -> FastJSONResponse:
+    """
+    Serializa ``contenido`` (dicts/listas ya con la forma del esquema) sin
+    validarlo. Si se pasa el ``Response`` inyectado en la ruta, se copian los
+    headers que ya tenga (p. ej. ``X-Next-Cursor``).
+    """
+    respuesta = FastJSONResponse(contenido, status_code=status_code)
+    if response is not None:
+        respuesta.raw_headers.extend(
+            (clave, valor) for clave, valor in response.raw_headers
+            if clave not in (b"content-length", b"content-type")
+        )
+    return respuesta
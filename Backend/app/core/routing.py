@@ -0,0 +1,49 @@
+# app/core/routing.py
+"""
+Utilidades sobre la ruta que atendió una petición.
+"""
+
+from typing import Optional, Sequence
+
+from starlette.routing import BaseRoute, Match
+from starlette.types import Scope
+
+# Etiqueta para peticiones que no coinciden con ninguna ruta (404, estáticos)
+SIN_RUTA = "<sin ruta>"
+
+
+def plantilla_ruta(scope: Scope) -> str:
+    """
+    Plantilla de la ruta de la petición (``/api/productos/{producto_id}``).
+
+    Se usa para agregar métricas por ruta sin crear una serie por cada id.
+    Solo está disponible después del enrutado: FastAPI deja la ruta elegida
+    en ``scope["route"]``.
+    """
+    return _plantilla(scope.get("route")) or SIN_RUTA
+
+
+def _plantilla(ruta: BaseRoute) -> Optional[str]:
+    return getattr(ruta, "path_format", None) or getattr(ruta, "path", None)
+
+
+def resolver_plantilla(rutas: Sequence[BaseRoute], scope: Scope) -> str:
+    """
+    Plantilla de la ruta que atenderá la petición, antes del enrutado.
+
+    Útil en middlewares que necesitan la etiqueta al empezar la petición
+    (p. ej. peticiones en curso). Una coincidencia parcial (mismo path,
+    otro método) se usa si no hay ninguna completa. Cuando se conozca la
+    ruta definitiva es preferible ``plantilla_ruta``.
+    """
+    parcial = None
+    for ruta in rutas:
+        plantilla = _plantilla(ruta)
+        if plantilla is None:
+            continue
+        coincidencia, _ = ruta.matches(scope)
+        if coincidencia == Match.FULL:
+            return plantilla
+        if coincidencia == Match.PARTIAL and parcial is None:
+            parcial = plantilla
+    return parcial or SIN_RUTA
@@ -0,0 +1,165 @@
+# app/core/sql_stats.py
+"""
+Instrumentación de SQL por petición.
+
+Con ``SQL_INSTRUMENTATION`` activo:
+
+- Unos listeners de SQLAlchemy (``before/after_cursor_execute``) cuentan las
+  sentencias de la petición en curso, su tiempo total y la más lenta. La
+  petición se identifica con una ``ContextVar``, que se propaga tanto al
+  threadpool (rutas sync) como a la sesión asíncrona.
+- ``SQLStatsMiddleware`` añade el header ``Server-Timing`` a la respuesta
+  (visible en las DevTools del navegador) y acumula los datos por plantilla
+  de ruta.
+- Si ``SQL_STATEMENT_BUDGET`` > 0 y una ruta lo supera, en ``env`` "dev" se
+  lanza ``SQLBudgetExceeded`` (hace fallar al TestClient); en otros entornos
+  solo se avisa en el log.
+
+Desactivado, ni los listeners ni el middleware se registran: no hay ningún
+coste por petición.
+"""
+
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.routing import plantilla_ruta
+
+# Longitud máxima del SQL guardado como "sentencia más lenta"
+MAX_SQL = 300
+
+
+class SQLBudgetExceeded(AssertionError):
+    """Una ruta ejecutó más sentencias SQL que el presupuesto configurado."""
+
+
+@dataclass
+class SQLStats:
+    statements: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_sql: Optional[str] = None
+
+    def registrar(self, sql: str, ms: float) -> None:
+        self.statements += 1
+        self.total_ms += ms
+        if ms >= self.slowest_ms:
+            self.slowest_ms = ms
+            self.slowest_sql = sql[:MAX_SQL]
+
+
+@dataclass
+class RouteSQLStats:
+    requests: int = 0
+    statements: int = 0
+    total_ms: float = 0.0
+    max_statements: int = 0
+    slowest_ms: float = 0.0
+    slowest_sql: Optional[str] = None
+
+    def acumular(self, stats: SQLStats) -> None:
+        self.requests += 1
+        self.statements += stats.statements
+        self.total_ms += stats.total_ms
+        self.max_statements = max(self.max_statements, stats.statements)
+        if stats.slowest_ms >= self.slowest_ms:
+            self.slowest_ms = stats.slowest_ms
+            self.slowest_sql = stats.slowest_sql
+
+
+_stats_actuales: ContextVar[Optional[SQLStats]] = ContextVar("sql_stats", default=None)
+
+_por_ruta: Dict[str, RouteSQLStats] = {}
+_lock = threading.Lock()
+
+
+def stats_actuales() -> Optional[SQLStats]:
+    return _stats_actuales.get()
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None and _stats_actuales.get() is not None:
+        context._sql_inicio = perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _stats_actuales.get()
+    inicio = getattr(context, "_sql_inicio", None)
+    if stats is None or inicio is None:
+        return
+    stats.registrar(statement, (perf_counter() - inicio) * 1000)
+
+
+def instrumentar_engine(engine: Engine) -> None:
+    """Registra los listeners de conteo en un engine (síncrono o ``async_engine.sync_engine``)."""
+    if not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar):
+        event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+
+
+def resumen_por_ruta() -> Dict[str, dict]:
+    """Agregado por ruta, de la más costosa en tiempo de base de datos a la que menos."""
+    with _lock:
+        filas = [(ruta, vars(datos).copy()) for ruta, datos in _por_ruta.items()]
+    filas.sort(key=lambda fila: fila[1]["total_ms"], reverse=True)
+    return {ruta: datos for ruta, datos in filas}
+
+
+def reiniciar_resumen() -> None:
+    with _lock:
+        _por_ruta.clear()
+
+
+def server_timing(stats: SQLStats) -> str:
+    return (
+        f'db;dur={stats.total_ms:.2f};desc="{stats.statements} SQL", '
+        f'db-max;dur={stats.slowest_ms:.2f}'
+    )
+
+
+class SQLStatsMiddleware:
+    def __init__(self, app: ASGIApp, budget: int = 0, strict: bool = False):
+        self.app = app
+        self.budget = budget
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = SQLStats()
+        token = _stats_actuales.set(stats)
+
+        async def send_con_timing(mensaje: Message) -> None:
+            if mensaje["type"] == "http.response.start":
+                self._comprobar_presupuesto(scope, stats)
+                headers = MutableHeaders(scope=mensaje)
+                headers.append("Server-Timing", server_timing(stats))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, send_con_timing)
+        finally:
+            _stats_actuales.reset(token)
+            ruta = plantilla_ruta(scope)
+            with _lock:
+                _por_ruta.setdefault(ruta, RouteSQLStats()).acumular(stats)
+
+    def _comprobar_presupuesto(self, scope: Scope, stats: SQLStats) -> None:
+        if self.budget <= 0 or stats.statements <= self.budget:
+            return
+        mensaje = (
+            f"{scope['method']} {plantilla_ruta(scope)} ejecutó {stats.statements} "
+            f"sentencias SQL (presupuesto: {self.budget})"
+        )
+        if self.strict:
+            raise SQLBudgetExceeded(mensaje)
+        print(f"⚠️ {mensaje}")
@@ -0,0 +1,202 @@
+# app/core/static_files.py
+"""
+Servidor de archivos estáticos para ``/uploads`` con caché HTTP.
+
+Frente al ``StaticFiles`` por defecto añade:
+
+- ETag fuerte: para archivos con nombre por contenido (``<sha256>.ext`` y sus
+  miniaturas) el propio hash; para el resto, mtime y tamaño.
+- ``Cache-Control: immutable`` de un año para los archivos con nombre por
+  contenido (su URL cambia si cambia el contenido) y revalidación obligatoria
+  para los demás.
+- ``If-None-Match`` / ``If-Modified-Since`` resueltos con 304 sin abrir el
+  archivo, y peticiones ``Range`` de un solo rango (con ``If-Range``).
+- Variantes precomprimidas (``archivo.br`` / ``archivo.gz``) cuando existen y
+  el cliente las acepta.
+- Envío con ``sendfile`` mediante la extensión ASGI ``http.response.zerocopy``
+  cuando el servidor la ofrece; si no, lectura por bloques.
+
+Como ``lookup_path`` en Starlette, el acceso a disco de cada archivo servido
+(``stat`` de las variantes, apertura del archivo) se hace en el threadpool,
+nunca en el event loop.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+mimetypes.add_type("image/webp", ".webp")
+
+# <sha256>[_w<ancho>][.ext]: contenido inmutable para una URL dada
+NOMBRE_INMUTABLE_RE = re.compile(r"^([0-9a-f]{64}(?:_w\d+)?)(?:\.[a-z0-9]{1,10})?$")
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "public, max-age=0, must-revalidate"
+
+# Variantes precomprimidas, en orden de preferencia
+PRECOMPRIMIDOS = (("br", ".br"), ("gzip", ".gz"))
+
+CHUNK_SIZE = 64 * 1024
+
+# Un único rango de bytes: "bytes=inicio-fin", "bytes=inicio-" o "bytes=-sufijo"
+RANGO_RE = re.compile(r"^bytes=(\d*)-(\d*)$", re.IGNORECASE)
+
+
+def _rango_solicitado(valor: str, tamano: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta un header ``Range`` de un solo rango de bytes.
+
+    Returns:
+        (inicio, fin) inclusivos, o None si no es un rango simple soportado.
+
+    Raises:
+        ValueError: si el rango no se puede satisfacer (416)
+    """
+    coincidencia = RANGO_RE.match(valor.strip())
+    if coincidencia is None:
+        return None
+
+    inicio_txt, fin_txt = coincidencia.groups()
+    if not inicio_txt:
+        # bytes=-N: los últimos N bytes
+        sufijo = int(fin_txt or 0)
+        if sufijo <= 0 or tamano == 0:
+            raise ValueError("rango vacío")
+        return max(0, tamano - sufijo), tamano - 1
+
+    inicio = int(inicio_txt)
+    fin = int(fin_txt) if fin_txt else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        raise ValueError("rango fuera del archivo")
+    return inicio, min(fin, tamano - 1)
+
+
+class ArchivoResponse(Response):
+    """Respuesta con (una parte de) un archivo, con soporte de zero-copy."""
+
+    def __init__(self, path: str, status_code: int, headers: dict, offset: int, length: int):
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.offset = offset
+        self.length = length
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope["method"].upper() == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopy" in scope.get("extensions", {}):
+            archivo = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": archivo,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            finally:
+                await anyio.to_thread.run_sync(archivo.close)
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as archivo:
+            await archivo.seek(self.offset)
+            pendiente = self.length
+            while pendiente > 0:
+                chunk = await archivo.read(min(CHUNK_SIZE, pendiente))
+                if not chunk:
+                    break
+                pendiente -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": pendiente > 0})
+            if pendiente > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadsStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        # Archivos regulares: búsqueda y respuesta (stat de variantes, ETag,
+        # Range) en el threadpool. Lo demás (405, directorios, 404) lo
+        # resuelve Starlette.
+        if scope["method"] in ("GET", "HEAD"):
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                return await anyio.to_thread.run_sync(self.file_response, full_path, stat_result, scope)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        """Respuesta de un archivo; hace ``stat`` de sus variantes (``get_response`` la llama en el threadpool)."""
+        full_path = os.fspath(full_path)
+        request_headers = Headers(scope=scope)
+        nombre = os.path.basename(full_path)
+
+        inmutable = NOMBRE_INMUTABLE_RE.match(nombre)
+        if inmutable:
+            etag = f'"{inmutable.group(1)}"'
+            cache_control = CACHE_INMUTABLE
+        else:
+            etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+            cache_control = CACHE_REVALIDAR
+
+        media_type = mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+        headers = {
+            "etag": etag,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "cache-control": cache_control,
+            "accept-ranges": "bytes",
+            "content-type": media_type,
+        }
+
+        # Variante precomprimida (se elige antes del ETag/Range: cambia los bytes)
+        ruta, tamano = full_path, stat_result.st_size
+        aceptadas = request_headers.get("accept-encoding", "")
+        for codificacion, sufijo in PRECOMPRIMIDOS:
+            candidato = full_path + sufijo
+            if codificacion in aceptadas and os.path.isfile(candidato):
+                ruta, tamano = candidato, os.stat(candidato).st_size
+                headers["content-encoding"] = codificacion
+                headers["etag"] = f'{etag[:-1]}-{codificacion}"'
+                break
+        if any(os.path.isfile(full_path + sufijo) for _, sufijo in PRECOMPRIMIDOS):
+            headers["vary"] = "Accept-Encoding"
+
+        # Las peticiones condicionales y Range solo aplican al archivo pedido (200),
+        # no a una página de error servida con otro estado
+        if status_code == 200 and self.is_not_modified(Headers(headers=headers), request_headers):
+            return NotModifiedResponse(Headers(headers=headers))
+
+        rango = None
+        valor_rango = request_headers.get("range") if status_code == 200 else None
+        if_range = request_headers.get("if-range")
+        if valor_rango and (if_range is None or if_range.strip() == headers["etag"]):
+            try:
+                rango = _rango_solicitado(valor_rango, tamano)
+            except ValueError:
+                return Response(
+                    status_code=416,
+                    headers={"content-range": f"bytes */{tamano}", "accept-ranges": "bytes"},
+                )
+
+        if rango is None:
+            headers["content-length"] = str(tamano)
+            return ArchivoResponse(ruta, status_code, headers, 0, tamano)
+
+        inicio, fin = rango
+        longitud = fin - inicio + 1
+        headers["content-length"] = str(longitud)
+        headers["content-range"] = f"bytes {inicio}-{fin}/{tamano}"
+        return ArchivoResponse(ruta, 206, headers, inicio, longitud)
@@ -0,0 +1,290 @@
+# app/core/storage.py
+"""
+Almacenamiento de imágenes subidas, direccionado por contenido.
+
+Cada archivo se guarda como ``uploads/<sha256><ext>``: bytes idénticos se
+almacenan una sola vez y la URL resultante es inmutable (si cambia el
+contenido, cambia el nombre), por lo que puede cachearse indefinidamente.
+
+El conteo de referencias se obtiene de la base de datos: un archivo se borra
+solo cuando ningún producto apunta ya a su URL y ninguna línea de pedido la
+guardó al comprar.
+
+Reutilizar un archivo que ya existe compite con su borrado: la fila nueva
+aún no está confirmada cuando otra petición cuenta las referencias de la
+anterior. Por eso la subida guarda su copia temporal como reserva y, tras
+el commit, ``confirmar_imagen`` la descarta o, si el archivo desapareció
+entretanto, lo restaura con ella. El conteo y el borrado, y esa
+comprobación, se hacen bajo un mismo bloqueo (``uploads/.bloqueo``,
+compartido por todos los workers de la máquina).
+"""
+
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.pedido import PedidoItem
+from app.models.producto import Producto
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: exclusión solo dentro del proceso
+    fcntl = None
+
+# 📁 Carpeta donde se guardan las imágenes (relativa al directorio de arranque)
+UPLOAD_DIR = Path("uploads")
+UPLOAD_URL_PREFIX = "/uploads/"
+
+# Tamaño de bloque al copiar la subida a disco
+CHUNK_SIZE = 1024 * 1024
+
+# Nombre de un archivo ya direccionado por contenido: <sha256>[.ext]
+NOMBRE_HASH_RE = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,10})?$")
+
+# Sufijo de las miniaturas de una imagen (app/core/thumbnails.py): <stem>_w<ancho>.webp
+SUFIJO_DERIVADO_RE = r"_w\d+\.webp"
+
+
+def _extension(filename: Optional[str]) -> str:
+    """Extensión normalizada del nombre original (".jpg"), o "" si no es válida."""
+    sufijo = Path(filename or "").suffix.lower()
+    return sufijo if re.fullmatch(r"\.[a-z0-9]{1,10}", sufijo) else ""
+
+
+def nombre_por_contenido(digest: str, filename: Optional[str]) -> str:
+    return f"{digest}{_extension(filename)}"
+
+
+# Subidas que reutilizaron un archivo existente: URL -> temporales de reserva
+_reservas: Dict[str, List[str]] = {}
+_bloqueo_local = threading.Lock()
+
+
+def _tomar_bloqueo():
+    _bloqueo_local.acquire()
+    if fcntl is None:
+        return None
+    try:
+        UPLOAD_DIR.mkdir(exist_ok=True)
+        archivo = open(UPLOAD_DIR / ".bloqueo", "a")
+        fcntl.flock(archivo, fcntl.LOCK_EX)
+        return archivo
+    except BaseException:
+        _bloqueo_local.release()
+        raise
+
+
+def _soltar_bloqueo(archivo) -> None:
+    try:
+        if archivo is not None:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
+            archivo.close()
+    finally:
+        _bloqueo_local.release()
+
+
+@contextmanager
+def bloqueo_uploads() -> Iterator[None]:
+    """
+    Exclusión (entre hilos y entre workers) para crear o borrar archivos de
+    ``uploads``: nadie borra una imagen mientras otro escribe algo que depende de ella.
+    """
+    archivo = _tomar_bloqueo()
+    try:
+        yield
+    finally:
+        _soltar_bloqueo(archivo)
+
+
+def _mover_a_destino(tmp_path: str, nombre: str) -> str:
+    """Mueve el temporal a su nombre definitivo; si ya existe, lo guarda como reserva."""
+    destino = UPLOAD_DIR / nombre
+    url = f"{UPLOAD_URL_PREFIX}{nombre}"
+    with bloqueo_uploads():
+        if destino.exists():
+            _reservas.setdefault(url, []).append(tmp_path)
+        else:
+            os.replace(tmp_path, destino)
+    return url
+
+
+def confirmar_imagen(url: Optional[str]) -> None:
+    """
+    Llamar después del commit que guardó ``url`` (haya ido bien o no).
+
+    Si la subida reutilizó un archivo existente y otra petición lo borró
+    antes de ese commit, lo restaura desde la reserva; si no, la descarta.
+    """
+    if not url:
+        return
+    with bloqueo_uploads():
+        pendientes = _reservas.get(url)
+        if not pendientes:
+            return
+        reserva = pendientes.pop()
+        if not pendientes:
+            del _reservas[url]
+        destino = ruta_de_url(url)
+        try:
+            if destino is not None and not destino.exists():
+                os.replace(reserva, destino)
+                print(f"⚠️ Imagen restaurada tras un borrado concurrente: {destino}")
+            else:
+                os.unlink(reserva)
+        except OSError as e:
+            print(f"⚠️ Error al confirmar imagen {url}: {e}")
+
+
+async def confirmar_imagen_async(url: Optional[str]) -> None:
+    """Versión de ``confirmar_imagen`` para rutas ``async``."""
+    if url:
+        await run_in_threadpool(confirmar_imagen, url)
+
+
+def guardar_imagen(imagen: UploadFile) -> str:
+    """
+    Guarda la imagen calculando su SHA-256 mientras se copia a disco.
+    Tras el commit que guarde la URL hay que llamar a ``confirmar_imagen``.
+
+    Returns:
+        str: URL pública inmutable (``/uploads/<sha256><ext>``)
+    """
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    sha = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".subida-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := imagen.file.read(CHUNK_SIZE):
+                sha.update(chunk)
+                buffer.write(chunk)
+        return _mover_a_destino(tmp_path, nombre_por_contenido(sha.hexdigest(), imagen.filename))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _escribir_bloque(buffer, sha, chunk: bytes) -> None:
+    sha.update(chunk)
+    buffer.write(chunk)
+
+
+async def guardar_imagen_async(imagen: UploadFile, max_bytes: int) -> str:
+    """
+    Versión no bloqueante de ``guardar_imagen`` para rutas ``async``.
+
+    La subida se lee por bloques con ``await imagen.read()`` y el hash y la
+    escritura de cada bloque se ejecutan en el threadpool, así el event loop
+    nunca queda bloqueado por disco. El límite de tamaño se comprueba
+    mientras se copia: al superarlo se descarta el temporal y se responde 413.
+    """
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    sha = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".subida-", suffix=".tmp")
+    try:
+        total = 0
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := await imagen.read(CHUNK_SIZE):
+                total += len(chunk)
+                if max_bytes > 0 and total > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="El archivo supera el tamaño máximo permitido"
+                    )
+                await run_in_threadpool(_escribir_bloque, buffer, sha, chunk)
+        nombre = nombre_por_contenido(sha.hexdigest(), imagen.filename)
+        return await run_in_threadpool(_mover_a_destino, tmp_path, nombre)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def ruta_de_url(url: Optional[str]) -> Optional[Path]:
+    """Ruta en disco de una URL ``/uploads/...``, o None si no es una subida local."""
+    if not url or not url.startswith(UPLOAD_URL_PREFIX):
+        return None
+    nombre = url[len(UPLOAD_URL_PREFIX):]
+    if not nombre or "/" in nombre or "\\" in nombre or nombre.startswith("."):
+        return None
+    return UPLOAD_DIR / nombre
+
+
+def _consulta_referencias(url: str):
+    """Productos que usan la imagen más líneas de pedido que la guardaron al comprar."""
+    return select(
+        select(func.count(Producto.id)).where(Producto.imagen_url == url).scalar_subquery()
+        + select(func.count(PedidoItem.id)).where(PedidoItem.imagen_url == url).scalar_subquery()
+    )
+
+
+def contar_referencias(url: str, db: Session) -> int:
+    return db.scalar(_consulta_referencias(url))
+
+
+def derivados_de(ruta: Path) -> List[Path]:
+    """Miniaturas existentes de una imagen (``<stem>_w<ancho>.webp``), sea cual sea su nombre."""
+    patron = re.compile(re.escape(ruta.stem) + SUFIJO_DERIVADO_RE)
+    return [
+        derivado for derivado in UPLOAD_DIR.glob(f"{glob.escape(ruta.stem)}_w*")
+        if patron.fullmatch(derivado.name)
+    ]
+
+
+def _borrar_archivos(ruta: Path) -> None:
+    """Borra la imagen y sus miniaturas derivadas."""
+    try:
+        if ruta.exists():
+            ruta.unlink()
+            print(f"✅ Imagen eliminada: {ruta}")
+        # Nombres antiguos: "foto.jpg" y "foto.png" comparten miniaturas;
+        # se conservan mientras quede otra imagen con el mismo stem
+        if any(UPLOAD_DIR.glob(f"{glob.escape(ruta.stem)}.*")):
+            return
+        for derivado in derivados_de(ruta):
+            derivado.unlink(missing_ok=True)
+    except Exception as e:
+        # Log del error pero no fallar la operación
+        print(f"⚠️ Error al eliminar imagen: {e}")
+
+
+def liberar_imagen(url: Optional[str], db: Session) -> None:
+    """
+    Borra el archivo de una URL si ya nadie lo referencia.
+
+    Debe llamarse después del commit que quitó la referencia. También borra
+    las miniaturas derivadas de la imagen.
+    """
+    ruta = ruta_de_url(url)
+    if ruta is None:
+        return
+    with bloqueo_uploads():
+        if contar_referencias(url, db) == 0:
+            _borrar_archivos(ruta)
+
+
+async def liberar_imagen_async(url: Optional[str], db: AsyncSession) -> None:
+    """Versión de ``liberar_imagen`` para rutas con ``AsyncSession``."""
+    ruta = ruta_de_url(url)
+    if ruta is None:
+        return
+    # El bloqueo se toma y se suelta en el threadpool (puede esperar a otro worker)
+    archivo = await run_in_threadpool(_tomar_bloqueo)
+    try:
+        referencias = await db.scalar(_consulta_referencias(url))
+        if referencias == 0:
+            await run_in_threadpool(_borrar_archivos, ruta)
+    finally:
+        await run_in_threadpool(_soltar_bloqueo, archivo)
@@ -0,0 +1,156 @@
+# app/core/thumbnails.py
+"""
+Miniaturas y tamaños responsive de las imágenes de productos.
+
+Tras cada subida se programa, en un pool de hilos propio (nunca dentro de la
+petición), la generación de versiones WebP de ancho fijo. El resultado se
+guarda en ``Producto.imagen_srcset`` como ``{"200": url, "400": url, ...}``.
+
+Los derivados se nombran a partir del archivo original (que ya está
+direccionado por contenido): ``<sha256>_w400.webp``. Así, productos que
+comparten imagen comparten también sus miniaturas.
+
+Las miniaturas se calculan fuera de cualquier bloqueo y se publican con el
+bloqueo de ``uploads`` tomado, solo si el original sigue existiendo: si
+``liberar_imagen`` lo borró mientras tanto, se descartan en vez de quedar
+huérfanas.
+
+Requiere Pillow; si no está instalado, el pipeline queda desactivado y los
+productos siguen sirviendo solo la imagen original.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import update
+
+from app.core.catalog import invalidar_productos
+from app.core.config import settings
+from app.core.storage import UPLOAD_DIR, UPLOAD_URL_PREFIX, bloqueo_uploads, ruta_de_url
+from app.db.database import SessionLocal
+from app.models.producto import Producto
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow es opcional
+    Image = None
+    ImageOps = None
+
+# Anchos generados (px) y formato de salida
+ANCHOS = (200, 400, 800)
+FORMATO = "WEBP"
+EXTENSION = ".webp"
+CALIDAD = 80
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def derivados_disponibles() -> bool:
+    return Image is not None
+
+
+def nombre_derivado(original: Path, ancho: int) -> str:
+    return f"{original.stem}_w{ancho}{EXTENSION}"
+
+
+def generar_derivados(imagen_url: str) -> Dict[str, str]:
+    """
+    Genera las versiones de cada ancho que no existan todavía.
+
+    No se amplían imágenes: los anchos mayores que el original se omiten,
+    salvo el más pequeño, que siempre se genera como miniatura.
+
+    Returns:
+        dict: ``{"<ancho>": url}`` con los derivados disponibles
+    """
+    original = ruta_de_url(imagen_url)
+    if original is None or not original.exists() or not derivados_disponibles():
+        return {}
+
+    srcset: Dict[str, str] = {}
+    # destino -> temporal, pendientes de publicar
+    nuevos: Dict[Path, Path] = {}
+    try:
+        with Image.open(original) as img:
+            # Respetar la orientación EXIF de las fotos de móvil
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+            for ancho in ANCHOS:
+                if ancho > img.width and srcset:
+                    break
+
+                destino = UPLOAD_DIR / nombre_derivado(original, ancho)
+                if not destino.exists():
+                    alto = max(1, round(img.height * min(ancho, img.width) / img.width))
+                    copia = img.resize((min(ancho, img.width), alto), Image.LANCZOS)
+                    tmp = destino.with_name(f".{destino.name}.tmp")
+                    copia.save(tmp, FORMATO, quality=CALIDAD, method=4)
+                    nuevos[destino] = tmp
+
+                srcset[str(ancho)] = f"{UPLOAD_URL_PREFIX}{destino.name}"
+
+        with bloqueo_uploads():
+            if not original.exists():
+                return {}
+            for destino, tmp in nuevos.items():
+                tmp.replace(destino)
+            nuevos.clear()
+    finally:
+        # Temporales no publicados (error o imagen ya borrada)
+        for tmp in nuevos.values():
+            tmp.unlink(missing_ok=True)
+
+    return srcset
+
+
+def procesar_producto(producto_id: int, imagen_url: str) -> None:
+    try:
+        srcset = generar_derivados(imagen_url)
+    except Exception as e:
+        print(f"⚠️ Error generando miniaturas de {imagen_url}: {e}")
+        return
+    if not srcset:
+        return
+
+    db = SessionLocal()
+    try:
+        # Solo si el producto sigue usando la misma imagen
+        resultado = db.execute(
+            update(Producto)
+            .where(Producto.id == producto_id, Producto.imagen_url == imagen_url)
+            .values(imagen_srcset=srcset)
+        )
+        db.commit()
+    finally:
+        db.close()
+    if resultado.rowcount:
+        invalidar_productos([producto_id])
+
+
+def programar_derivados(producto_id: int, imagen_url: Optional[str]) -> Optional[Future]:
+    """
+    Encola la generación de derivados de la imagen de un producto.
+
+    Debe llamarse después del commit que guardó ``imagen_url``.
+    """
+    global _executor
+
+    if not imagen_url or not derivados_disponibles() or settings.THUMBNAIL_WORKERS <= 0:
+        return None
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix="miniaturas",
+        )
+    return _executor.submit(procesar_producto, producto_id, imagen_url)
+
+
+def shutdown() -> None:
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,295 @@
+# app/db/migrate.py
+"""
+Migraciones versionadas del esquema.
+
+Cada migración es un módulo ``app/db/migrations/mNNNN_<nombre>.py`` con una
+función ``upgrade(conn)``; el número ``NNNN`` es su versión y la primera
+línea del docstring, su descripción. Las versiones aplicadas se registran
+en la tabla ``schema_version``.
+
+Las migraciones se escriben para poder ejecutarse con la aplicación en
+marcha: índices con ``IF NOT EXISTS`` (y ``CONCURRENTLY`` en PostgreSQL
+cuando la migración declara ``TRANSACCIONAL = False``) y columnas nuevas
+nulables. Además son idempotentes, así que aplicar la migración inicial
+sobre una base de datos creada antes de este sistema no rompe nada.
+
+Uso (desde la carpeta Backend):
+    python -m app.db.migrate             # aplica las pendientes
+    python -m app.db.migrate --estado    # muestra versión actual y pendientes
+    python -m app.db.migrate --hasta N   # aplica hasta la versión N
+"""
+
+import argparse
+import importlib
+import pkgutil
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from types import ModuleType
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, inspect, select, text,
+)
+from sqlalchemy.engine import Connection, Engine
+
+from app.db import migrations as paquete_migraciones
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: sin bloqueo entre procesos
+    fcntl = None
+
+TABLA_VERSION = "schema_version"
+
+# Clave del advisory lock de PostgreSQL mientras se migra
+PG_LOCK_MIGRACIONES = 7_236_401
+
+NOMBRE_MIGRACION_RE = re.compile(r"^m(\d{4})_\w+$")
+
+_metadata = MetaData()
+schema_version = Table(
+    TABLA_VERSION,
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("descripcion", String(200), nullable=False),
+    Column("aplicada_en", DateTime, nullable=False),
+)
+
+
+class EsquemaDesactualizado(RuntimeError):
+    """La base de datos tiene migraciones pendientes."""
+
+
+@dataclass(frozen=True)
+class Migracion:
+    version: int
+    descripcion: str
+    upgrade: Callable[[Connection], None]
+    # False: se ejecuta en autocommit (p. ej. CREATE INDEX CONCURRENTLY)
+    transaccional: bool = True
+
+
+def _desde_modulo(modulo: ModuleType, version: int) -> Migracion:
+    descripcion = (modulo.__doc__ or modulo.__name__).strip().splitlines()[0]
+    return Migracion(
+        version=version,
+        descripcion=descripcion[:200],
+        upgrade=modulo.upgrade,
+        transaccional=getattr(modulo, "TRANSACCIONAL", True),
+    )
+
+
+def cargar_migraciones() -> List[Migracion]:
+    """Migraciones del paquete ``app.db.migrations`` ordenadas por versión."""
+    encontradas = {}
+    for info in pkgutil.iter_modules(paquete_migraciones.__path__):
+        coincidencia = NOMBRE_MIGRACION_RE.match(info.name)
+        if coincidencia is None:
+            continue
+        version = int(coincidencia.group(1))
+        if version in encontradas:
+            raise RuntimeError(f"Versión de migración duplicada: {version}")
+        modulo = importlib.import_module(f"{paquete_migraciones.__name__}.{info.name}")
+        encontradas[version] = _desde_modulo(modulo, version)
+    return [encontradas[v] for v in sorted(encontradas)]
+
+
+def versiones_aplicadas(conn: Connection) -> set:
+    if not inspect(conn).has_table(TABLA_VERSION):
+        return set()
+    return set(conn.execute(select(schema_version.c.version)).scalars())
+
+
+def migraciones_pendientes(engine: Engine, migraciones: Optional[Sequence[Migracion]] = None) -> List[Migracion]:
+    migraciones = cargar_migraciones() if migraciones is None else migraciones
+    with engine.connect() as conn:
+        aplicadas = versiones_aplicadas(conn)
+    return [m for m in migraciones if m.version not in aplicadas]
+
+
+def _registrar(conn: Connection, migracion: Migracion) -> None:
+    conn.execute(schema_version.insert().values(
+        version=migracion.version,
+        descripcion=migracion.descripcion,
+        aplicada_en=datetime.utcnow(),
+    ))
+
+
+def _aplicar(engine: Engine, migracion: Migracion) -> bool:
+    """Aplica una migración si nadie la ha aplicado todavía. Devuelve si se aplicó."""
+    if migracion.transaccional:
+        with engine.begin() as conn:
+            # Se vuelve a comprobar dentro de la transacción (otro proceso
+            # pudo aplicarla mientras tanto)
+            if migracion.version in versiones_aplicadas(conn):
+                return False
+            migracion.upgrade(conn)
+            _registrar(conn, migracion)
+        return True
+
+    with engine.connect() as conn:
+        if migracion.version in versiones_aplicadas(conn):
+            return False
+        conn.rollback()
+        autocommit = conn.execution_options(isolation_level="AUTOCOMMIT")
+        migracion.upgrade(autocommit)
+    with engine.begin() as conn:
+        _registrar(conn, migracion)
+    return True
+
+
+@contextmanager
+def _bloqueo_postgresql(engine: Engine) -> Iterator[None]:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:clave)"), {"clave": PG_LOCK_MIGRACIONES})
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": PG_LOCK_MIGRACIONES})
+            conn.commit()
+
+
+@contextmanager
+def _bloqueo_sqlite(engine: Engine) -> Iterator[None]:
+    # flock sobre un archivo junto a la base de datos (SQLite no tiene advisory locks)
+    ruta = engine.url.database
+    if fcntl is None or not ruta or ruta == ":memory:":
+        yield
+        return
+    with open(f"{ruta}.migraciones.lock", "a") as archivo:
+        fcntl.flock(archivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+@contextmanager
+def _bloqueo_migraciones(engine: Engine) -> Iterator[None]:
+    if engine.dialect.name == "postgresql":
+        with _bloqueo_postgresql(engine):
+            yield
+    elif engine.dialect.name == "sqlite":
+        with _bloqueo_sqlite(engine):
+            yield
+    else:
+        yield
+
+
+def migrar(engine: Engine, hasta: Optional[int] = None) -> List[Migracion]:
+    """
+    Aplica las migraciones pendientes (hasta la versión ``hasta`` incluida).
+
+    Varios workers que arrancan a la vez no ejecutan el mismo DDL: en
+    PostgreSQL se toma un advisory lock y en SQLite un ``flock`` sobre
+    ``<base de datos>.migraciones.lock`` (con la transacción diferida de
+    pysqlite, dos procesos leerían ``schema_version`` a la vez y el segundo
+    fallaría al escribir). Sin ``fcntl`` (Windows) no hay bloqueo entre
+    procesos: las migraciones deben ejecutarse desde un solo proceso
+    (``python -m app.db.migrate`` antes de arrancar los workers). Además cada
+    migración se vuelve a comprobar dentro de su transacción.
+
+    Returns:
+        list: migraciones aplicadas por esta llamada
+    """
+    aplicadas = []
+    with _bloqueo_migraciones(engine):
+        _metadata.create_all(engine, checkfirst=True)
+        for migracion in migraciones_pendientes(engine):
+            if hasta is not None and migracion.version > hasta:
+                break
+            if _aplicar(engine, migracion):
+                print(f"✅ Migración {migracion.version:04d} aplicada: {migracion.descripcion}")
+                aplicadas.append(migracion)
+    return aplicadas
+
+
+def verificar_esquema(engine: Engine) -> None:
+    """
+    Comprueba al arrancar que no haya migraciones pendientes.
+
+    Solo lee ``schema_version``: no introspecciona el modelo ni ejecuta DDL,
+    así que es rápido y varios workers pueden arrancar a la vez.
+
+    Raises:
+        EsquemaDesactualizado: si faltan migraciones por aplicar
+    """
+    pendientes = migraciones_pendientes(engine)
+    if pendientes:
+        versiones = ", ".join(f"{m.version:04d}" for m in pendientes)
+        raise EsquemaDesactualizado(
+            f"Migraciones pendientes ({versiones}): ejecuta 'python -m app.db.migrate'"
+        )
+
+
+# ===== Utilidades para los scripts de migración =====
+
+def es_autocommit(conn: Connection) -> bool:
+    return conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+
+
+def crear_indice(conn: Connection, nombre: str, tabla: str, columnas: Sequence[str], unico: bool = False) -> None:
+    """
+    ``CREATE INDEX IF NOT EXISTS`` sin bloquear la tabla cuando es posible.
+
+    En PostgreSQL se usa ``CONCURRENTLY`` si la migración corre en
+    autocommit (``TRANSACCIONAL = False``); en SQLite la creación ya es
+    rápida y no bloquea a los lectores en modo WAL.
+    """
+    preparer = conn.dialect.identifier_preparer
+    concurrente = conn.dialect.name == "postgresql" and es_autocommit(conn)
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unico else ''}INDEX "
+        f"{'CONCURRENTLY ' if concurrente else ''}IF NOT EXISTS "
+        f"{preparer.quote(nombre)} ON {preparer.quote(tabla)} "
+        f"({', '.join(preparer.quote(c) for c in columnas)})"
+    ))
+
+
+def agregar_columna(conn: Connection, tabla: str, columna: Column) -> bool:
+    """
+    Añade una columna nulable si la tabla todavía no la tiene.
+
+    Returns:
+        bool: True si se añadió
+    """
+    if not columna.nullable:
+        raise ValueError(f"Solo se añaden columnas nulables en caliente: {tabla}.{columna.name}")
+    existentes = {c["name"] for c in inspect(conn).get_columns(tabla)}
+    if columna.name in existentes:
+        return False
+
+    preparer = conn.dialect.identifier_preparer
+    tipo = columna.type.compile(dialect=conn.dialect)
+    conn.execute(text(
+        f"ALTER TABLE {preparer.quote(tabla)} ADD COLUMN {preparer.quote(columna.name)} {tipo}"
+    ))
+    return True
+
+
+def main() -> None:
+    from app.db.database import engine
+
+    parser = argparse.ArgumentParser(description="Aplica las migraciones del esquema")
+    parser.add_argument("--estado", action="store_true", help="Solo mostrar versión actual y pendientes")
+    parser.add_argument("--hasta", type=int, default=None, help="Aplicar hasta esta versión (incluida)")
+    args = parser.parse_args()
+
+    if args.estado:
+        with engine.connect() as conn:
+            aplicadas = sorted(versiones_aplicadas(conn))
+        print(f"Versión actual: {aplicadas[-1] if aplicadas else 'ninguna'}")
+        for migracion in migraciones_pendientes(engine):
+            print(f"  pendiente {migracion.version:04d}: {migracion.descripcion}")
+        return
+
+    aplicadas = migrar(engine, hasta=args.hasta)
+    if not aplicadas:
+        print("✅ El esquema ya está al día")
+
+
+if __name__ == "__main__":
+    main()
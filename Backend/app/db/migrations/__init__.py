@@ -0,0 +1,8 @@
+# app/db/migrations/__init__.py
+"""
+Scripts de migración del esquema (ver ``app.db.migrate``).
+
+Cada archivo ``mNNNN_<nombre>.py`` define ``upgrade(conn)`` y, si necesita
+ejecutarse fuera de una transacción, ``TRANSACCIONAL = False``. Las
+migraciones ya publicadas no se modifican: los cambios van en una nueva.
+"""
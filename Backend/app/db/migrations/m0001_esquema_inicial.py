@@ -0,0 +1,108 @@
+# app/db/migrations/m0001_esquema_inicial.py
+"""
+Esquema inicial (tablas existentes antes de las migraciones)
+
+Copia congelada de los modelos en ese momento: no importa ``app.models``,
+para que cambios posteriores en los modelos no alteren esta migración.
+Usa ``checkfirst``, así que en bases de datos ya creadas no hace nada.
+"""
+
+from sqlalchemy import (
+    JSON, Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData,
+    String, Table, Text,
+)
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+
+Table(
+    "usuarios", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String(100), unique=True, nullable=False),
+    Column("email", String(100), unique=True, nullable=False, index=True),
+    Column("password_hash", String(255), nullable=False),
+    Column("is_admin", Boolean),
+    Column("activo", Boolean),
+)
+
+Table(
+    "categorias", metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("nombre", String, nullable=False),
+    Column("slug", String, unique=True, nullable=False, index=True),
+    Column("descripcion", String, nullable=True),
+)
+
+Table(
+    "productos", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String(80), nullable=False),
+    Column("descripcion", String(500)),
+    Column("precio", Float, nullable=False),
+    Column("color", String(50)),
+    Column("tamano", String(50)),
+    Column("material", String(100)),
+    Column("imagen_url", String(500)),
+    Column("activo", Boolean),
+    Column("stock", Integer),
+    Column("categoria", String(100)),
+)
+
+Table(
+    "carritos", metadata,
+    Column("session_id", String, primary_key=True),
+)
+
+Table(
+    "carrito_items", metadata,
+    Column("session_id", String, ForeignKey("carritos.session_id"), primary_key=True),
+    Column("producto_id", Integer, ForeignKey("productos.id"), primary_key=True, index=True),
+    Column("cantidad", Integer, nullable=False),
+)
+
+Table(
+    "Fidelizacion", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("correo", String, unique=True, nullable=False, index=True),
+    Column("nombre_completo", String, nullable=False),
+    Column("fecha_nacimiento", String, nullable=False),
+    Column("redes", JSON, nullable=True),
+    Column("direccion", String, nullable=True),
+    Column("puntos", Integer),
+    Column("tutoriales", JSON, nullable=True),
+    Column("proximo_regalo", String, nullable=True),
+)
+
+Table(
+    "pedidos", metadata,
+    Column("id", String(100), primary_key=True, index=True),
+    Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=True),
+    Column("total", Float, nullable=False),
+    Column("estado", String(50)),
+    Column("tipo", String(50)),
+    Column("contacto_nombre", String(200), nullable=False),
+    Column("contacto_email", String(200), nullable=False),
+    Column("contacto_telefono", String(50), nullable=True),
+    Column("direccion", String(500), nullable=True),
+    Column("metodo_pago", String(50), nullable=True),
+    Column("descripcion", Text, nullable=True),
+    Column("imagen_referencia", String(500), nullable=True),
+    Column("nombre_personalizado", String(200), nullable=True),
+    Column("precio_personalizado", Float, nullable=True),
+    Column("comentario_vendedor", Text, nullable=True),
+    Column("comentario_cancelacion", Text, nullable=True),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "pedido_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("pedido_id", String(100), ForeignKey("pedidos.id"), nullable=False),
+    Column("producto_id", Integer, ForeignKey("productos.id"), nullable=False),
+    Column("cantidad", Integer, nullable=False),
+    Column("precio_unitario", Float, nullable=False),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    metadata.create_all(conn, checkfirst=True)
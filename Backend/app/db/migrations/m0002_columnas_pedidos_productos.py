@@ -0,0 +1,19 @@
+# app/db/migrations/m0002_columnas_pedidos_productos.py
+"""
+Columnas añadidas a tablas existentes (comentarios de pedidos, srcset de imágenes)
+
+En bases de datos anteriores a la columna, ``comentario_vendedor`` y
+``comentario_cancelacion`` se añadían a mano; ``imagen_srcset`` la añadía el
+arranque. Solo se añaden si faltan.
+"""
+
+from sqlalchemy import JSON, Column, Text
+from sqlalchemy.engine import Connection
+
+from app.db.migrate import agregar_columna
+
+
+def upgrade(conn: Connection) -> None:
+    agregar_columna(conn, "pedidos", Column("comentario_vendedor", Text, nullable=True))
+    agregar_columna(conn, "pedidos", Column("comentario_cancelacion", Text, nullable=True))
+    agregar_columna(conn, "productos", Column("imagen_srcset", JSON, nullable=True))
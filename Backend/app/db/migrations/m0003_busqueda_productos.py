@@ -0,0 +1,15 @@
+# app/db/migrations/m0003_busqueda_productos.py
+"""
+Índice de búsqueda de texto completo de productos (FTS5 / GIN tsvector)
+
+Si el motor no lo soporta la migración se da igualmente por aplicada y las
+búsquedas usan ILIKE.
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.db.search import crear_indice_productos
+
+
+def upgrade(conn: Connection) -> None:
+    crear_indice_productos(conn)
@@ -0,0 +1,40 @@
+# app/db/migrations/m0004_indices_consultas.py
+"""
+Índices secundarios para las consultas frecuentes de productos y pedidos
+
+Cada índice sigue la forma de su consulta (filtros de igualdad primero y
+después las columnas del ORDER BY / keyset):
+
+- catálogo: ``activo`` (+ ``categoria``) ordenado por ``id``
+- mis pedidos: ``contacto_email`` ordenado por ``created_at``
+- listados de admin: ``tipo`` ordenado por ``(created_at, id)`` y todos los
+  pedidos por ``(created_at, id)``
+- contadores por ``estado``
+- items por ``pedido_id`` (selectinload) y ``producto_id`` (borrado de
+  productos)
+
+Se ejecuta fuera de transacción para usar CREATE INDEX CONCURRENTLY en
+PostgreSQL.
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.db.migrate import crear_indice
+
+TRANSACCIONAL = False
+
+INDICES = [
+    ("ix_productos_activo_id", "productos", ["activo", "id"]),
+    ("ix_productos_activo_categoria_id", "productos", ["activo", "categoria", "id"]),
+    ("ix_pedidos_contacto_email_created_at", "pedidos", ["contacto_email", "created_at"]),
+    ("ix_pedidos_tipo_created_at_id", "pedidos", ["tipo", "created_at", "id"]),
+    ("ix_pedidos_created_at_id", "pedidos", ["created_at", "id"]),
+    ("ix_pedidos_estado", "pedidos", ["estado"]),
+    ("ix_pedido_items_pedido_id", "pedido_items", ["pedido_id"]),
+    ("ix_pedido_items_producto_id", "pedido_items", ["producto_id"]),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for nombre, tabla, columnas in INDICES:
+        crear_indice(conn, nombre, tabla, columnas)
@@ -0,0 +1,28 @@
+# app/db/migrations/m0005_claves_idempotencia.py
+"""
+Tabla de claves de idempotencia para la creación de pedidos
+
+La clave primaria ``(alcance, clave)`` resuelve cada consulta con una sola
+búsqueda en el índice; ``expira_en`` está indexada para el barrido.
+"""
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+
+Table(
+    "claves_idempotencia", metadata,
+    Column("alcance", String(255), primary_key=True),
+    Column("clave", String(255), primary_key=True),
+    Column("huella", String(64), nullable=False),
+    Column("estado_http", Integer, nullable=True),
+    Column("cuerpo", Text, nullable=True),
+    Column("creado_en", DateTime, nullable=False),
+    Column("expira_en", DateTime, nullable=False),
+    Index("ix_claves_idempotencia_expira_en", "expira_en"),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    metadata.create_all(conn, checkfirst=True)
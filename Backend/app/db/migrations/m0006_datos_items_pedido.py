@@ -0,0 +1,50 @@
+# app/db/migrations/m0006_datos_items_pedido.py
+"""
+Nombre, precio e imagen del producto guardados en cada línea de pedido
+
+Añade ``nombre`` e ``imagen_url`` a ``pedido_items`` y rellena las filas
+existentes con los datos actuales del producto, igual que
+``precio_unitario`` (que hasta ahora nunca se guardaba y valía 0): es lo
+más cercano al momento de la compra que queda en la base de datos. También
+indexa ``imagen_url``, que el borrado de imágenes consulta para no eliminar
+la de un pedido antiguo.
+"""
+
+from sqlalchemy import Column, String, column, func, or_, select, table, update
+from sqlalchemy.engine import Connection
+
+from app.db.migrate import agregar_columna, crear_indice
+
+items = table(
+    "pedido_items",
+    column("producto_id"), column("nombre"), column("imagen_url"), column("precio_unitario"),
+)
+productos = table(
+    "productos",
+    column("id"), column("nombre"), column("imagen_url"), column("precio"),
+)
+
+
+def _del_producto(columna):
+    return select(columna).where(productos.c.id == items.c.producto_id).scalar_subquery()
+
+
+def upgrade(conn: Connection) -> None:
+    agregar_columna(conn, "pedido_items", Column("nombre", String(80), nullable=True))
+    agregar_columna(conn, "pedido_items", Column("imagen_url", String(500), nullable=True))
+
+    conn.execute(
+        update(items)
+        .where(items.c.nombre.is_(None))
+        .values(
+            nombre=_del_producto(productos.c.nombre),
+            imagen_url=_del_producto(productos.c.imagen_url),
+        )
+    )
+    conn.execute(
+        update(items)
+        .where(or_(items.c.precio_unitario.is_(None), items.c.precio_unitario == 0))
+        .values(precio_unitario=func.coalesce(_del_producto(productos.c.precio), 0))
+    )
+
+    crear_indice(conn, "ix_pedido_items_imagen_url", "pedido_items", ["imagen_url"])
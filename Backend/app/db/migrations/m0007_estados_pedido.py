@@ -0,0 +1,69 @@
+# app/db/migrations/m0007_estados_pedido.py
+"""
+Ciclo de vida de los pedidos: historial de estados y conteo por estado
+
+- Crea ``pedido_eventos`` (historial, indexado por pedido y fecha) y
+  ``pedido_conteos`` (pedidos por estado, en ``FRAGMENTOS`` filas por estado).
+- Renombra los estados antiguos a los del ciclo de vida: ``en_proceso`` ->
+  ``elaborando`` y ``completado`` -> ``terminado``; sin estado -> ``pendiente``.
+- Rellena ``pedido_conteos`` con un único ``GROUP BY`` sobre ``pedidos``: el
+  total de cada estado va al fragmento 0 y el resto de fragmentos empieza a 0.
+"""
+
+from sqlalchemy import (
+    Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+    delete, func, insert, select, update,
+)
+from sqlalchemy.engine import Connection
+
+ESTADOS = ("pendiente", "revision", "elaborando", "terminado", "despachado", "cancelado")
+RENOMBRADOS = {"en_proceso": "elaborando", "completado": "terminado"}
+# Igual que FRAGMENTOS_CONTEO en app/core/order_status.py al escribir esta migración
+FRAGMENTOS = 8
+
+metadata = MetaData()
+
+# "pedidos" ya existe: solo las columnas que se usan aquí (create_all la salta)
+pedidos = Table(
+    "pedidos", metadata,
+    Column("id", String(100), primary_key=True),
+    Column("estado", String(50)),
+)
+
+Table(
+    "pedido_eventos", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("pedido_id", String(100), ForeignKey("pedidos.id"), nullable=False),
+    Column("estado_anterior", String(50), nullable=True),
+    Column("estado_nuevo", String(50), nullable=False),
+    Column("actor", String(200), nullable=False),
+    Column("comentario", Text, nullable=True),
+    Column("creado_en", DateTime, nullable=False),
+    Index("ix_pedido_eventos_pedido_id_creado_en", "pedido_id", "creado_en"),
+)
+
+conteos = Table(
+    "pedido_conteos", metadata,
+    Column("estado", String(50), primary_key=True),
+    Column("fragmento", Integer, primary_key=True),
+    Column("total", Integer, nullable=False),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    metadata.create_all(conn, checkfirst=True)
+
+    for anterior, nuevo in RENOMBRADOS.items():
+        conn.execute(update(pedidos).where(pedidos.c.estado == anterior).values(estado=nuevo))
+    conn.execute(update(pedidos).where(pedidos.c.estado.is_(None)).values(estado="pendiente"))
+
+    totales = dict.fromkeys(ESTADOS, 0)
+    totales.update(conn.execute(
+        select(pedidos.c.estado, func.count()).group_by(pedidos.c.estado)
+    ).all())
+    conn.execute(delete(conteos))
+    conn.execute(insert(conteos), [
+        {"estado": estado, "fragmento": fragmento, "total": total if fragmento == 0 else 0}
+        for estado, total in totales.items()
+        for fragmento in range(FRAGMENTOS)
+    ])
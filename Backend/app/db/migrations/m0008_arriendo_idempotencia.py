@@ -0,0 +1,23 @@
+# app/db/migrations/m0008_arriendo_idempotencia.py
+"""
+Arriendo de las claves de idempotencia en curso
+
+Añade ``claves_idempotencia.reclamado_en``: una clave cuya petición
+original murió sin terminar se puede retomar cuando pasan
+``IDEMPOTENCY_LEASE_SECONDS`` desde ese momento, en lugar de responder 409
+hasta que caduque. Las filas existentes toman ``creado_en``.
+"""
+
+from sqlalchemy import Column, DateTime, column, table, update
+from sqlalchemy.engine import Connection
+
+from app.db.migrate import agregar_columna
+
+claves = table("claves_idempotencia", column("creado_en"), column("reclamado_en"))
+
+
+def upgrade(conn: Connection) -> None:
+    agregar_columna(conn, "claves_idempotencia", Column("reclamado_en", DateTime, nullable=True))
+    conn.execute(
+        update(claves).where(claves.c.reclamado_en.is_(None)).values(reclamado_en=claves.c.creado_en)
+    )
@@ -0,0 +1,175 @@
+# app/db/search.py
+"""
+Índice de búsqueda de texto completo para productos.
+
+- SQLite: la tabla virtual FTS5 ``productos_fts`` refleja ``nombre`` y
+  ``descripcion`` de ``productos`` (tabla de contenido externo) y se mantiene
+  sincronizada mediante triggers, por lo que cualquier alta, edición o baja
+  de productos actualiza el índice sin código adicional en las rutas.
+- PostgreSQL: índice GIN sobre ``to_tsvector`` de las mismas columnas.
+
+En cualquier otro caso las búsquedas siguen usando ILIKE.
+"""
+
+import re
+from typing import Optional
+
+from sqlalchemy import Float, Integer, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+FTS_TABLE = "productos_fts"
+
+# Peso relativo de cada columna en el ranking BM25 (nombre, descripcion)
+BM25_PESOS = (10.0, 1.0)
+
+# Dialecto con índice creado ("sqlite", "postgresql") o None si no hay índice
+_fts_dialecto: Optional[str] = None
+
+PG_INDICE = "ix_productos_busqueda"
+
+# Expresión indexada en PostgreSQL (debe coincidir exactamente con la consulta)
+_PG_DOCUMENTO = "to_tsvector('simple', coalesce(nombre, '') || ' ' || coalesce(descripcion, ''))"
+_PG_DOCUMENTO_PESADO = (
+    "setweight(to_tsvector('simple', coalesce(nombre, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(descripcion, '')), 'B')"
+)
+
+_DDL_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nombre, descripcion)
+        VALUES (new.id, new.nombre, new.descripcion);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nombre, descripcion)
+        VALUES ('delete', old.id, old.nombre, old.descripcion);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF nombre, descripcion ON productos BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nombre, descripcion)
+        VALUES ('delete', old.id, old.nombre, old.descripcion);
+        INSERT INTO {FTS_TABLE}(rowid, nombre, descripcion)
+        VALUES (new.id, new.nombre, new.descripcion);
+    END
+    """,
+]
+
+
+def crear_indice_productos(conn: Connection) -> bool:
+    """
+    Crea el índice de búsqueda si no existe (lo ejecuta una migración).
+
+    En SQLite, si la tabla FTS5 se crea por primera vez se reconstruye a
+    partir de los productos existentes. Devuelve False si el motor no tiene
+    búsqueda de texto completo, en cuyo caso las búsquedas usan ILIKE.
+    """
+    dialecto = conn.dialect.name
+    if dialecto not in ("sqlite", "postgresql"):
+        return False
+    try:
+        # Savepoint: si el motor no soporta el índice, la migración sigue
+        with conn.begin_nested():
+            if dialecto == "sqlite":
+                _crear_indice_sqlite(conn)
+            else:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {PG_INDICE} "
+                    f"ON productos USING GIN ({_PG_DOCUMENTO})"
+                ))
+    except (OperationalError, ProgrammingError) as e:
+        print(f"⚠️ Búsqueda de texto completo no disponible, se usará ILIKE: {e}")
+        return False
+    return True
+
+
+def _crear_indice_sqlite(conn: Connection) -> None:
+    existe = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "nombre, descripcion, "
+        "content='productos', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    ))
+    for ddl in _DDL_TRIGGERS:
+        conn.execute(text(ddl))
+
+    if not existe:
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def detectar_indice_productos(engine: Engine) -> bool:
+    """
+    Comprueba al arrancar si el índice de búsqueda existe (sin crearlo).
+
+    Returns:
+        bool: True si las búsquedas pueden usar el índice; si no, ILIKE
+    """
+    global _fts_dialecto
+
+    dialecto = engine.dialect.name
+    if dialecto == "sqlite":
+        consulta = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name")
+        parametros = {"name": FTS_TABLE}
+    elif dialecto == "postgresql":
+        consulta = text("SELECT 1 FROM pg_indexes WHERE indexname = :name")
+        parametros = {"name": PG_INDICE}
+    else:
+        _fts_dialecto = None
+        return False
+
+    with engine.connect() as conn:
+        existe = conn.execute(consulta, parametros).first() is not None
+    _fts_dialecto = dialecto if existe else None
+    return existe
+
+
+def fts_disponible() -> bool:
+    return _fts_dialecto is not None
+
+
+def expresion_busqueda(q: str) -> Optional[str]:
+    """
+    Convierte el texto libre del buscador en una consulta de prefijos.
+
+    Cada palabra se cita/sanea (para neutralizar la sintaxis del motor) y se
+    marca como prefijo, de modo que "ori gru" encuentra "Origami grulla".
+    """
+    palabras = re.findall(r"\w+", q, flags=re.UNICODE)
+    if not palabras:
+        return None
+    if _fts_dialecto == "postgresql":
+        return " & ".join(f"{p}:*" for p in palabras)
+    return " ".join(f'"{p}"*' for p in palabras)
+
+
+def subconsulta_coincidencias(expresion: str):
+    """
+    Subconsulta ``(id, rank)`` con los productos que coinciden con la
+    expresión, donde ``rank`` menor es más relevante (BM25 en SQLite,
+    ``-ts_rank`` en PostgreSQL).
+    """
+    if _fts_dialecto == "postgresql":
+        sql = (
+            f"SELECT id, -ts_rank({_PG_DOCUMENTO_PESADO}, to_tsquery('simple', :expresion)) AS rank "
+            f"FROM productos WHERE {_PG_DOCUMENTO} @@ to_tsquery('simple', :expresion)"
+        )
+    else:
+        pesos = ", ".join(str(p) for p in BM25_PESOS)
+        sql = (
+            f"SELECT rowid AS id, bm25({FTS_TABLE}, {pesos}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :expresion"
+        )
+    return (
+        text(sql)
+        .bindparams(expresion=expresion)
+        .columns(id=Integer, rank=Float)
+        .subquery("coincidencias")
+    )
@@ -1,23 +1,35 @@
 # backend/app/main.py
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from pathlib import Path
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # ✅ Usar database.py directamente
-from app.db.database import Base, engine, SessionLocal
+from app.db.database import engine, async_engine, SessionLocal
+from app.db.search import detectar_indice_productos
+from app.db.migrate import migrar, verificar_esquema
 
-# ✅ Importar TODOS los modelos ANTES de create_all
+# ✅ Importar TODOS los modelos (registra los mappers)
 from app.models.usuario import Usuario
 from app.models.producto import Producto
-from app.models.pedido import Pedido, PedidoItem
+from app.models.pedido import Pedido, PedidoConteo, PedidoEvento, PedidoItem
 from app.models.carrito import Carrito, ItemCarrito
 from app.models.categoria import Categoria
 from app.models.fidelizacion import Fidelizacion
+from app.models.idempotencia import ClaveIdempotencia
 
 from app.core.cors import setup_cors, settings
 from app.core.security import get_password_hash
+from app.core.hashing import password_hasher
+from app.core.storage import UPLOAD_DIR
+from app.core.limits import BodySizeLimitMiddleware
+from app.core.static_files import UploadsStaticFiles
+from app.core import thumbnails
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.dependencies import require_admin
+from app.core import sql_stats
+from app.core import metrics
+from app.core import idempotency
+from app.core.responses import FastJSONResponse
 
 # IMPORTAR ROUTERS
 from app.api.routes.auth_routes import router as auth_router
@@ -26,13 +38,16 @@ from app.api.routes.pedidos import router as pedidos_router
 from app.api.routes.categorias import router as categorias_router
 from app.api.routes.fidelizacion import router as fidelizacion_router
 from app.api.routes.carrito import router as carrito_router
+from app.api.routes.health import router as health_router
+from app.api.routes.exportar import router as exportar_router
 
 app = FastAPI(
     title="Origami 3D tienda API",
     description="API REST para tienda online de figuras de origami 3D",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
 )
 
 def seed_admin():
@@ -72,6 +87,12 @@ def seed_admin():
     finally:
         db.close()
 
+# ✅ Limitar el tamaño de los cuerpos (subidas de imágenes) mientras se reciben.
+# Se añade antes que CORS para quedar dentro: el 413 lleva los headers CORS
+# y el frontend puede leer el mensaje. Cada imagen tiene además su propio
+# límite (MAX_UPLOAD_BYTES) al guardarla.
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=settings.max_request_body_bytes)
+
 # ✅ CONFIGURAR CORS ANTES de registrar rutas
 app.add_middleware(
     CORSMiddleware,
@@ -79,26 +100,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# ✅ Métricas Prometheus por ruta (latencia, en curso, estados)
+if metrics.metricas_disponibles():
+    app.add_middleware(metrics.MetricsMiddleware, rutas=app.routes)
+
+# ✅ Conteo y tiempo de SQL por petición (header Server-Timing); desactivado no cuesta nada
+if settings.sql_instrumentation:
+    sql_stats.instrumentar_engine(engine)
+    sql_stats.instrumentar_engine(async_engine.sync_engine)
+    app.add_middleware(
+        sql_stats.SQLStatsMiddleware,
+        budget=settings.SQL_STATEMENT_BUDGET,
+        strict=settings.env == "dev",
+    )
+
 @app.on_event("startup")
 def on_startup():
     """Evento que se ejecuta al iniciar la aplicación"""
+    # El esquema lo gestionan las migraciones (python -m app.db.migrate);
+    # al arrancar solo se comprueba la versión, salvo con DB_AUTO_MIGRATE
+    if settings.auto_migrate:
+        migrar(engine)
+    verificar_esquema(engine)
+    print("✅ Esquema de base de datos al día")
+
     try:
-        print("🔄 Creando tablas en la base de datos...")
-        Base.metadata.create_all(bind=engine)
-        print("✅ Tablas creadas exitosamente")
+        # Índice de búsqueda de productos (FTS5 / tsvector), si existe
+        detectar_indice_productos(engine)
         
         # Crear usuario admin inicial
         seed_admin()
+
+        # Pool de procesos para hashing de contraseñas
+        password_hasher.start()
         
     except Exception as e:
         print(f"❌ Error en startup: {e}")
 
+@app.on_event("startup")
+async def iniciar_tareas():
+    """Tareas periódicas en el event loop (barrido de claves de idempotencia)"""
+    idempotency.iniciar_barrido()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Evento que se ejecuta al detener la aplicación"""
+    await idempotency.detener_barrido()
+    password_hasher.shutdown()
+    thumbnails.shutdown()
+    await async_engine.dispose()
+    metrics.proceso_terminado()
+
 # ✅ Servir archivos estáticos
-UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", UploadsStaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 # REGISTRO DE RUTAS
 app.include_router(auth_router)
@@ -107,7 +165,21 @@ app.include_router(pedidos_router)
 app.include_router(categorias_router)
 app.include_router(fidelizacion_router)
 app.include_router(carrito_router)
+app.include_router(health_router)
+app.include_router(exportar_router)
+
+if settings.sql_instrumentation:
+    @app.get("/api/debug/sql", tags=["debug"], dependencies=[Depends(require_admin)])
+    async def sql_por_ruta():
+        """Sentencias y tiempo de base de datos acumulados por ruta (solo admin)"""
+        return sql_stats.resumen_por_ruta()
+
+if metrics.metricas_disponibles():
+    @app.get("/metrics", include_in_schema=False)
+    def metricas_prometheus():
+        return metrics.respuesta_metricas()
 
 @app.get("/health", tags=["health"])
 async def health_check():
+    """Compatibilidad: equivale a /health/live"""
     return {"status": "ok"}
@@ -2,8 +2,9 @@ from app.models.usuario import Usuario
 from app.models.categoria import Categoria
 from app.models.producto import Producto
 from app.models.carrito import Carrito, ItemCarrito
-from app.models.pedido import Pedido, PedidoItem
+from app.models.pedido import Pedido, PedidoConteo, PedidoEvento, PedidoItem
 from app.models.fidelizacion import Fidelizacion
+from app.models.idempotencia import ClaveIdempotencia
 
 __all__ = [
     "Usuario",
@@ -13,5 +14,8 @@ __all__ = [
     "ItemCarrito",
     "Pedido",
     "PedidoItem",
-    "Fidelizacion"
+    "PedidoEvento",
+    "PedidoConteo",
+    "Fidelizacion",
+    "ClaveIdempotencia"
 ]
\ No newline at end of file
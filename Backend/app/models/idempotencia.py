@@ -0,0 +1,26 @@
+# app/models/idempotencia.py
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from app.db.database import Base
+
+
+class ClaveIdempotencia(Base):
+    """Respuesta guardada para un header ``Idempotency-Key`` (ver app/core/idempotency.py)."""
+    __tablename__ = "claves_idempotencia"
+    # Creado por la migración 0005; el barrido borra por expira_en
+    __table_args__ = (
+        Index("ix_claves_idempotencia_expira_en", "expira_en"),
+    )
+
+    # Ruta + usuario que envió la clave, y la clave en sí
+    alcance = Column(String(255), primary_key=True)
+    clave = Column(String(255), primary_key=True)
+    # sha256 del cuerpo de la petición original
+    huella = Column(String(64), nullable=False)
+    # NULL mientras la petición original sigue en curso
+    estado_http = Column(Integer, nullable=True)
+    cuerpo = Column(Text, nullable=True)
+    creado_en = Column(DateTime, nullable=False)
+    # Inicio del arriendo de la petición en curso (migración 0008)
+    reclamado_en = Column(DateTime, nullable=True)
+    expira_en = Column(DateTime, nullable=False)
@@ -1,6 +1,6 @@
 # app/models/pedido.py
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Index, Integer, String, Float, DateTime, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
@@ -8,6 +8,13 @@ from app.db.database import Base
 
 class Pedido(Base):
     __tablename__ = "pedidos"
+    # Índices creados por la migración 0004 (mis pedidos, listados de admin)
+    __table_args__ = (
+        Index("ix_pedidos_contacto_email_created_at", "contacto_email", "created_at"),
+        Index("ix_pedidos_tipo_created_at_id", "tipo", "created_at", "id"),
+        Index("ix_pedidos_created_at_id", "created_at", "id"),
+        Index("ix_pedidos_estado", "estado"),
+    )
     
     # ✅ ID como String para soportar UUID y formatos como "GUEST-XXX" y "CUSTOM-XXX"
     id = Column(String(100), primary_key=True, index=True)
@@ -36,8 +43,8 @@ class Pedido(Base):
     precio_personalizado = Column(Float, nullable=True)
     
     # ✅ Comentarios (admin/vendedor)
-    comentario_vendedor = Column(Text, nullable=True)  # ✅ AÑADIR ESTA LÍNEA
-    comentario_cancelacion = Column(Text, nullable=True)  # Ya está
+    comentario_vendedor = Column(Text, nullable=True)
+    comentario_cancelacion = Column(Text, nullable=True)
     
     # ✅ Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -49,13 +56,50 @@ class Pedido(Base):
 
 class PedidoItem(Base):
     __tablename__ = "pedido_items"
+    # Creado por la migración 0006 (¿alguna línea de pedido usa esta imagen?)
+    __table_args__ = (
+        Index("ix_pedido_items_imagen_url", "imagen_url"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    pedido_id = Column(String(100), ForeignKey("pedidos.id"), nullable=False)  # ✅ String para coincidir con Pedido.id
-    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False)
+    pedido_id = Column(String(100), ForeignKey("pedidos.id"), nullable=False, index=True)  # ✅ String para coincidir con Pedido.id
+    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False, index=True)
     cantidad = Column(Integer, nullable=False)
     precio_unitario = Column(Float, nullable=False, default=0.0)  # ✅ Agregado default
+
+    # ✅ Datos del producto al momento de la compra (no cambian si el producto cambia)
+    nombre = Column(String(80), nullable=True)
+    imagen_url = Column(String(500), nullable=True)
     
     # ✅ Relaciones
     pedido = relationship("Pedido", back_populates="items")
     producto = relationship("Producto", back_populates="pedido_items")
+
+
+class PedidoEvento(Base):
+    """Historial de cambios de estado de un pedido (solo se insertan filas)."""
+    __tablename__ = "pedido_eventos"
+    # Creado por la migración 0007 (historial de un pedido en orden)
+    __table_args__ = (
+        Index("ix_pedido_eventos_pedido_id_creado_en", "pedido_id", "creado_en"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    pedido_id = Column(String(100), ForeignKey("pedidos.id"), nullable=False)
+    estado_anterior = Column(String(50), nullable=True)  # NULL = creación del pedido
+    estado_nuevo = Column(String(50), nullable=False)
+    actor = Column(String(200), nullable=False)  # email de quien hizo el cambio
+    comentario = Column(Text, nullable=True)
+    creado_en = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PedidoConteo(Base):
+    """
+    Pedidos por estado, repartidos en fragmentos y mantenidos en la misma
+    transacción de cada cambio (el total de un estado es la suma de sus fragmentos).
+    """
+    __tablename__ = "pedido_conteos"
+
+    estado = Column(String(50), primary_key=True)
+    fragmento = Column(Integer, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
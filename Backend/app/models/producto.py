@@ -1,11 +1,16 @@
 # app/models/producto.py
 
-from sqlalchemy import Column, Integer, String, Float, Boolean
+from sqlalchemy import Column, Index, Integer, String, Float, Boolean, JSON
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
 class Producto(Base):
     __tablename__ = "productos"
+    # Índices creados por la migración 0004 (listado del catálogo)
+    __table_args__ = (
+        Index("ix_productos_activo_id", "activo", "id"),
+        Index("ix_productos_activo_categoria_id", "activo", "categoria", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(80), nullable=False)
@@ -15,6 +20,7 @@ class Producto(Base):
     tamano = Column(String(50))
     material = Column(String(100))
     imagen_url = Column(String(500))
+    imagen_srcset = Column(JSON, nullable=True)  # {"200": url, "400": url, ...}
     activo = Column(Boolean, default=True)
     stock = Column(Integer, default=0)
     categoria = Column(String(100))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 
 class Contacto(BaseModel):
@@ -9,7 +9,7 @@ class Contacto(BaseModel):
 # ✅ Schema para CREAR pedido (sin nombre ni precio ni imagen)
 class PedidoItemCreate(BaseModel):
     producto_id: int
-    cantidad: int
+    cantidad: int = Field(..., gt=0)
 
 # ✅ Schema para RESPUESTA (con nombre, precio e imagen)
 class PedidoItem(BaseModel):
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, Optional
 
 class ProductoBase(BaseModel):
     nombre: str = Field(..., min_length=3, max_length=80)
@@ -39,6 +39,10 @@ class ProductoUpdate(BaseModel):
 
 class ProductoOut(ProductoBase):
     id: int
+    imagen_srcset: Optional[Dict[str, str]] = Field(
+        default=None,
+        description="Miniaturas por ancho en px: {\"200\": url, \"400\": url, \"800\": url}"
+    )
 
     class Config:
         from_attributes = True
@@ -0,0 +1,146 @@
+# app/scripts/deduplicar_uploads.py
+"""
+Migración única: deduplica ``uploads/`` y pasa a nombres por contenido.
+
+Crea para cada archivo antiguo (``{timestamp}_{filename}``) su versión
+``<sha256><ext>``, como enlace duro (o copia si el sistema de archivos no
+admite enlaces), sin tocar el original. Los archivos con el mismo contenido
+comparten un único ``<sha256><ext>``. Después reescribe con la nueva URL
+``Producto.imagen_url``, ``PedidoItem.imagen_url`` (imagen guardada al
+comprar) y ``Pedido.imagen_referencia`` si apuntaba a una subida local.
+
+Los archivos antiguos se borran al final, después del commit y solo si
+ninguna fila los referencia ya: si el script se interrumpe antes, las URLs
+antiguas siguen funcionando y basta con volver a ejecutarlo.
+
+Uso (desde la carpeta Backend):
+    python -m app.scripts.deduplicar_uploads [--dry-run]
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+from typing import Dict
+
+from sqlalchemy import func, select
+
+from app.core.storage import (
+    CHUNK_SIZE,
+    NOMBRE_HASH_RE,
+    UPLOAD_DIR,
+    UPLOAD_URL_PREFIX,
+    contar_referencias,
+    nombre_por_contenido,
+    ruta_de_url,
+)
+from app.db.database import SessionLocal
+from app.models import Pedido, PedidoItem, Producto
+
+
+def _sha256(ruta) -> str:
+    sha = hashlib.sha256()
+    with ruta.open("rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def deduplicar(dry_run: bool = False) -> Dict[str, str]:
+    """
+    Crea el archivo por contenido de cada subida antigua (sin borrar la
+    original) y devuelve el mapa ``url_antigua -> url_nueva``.
+    """
+    mapa: Dict[str, str] = {}
+    creados = 0
+
+    for ruta in sorted(UPLOAD_DIR.iterdir()):
+        if not ruta.is_file() or ruta.name.startswith(".") or NOMBRE_HASH_RE.match(ruta.name):
+            continue
+
+        nombre = nombre_por_contenido(_sha256(ruta), ruta.name)
+        destino = UPLOAD_DIR / nombre
+        mapa[f"{UPLOAD_URL_PREFIX}{ruta.name}"] = f"{UPLOAD_URL_PREFIX}{nombre}"
+
+        if dry_run or destino.exists():
+            continue
+        try:
+            os.link(ruta, destino)
+        except OSError:
+            shutil.copy2(ruta, destino)
+        creados += 1
+
+    print(f"📁 {len(mapa)} archivos procesados, {len(mapa) - creados} duplicados")
+    return mapa
+
+
+def reescribir_urls(mapa: Dict[str, str], dry_run: bool = False) -> None:
+    db = SessionLocal()
+    try:
+        productos = db.query(Producto).filter(Producto.imagen_url.in_(mapa)).all()
+        for producto in productos:
+            producto.imagen_url = mapa[producto.imagen_url]
+
+        items = db.query(PedidoItem).filter(PedidoItem.imagen_url.in_(mapa)).all()
+        for item in items:
+            item.imagen_url = mapa[item.imagen_url]
+
+        pedidos = db.query(Pedido).filter(Pedido.imagen_referencia.in_(mapa)).all()
+        for pedido in pedidos:
+            pedido.imagen_referencia = mapa[pedido.imagen_referencia]
+
+        print(
+            f"✅ {len(productos)} productos, {len(items)} líneas de pedido "
+            f"y {len(pedidos)} pedidos actualizados"
+        )
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+
+def eliminar_originales(mapa: Dict[str, str]) -> None:
+    """Borra los archivos antiguos que ya no referencia ninguna fila."""
+    db = SessionLocal()
+    eliminados = conservados = 0
+    try:
+        for url in mapa:
+            ruta = ruta_de_url(url)
+            if ruta is None or not ruta.exists():
+                continue
+            referencias = contar_referencias(url, db) + db.scalar(
+                select(func.count(Pedido.id)).where(Pedido.imagen_referencia == url)
+            )
+            if referencias > 0:
+                conservados += 1
+                continue
+            ruta.unlink()
+            eliminados += 1
+    finally:
+        db.close()
+
+    print(f"🧹 {eliminados} archivos antiguos eliminados")
+    if conservados:
+        print(f"⚠️ {conservados} archivos antiguos conservados: aún hay filas que los usan")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar cambios sin aplicarlos")
+    args = parser.parse_args()
+
+    if not UPLOAD_DIR.is_dir():
+        print(f"❌ No existe la carpeta {UPLOAD_DIR.resolve()}")
+        return
+
+    mapa = deduplicar(dry_run=args.dry_run)
+    if mapa:
+        reescribir_urls(mapa, dry_run=args.dry_run)
+        if not args.dry_run:
+            eliminar_originales(mapa)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# app/scripts/generar_miniaturas.py
+"""
+Genera las miniaturas de las imágenes de productos ya existentes.
+
+Procesa, en un pool de hilos, los productos con imagen y sin
+``imagen_srcset`` (o todos con ``--todas``) y guarda el resultado.
+
+Uso (desde la carpeta Backend):
+    python -m app.scripts.generar_miniaturas [--todas] [--workers N]
+
+Conviene ejecutar antes ``deduplicar_uploads`` para que las imágenes
+tengan ya su nombre por contenido.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.thumbnails import procesar_producto, derivados_disponibles
+from app.db.database import SessionLocal
+from app.models.producto import Producto
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--todas", action="store_true", help="Regenerar también las que ya tienen miniaturas")
+    parser.add_argument("--workers", type=int, default=4, help="Hilos de generación")
+    args = parser.parse_args()
+
+    if not derivados_disponibles():
+        print("❌ Pillow no está instalado: pip install Pillow")
+        return
+
+    db = SessionLocal()
+    try:
+        query = db.query(Producto.id, Producto.imagen_url).filter(Producto.imagen_url.isnot(None))
+        if not args.todas:
+            query = query.filter(Producto.imagen_srcset.is_(None))
+        pendientes = query.all()
+    finally:
+        db.close()
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(lambda p: procesar_producto(p.id, p.imagen_url), pendientes))
+
+    print(f"✅ Miniaturas procesadas para {len(pendientes)} productos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# tests/conftest.py
+"""
+Fixtures comunes de las pruebas del backend.
+
+Cada sesión de pytest trabaja sobre una base de datos SQLite nueva en un
+directorio temporal, migrada al arrancar la app igual que en desarrollo:
+las pruebas nunca tocan ``app/db/BDproyectoorigami.db`` ni ``uploads/``.
+La configuración se fija por variables de entorno antes de importar la app.
+"""
+
+import os
+import re
+import tempfile
+import uuid
+
+DIRECTORIO_PRUEBAS = tempfile.mkdtemp(prefix="origami-pruebas-")
+
+os.environ.update({
+    "ENV": "dev",
+    "DATABASE_URL": f"sqlite:///{DIRECTORIO_PRUEBAS}/pruebas.db",
+    "DB_AUTO_MIGRATE": "true",
+    "SQL_INSTRUMENTATION": "true",
+    "PASSWORD_HASH_WORKERS": "0",
+    "THUMBNAIL_WORKERS": "0",
+    "IDEMPOTENCY_SWEEP_SECONDS": "0",
+    "CATALOG_VERSION_FILE": os.path.join(DIRECTORIO_PRUEBAS, "catalog.version"),
+})
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.producto import Producto  # noqa: E402
+
+ADMIN_EMAIL = "balocojuan@gmail.com"
+ADMIN_PASSWORD = "Admin123*"
+
+SERVER_TIMING_SQL_RE = re.compile(r'desc="(\d+) SQL"')
+
+
+@pytest.fixture(scope="session")
+def client():
+    # uploads/ se resuelve desde el directorio actual
+    directorio_original = os.getcwd()
+    os.chdir(DIRECTORIO_PRUEBAS)
+    os.makedirs("uploads", exist_ok=True)
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        os.chdir(directorio_original)
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    r = client.post("/api/auth/login", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def usuario(client):
+    """Un cliente registrado (no admin): su email y los headers con su token."""
+    email = f"cliente-{uuid.uuid4().hex[:8]}@example.com"
+    r = client.post("/api/auth/register", json={
+        "username": email.split("@")[0], "email": email, "password": "Cliente123*",
+    })
+    assert r.status_code == 201, r.text
+    r = client.post("/api/auth/login", data={"username": email, "password": "Cliente123*"})
+    assert r.status_code == 200, r.text
+    return {"email": email, "headers": {"Authorization": f"Bearer {r.json()['access_token']}"}}
+
+
+@pytest.fixture
+def crear_producto():
+    """Inserta productos directamente en la base de datos y devuelve su id."""
+    def crear(stock: int = 10, precio: float = 1000.0, **datos) -> int:
+        db = SessionLocal()
+        try:
+            producto = Producto(
+                nombre=datos.pop("nombre", f"Grulla {uuid.uuid4().hex[:8]}"),
+                precio=precio,
+                stock=stock,
+                activo=True,
+                **datos,
+            )
+            db.add(producto)
+            db.commit()
+            return producto.id
+        finally:
+            db.close()
+    return crear
+
+
+def sentencias_sql(respuesta) -> int:
+    """Sentencias SQL de una petición, leídas del header Server-Timing."""
+    coincidencia = SERVER_TIMING_SQL_RE.search(respuesta.headers["server-timing"])
+    assert coincidencia, respuesta.headers["server-timing"]
+    return int(coincidencia.group(1))
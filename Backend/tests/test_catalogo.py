@@ -0,0 +1,26 @@
+# tests/test_catalogo.py
+"""
+ETag del catálogo: cualquier escritura de productos, incluido el stock que
+descuenta un checkout, cambia la versión y el ETag anterior deja de dar 304.
+"""
+
+
+def test_checkout_cambia_el_etag_del_catalogo(client, crear_producto):
+    producto_id = crear_producto(stock=4)
+    ruta = f"/api/productos/{producto_id}"
+
+    r = client.get(ruta)
+    etag = r.headers["etag"]
+    assert r.json()["stock"] == 4
+    assert client.get(ruta, headers={"If-None-Match": etag}).status_code == 304
+
+    r = client.post("/api/pedidos/guest", json={
+        "contacto": {"nombre": "Cliente", "email": "cliente@example.com"},
+        "items": [{"producto_id": producto_id, "cantidad": 1}],
+    })
+    assert r.status_code == 201, r.text
+
+    r = client.get(ruta, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert r.json()["stock"] == 3
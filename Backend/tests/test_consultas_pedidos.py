@@ -0,0 +1,49 @@
+# tests/test_consultas_pedidos.py
+"""
+Los listados de pedidos cargan líneas y datos de producto por lotes: el
+número de sentencias SQL no crece con el número de pedidos ni de líneas.
+"""
+
+import pytest
+
+from tests.conftest import sentencias_sql
+
+RUTAS_ADMIN = ["/api/pedidos/normales", "/api/pedidos/personalizados", "/api/pedidos/"]
+
+
+def _crear_pedidos(client, headers, productos, cantidad):
+    for i in range(cantidad):
+        r = client.post("/api/pedidos/", headers=headers, json={
+            "contacto": {"nombre": f"Cliente {i}"},
+            "items": [{"producto_id": p, "cantidad": 1} for p in productos],
+        })
+        assert r.status_code == 201, r.text
+        r = client.post("/api/pedidos/personalizado", headers=headers, json={
+            "nombre_personalizado": f"Dragón {i}",
+            "descripcion": "Dragón de papel",
+            "contacto": {"nombre": f"Cliente {i}"},
+        })
+        assert r.status_code == 201, r.text
+
+
+def _consultas(client, ruta, headers):
+    # La primera petición calienta la caché de usuarios autenticados
+    client.get(ruta, headers=headers)
+    r = client.get(ruta, headers=headers)
+    assert r.status_code == 200, r.text
+    return len(r.json()), sentencias_sql(r)
+
+
+@pytest.mark.parametrize("ruta", RUTAS_ADMIN + ["/api/pedidos/mis-pedidos"])
+def test_listado_de_pedidos_cuesta_consultas_constantes(client, admin_headers, usuario, crear_producto, ruta):
+    headers = admin_headers if ruta in RUTAS_ADMIN else usuario["headers"]
+    productos = [crear_producto(stock=1000) for _ in range(3)]
+
+    _crear_pedidos(client, usuario["headers"], productos, 2)
+    pocos, consultas_pocos = _consultas(client, ruta, headers)
+
+    _crear_pedidos(client, usuario["headers"], productos, 8)
+    muchos, consultas_muchos = _consultas(client, ruta, headers)
+
+    assert muchos > pocos
+    assert consultas_muchos == consultas_pocos
@@ -0,0 +1,125 @@
+# tests/test_exportar.py
+"""
+Las exportaciones se envían en streaming con memoria constante: exportar
+diez veces más pedidos no aumenta el pico de memoria de la petición.
+
+El TestClient acumula el cuerpo entero antes de devolverlo, así que aquí la
+app se llama por ASGI (en el event loop del cliente) y cada bloque recibido
+se descarta tras contarlo.
+"""
+
+import tracemalloc
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.db.database import engine
+from app.main import app
+from app.models.pedido import Pedido, PedidoItem
+from app.models.producto import Producto
+
+POCOS = 1_000
+MUCHOS = 10_000
+
+
+def _insertar_pedidos(anio: int, cantidad: int, producto_id: int) -> None:
+    inicio = datetime(anio, 1, 1)
+    pedidos = [
+        {
+            "id": f"EXPORT-{anio}-{i:06d}",
+            "estado": "pendiente",
+            "tipo": "estandar",
+            "total": 1000.0,
+            "contacto_nombre": f"Cliente {i}",
+            "contacto_email": f"cliente{i}@example.com",
+            "direccion": "Calle 1 # 2-3",
+            "created_at": inicio + timedelta(seconds=i),
+        }
+        for i in range(cantidad)
+    ]
+    items = [
+        {"pedido_id": p["id"], "producto_id": producto_id, "cantidad": 1,
+         "precio_unitario": 1000.0, "nombre": "Grulla"}
+        for p in pedidos
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Pedido.__table__), pedidos)
+        conn.execute(insert(PedidoItem.__table__), items)
+
+
+@pytest.fixture(scope="module")
+def pedidos_exportables(client):
+    with engine.begin() as conn:
+        producto_id = conn.execute(insert(Producto.__table__).values(
+            nombre="Grulla exportada", precio=1000.0, stock=0, activo=True,
+        )).inserted_primary_key[0]
+    _insertar_pedidos(2001, POCOS, producto_id)
+    _insertar_pedidos(2002, MUCHOS, producto_id)
+    yield
+    with engine.begin() as conn:
+        conn.execute(delete(PedidoItem.__table__).where(PedidoItem.pedido_id.like("EXPORT-%")))
+        conn.execute(delete(Pedido.__table__).where(Pedido.id.like("EXPORT-%")))
+        conn.execute(delete(Producto.__table__).where(Producto.id == producto_id))
+
+
+async def _descargar(ruta: str, parametros: dict, headers: dict):
+    """Petición GET por ASGI; devuelve (estado, bytes recibidos, bloques recibidos)."""
+    resultado = {"estado": None, "bytes": 0, "bloques": 0}
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+        "root_path": "",
+        "path": ruta,
+        "raw_path": ruta.encode(),
+        "query_string": urlencode(parametros).encode(),
+        "headers": [(b"host", b"testserver")]
+        + [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            resultado["estado"] = mensaje["status"]
+        elif mensaje["type"] == "http.response.body" and mensaje.get("body"):
+            resultado["bytes"] += len(mensaje["body"])
+            resultado["bloques"] += 1
+
+    await app(scope, receive, send)
+    return resultado
+
+
+def _pico_de_memoria(client, admin_headers, formato: str, anio: int):
+    parametros = {"formato": formato, "desde": f"{anio}-01-01", "hasta": f"{anio + 1}-01-01"}
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        resultado = client.portal.call(_descargar, "/api/exportar/pedidos", parametros, admin_headers)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert resultado["estado"] == 200
+    return pico, resultado
+
+
+@pytest.mark.parametrize("formato", ["csv", "ndjson"])
+def test_exportar_pedidos_con_memoria_constante(client, admin_headers, pedidos_exportables, formato):
+    # Una primera exportación carga módulos y cachés de SQLAlchemy: no se mide
+    _pico_de_memoria(client, admin_headers, formato, 2001)
+    pico_pocos, pocos = _pico_de_memoria(client, admin_headers, formato, 2001)
+    pico_muchos, muchos = _pico_de_memoria(client, admin_headers, formato, 2002)
+
+    # Diez veces más datos, enviados en bloques...
+    assert muchos["bytes"] > 9 * pocos["bytes"]
+    assert muchos["bloques"] >= MUCHOS // 1000
+    # ...con el mismo pico de memoria (holgura para el ruido del intérprete;
+    # acumular la respuesta entera lo multiplica por 5-10)
+    assert pico_muchos < 2 * pico_pocos, (pico_pocos, pico_muchos)
@@ -0,0 +1,36 @@
+# tests/test_hashing.py
+"""
+El pool de procesos de hashing se recupera si uno de sus procesos muere.
+"""
+
+import asyncio
+import os
+import signal
+
+import pytest
+
+from app.core.hashing import PasswordHasher
+from app.core.security import verify_password
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="requiere SIGKILL (POSIX)")
+def test_pool_roto_se_reemplaza():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+
+    async def escenario():
+        primero = await hasher.hash("Secreta123*")
+        roto = hasher._executor
+        for proceso in list(roto._processes.values()):
+            os.kill(proceso.pid, signal.SIGKILL)
+            proceso.join()
+
+        # La siguiente operación detecta el pool roto, lo sustituye y reintenta
+        assert await hasher.verify("Secreta123*", primero)
+        assert hasher._executor is not roto
+        return await hasher.hash("Otra123*")
+
+    try:
+        segundo = asyncio.run(escenario())
+    finally:
+        hasher.shutdown()
+    assert verify_password("Otra123*", segundo)
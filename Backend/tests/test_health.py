@@ -0,0 +1,34 @@
+# tests/test_health.py
+"""
+``/health/ready`` comprueba base de datos, pool, disco y threadpool solo
+con lecturas: la sonda nunca escribe ni toma el bloqueo de escritura.
+"""
+
+from sqlalchemy import event
+
+from app.api.routes import health
+from app.db.database import async_engine
+
+
+def test_ready_solo_lee(client, monkeypatch):
+    # Sin resultado en caché: esta petición ejecuta las comprobaciones
+    monkeypatch.setattr(health, "_ultimo_resultado", None)
+    sentencias = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capturar)
+    try:
+        r = client.get("/health/ready")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capturar)
+
+    assert r.status_code == 200, r.json()
+    assert set(r.json()["checks"]) == {"db", "pool", "disk", "threadpool"}
+    assert sentencias
+    assert all(s.lstrip().upper().startswith("SELECT") for s in sentencias), sentencias
+
+
+def test_live(client):
+    assert client.get("/health/live").json() == {"status": "ok"}
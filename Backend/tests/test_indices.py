@@ -0,0 +1,101 @@
+# tests/test_indices.py
+"""
+Las consultas de las rutas calientes usan índices (migración 0004).
+
+Se capturan las sentencias SELECT que ejecuta cada ruta y se comprueba su
+``EXPLAIN QUERY PLAN`` en SQLite: ninguna puede recorrer ``pedidos``,
+``pedido_items`` ni ``productos`` sin índice (``SCAN <tabla>`` a secas).
+"""
+
+import re
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.db.database import async_engine, engine
+
+TABLAS_CALIENTES = ("pedidos", "pedido_items", "productos")
+SCAN_SIN_INDICE_RE = re.compile(rf"^SCAN ({'|'.join(TABLAS_CALIENTES)})\b(?!.* USING )")
+
+
+@contextmanager
+def capturar_selects():
+    capturadas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            capturadas.append((statement, tuple(parameters or ())))
+
+    motores = (engine, async_engine.sync_engine)
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", capturar)
+    try:
+        yield capturadas
+    finally:
+        for motor in motores:
+            event.remove(motor, "before_cursor_execute", capturar)
+
+
+def scans_sin_indice(capturadas):
+    encontrados = []
+    with engine.connect() as conn:
+        for sql, parametros in capturadas:
+            for fila in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parametros):
+                if SCAN_SIN_INDICE_RE.search(fila[-1]):
+                    encontrados.append(f"{fila[-1]}  <-  {sql}")
+    return encontrados
+
+
+def _con_pedido(client, usuario, crear_producto):
+    producto_id = crear_producto(stock=10, categoria=f"cat-{uuid.uuid4().hex[:8]}")
+    r = client.post("/api/pedidos/", headers=usuario["headers"], json={
+        "contacto": {"nombre": "Cliente"},
+        "items": [{"producto_id": producto_id, "cantidad": 1}],
+    })
+    assert r.status_code == 201, r.text
+    return producto_id
+
+
+@pytest.mark.parametrize("ruta, de_admin", [
+    ("/api/pedidos/mis-pedidos", False),
+    ("/api/pedidos/normales", True),
+    ("/api/pedidos/personalizados", True),
+    ("/api/pedidos/normales?limit=5", True),
+    ("/api/pedidos/", True),
+])
+def test_listados_de_pedidos_usan_indices(client, admin_headers, usuario, crear_producto, ruta, de_admin):
+    _con_pedido(client, usuario, crear_producto)
+    with capturar_selects() as capturadas:
+        r = client.get(ruta, headers=admin_headers if de_admin else usuario["headers"])
+    assert r.status_code == 200, r.text
+    assert capturadas
+    assert scans_sin_indice(capturadas) == []
+
+
+def test_catalogo_usa_indices(client, crear_producto):
+    categoria = f"cat-{uuid.uuid4().hex[:8]}"
+    for _ in range(3):
+        crear_producto(categoria=categoria)
+    # Combinaciones de parámetros que no se piden en otras pruebas: la caché del catálogo no las tiene
+    rutas = [
+        f"/api/productos/?categoria={categoria}",
+        "/api/productos/?limit=7",
+        f"/api/productos/?categoria={categoria}&limit=2&offset=1",
+    ]
+    with capturar_selects() as capturadas:
+        for ruta in rutas:
+            assert client.get(ruta).status_code == 200
+    assert capturadas
+    assert scans_sin_indice(capturadas) == []
+
+
+def test_borrar_producto_comprueba_pedidos_con_indice(client, admin_headers, usuario, crear_producto):
+    con_pedidos = _con_pedido(client, usuario, crear_producto)
+    sin_pedidos = crear_producto()
+    with capturar_selects() as capturadas:
+        assert client.delete(f"/api/productos/{con_pedidos}", headers=admin_headers).status_code == 400
+        assert client.delete(f"/api/productos/{sin_pedidos}", headers=admin_headers).status_code == 204
+    assert capturadas
+    assert scans_sin_indice(capturadas) == []
@@ -0,0 +1,47 @@
+# tests/test_limites.py
+"""
+Límite de tamaño de las subidas: una imagen de ``MAX_UPLOAD_BYTES`` cabe
+junto con el resto del formulario, y el 413 llega con los headers CORS.
+"""
+
+from app.core.config import settings
+
+ORIGEN = "http://localhost:5173"
+
+
+def _formulario(nombre: str) -> dict:
+    return {"nombre": nombre, "descripcion": "Grulla grande", "precio": "1000", "stock": "1"}
+
+
+def test_imagen_del_tamano_maximo_cabe_con_el_formulario(client, admin_headers):
+    imagen = b"\0" * settings.MAX_UPLOAD_BYTES
+    r = client.post(
+        "/api/productos/",
+        headers=admin_headers,
+        data=_formulario("Grulla al límite"),
+        files={"imagen": ("grulla.png", imagen, "image/png")},
+    )
+    assert r.status_code == 201, r.text
+
+
+def test_imagen_demasiado_grande_responde_413_con_cors(client, admin_headers):
+    imagen = b"\0" * (settings.MAX_UPLOAD_BYTES + 1)
+    r = client.post(
+        "/api/productos/",
+        headers={**admin_headers, "Origin": ORIGEN},
+        data=_formulario("Grulla gigante"),
+        files={"imagen": ("grulla.png", imagen, "image/png")},
+    )
+    assert r.status_code == 413
+    assert r.headers["access-control-allow-origin"] == ORIGEN
+
+
+def test_cuerpo_demasiado_grande_responde_413_con_cors(client, admin_headers):
+    r = client.post(
+        "/api/productos/",
+        headers={**admin_headers, "Origin": ORIGEN, "Content-Type": "application/octet-stream"},
+        content=b"\0" * (settings.max_request_body_bytes + 1),
+    )
+    assert r.status_code == 413
+    assert r.json()["detail"]
+    assert r.headers["access-control-allow-origin"] == ORIGEN
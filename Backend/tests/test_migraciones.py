@@ -0,0 +1,57 @@
+# tests/test_migraciones.py
+"""
+Migraciones: varios procesos que arrancan a la vez sobre la misma base de
+datos SQLite aplican cada migración una sola vez y ninguno falla.
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, select
+
+from app.db import migrate
+from app.db.database import sqlite_pragmas
+from app.db.migrate import cargar_migraciones, migrar, schema_version
+
+WORKERS = 4
+
+
+def _engine(ruta):
+    engine = create_engine(f"sqlite:///{ruta}")
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        for pragma in sqlite_pragmas():
+            dbapi_connection.execute(pragma)
+
+    return engine
+
+
+@pytest.mark.skipif(migrate.fcntl is None, reason="el bloqueo entre procesos requiere fcntl")
+def test_arranques_simultaneos_migran_una_vez(tmp_path):
+    ruta = tmp_path / "concurrente.db"
+    # Un engine por "worker": conexiones y descriptores de archivo separados
+    engines = [_engine(ruta) for _ in range(WORKERS)]
+    barrera = threading.Barrier(WORKERS)
+    aplicadas, errores = [], []
+
+    def arrancar(engine):
+        barrera.wait()
+        try:
+            aplicadas.extend(m.version for m in migrar(engine))
+        except Exception as e:  # noqa: BLE001 - se comprueba abajo
+            errores.append(e)
+
+    hilos = [threading.Thread(target=arrancar, args=(engine,)) for engine in engines]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    esperadas = [m.version for m in cargar_migraciones()]
+    assert errores == []
+    assert sorted(aplicadas) == esperadas
+    with engines[0].connect() as conn:
+        assert sorted(conn.execute(select(schema_version.c.version)).scalars()) == esperadas
+    for engine in engines:
+        engine.dispose()
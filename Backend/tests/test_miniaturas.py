@@ -0,0 +1,66 @@
+# tests/test_miniaturas.py
+"""
+Miniaturas: no quedan derivados huérfanos si la imagen se borra mientras
+se generan, y al liberar una imagen se borran sus derivados aunque su nombre
+no sea un hash.
+"""
+
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.core import thumbnails
+from app.core.storage import UPLOAD_DIR, UPLOAD_URL_PREFIX, liberar_imagen
+from app.db.database import SessionLocal
+
+
+@pytest.fixture
+def uploads(client):
+    # El cliente deja el directorio de trabajo en la carpeta temporal de pruebas
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    return UPLOAD_DIR
+
+
+def _imagen(ruta: Path) -> None:
+    Image.new("RGB", (900, 600), "orange").save(ruta, "JPEG")
+
+
+def _webp(ruta: Path) -> None:
+    Image.new("RGB", (10, 10), "orange").save(ruta, "WEBP")
+
+
+def test_derivados_se_descartan_si_la_imagen_se_borra(uploads, monkeypatch):
+    original = uploads / "grulla borrada.jpg"
+    _imagen(original)
+    transponer = thumbnails.ImageOps.exif_transpose
+
+    def borrar_durante_la_generacion(img):
+        # Otra petición libera la imagen mientras se calculan las miniaturas
+        original.unlink()
+        return transponer(img)
+
+    monkeypatch.setattr(thumbnails.ImageOps, "exif_transpose", borrar_durante_la_generacion)
+
+    assert thumbnails.generar_derivados(f"{UPLOAD_URL_PREFIX}{original.name}") == {}
+    assert list(uploads.glob("grulla borrada_w*")) == []
+    assert list(uploads.glob(".grulla borrada_w*")) == []
+
+
+def test_liberar_imagen_con_nombre_antiguo_borra_sus_derivados(uploads):
+    original = uploads / "1761882369_Imagen [1] de prueba.jpg"
+    _imagen(original)
+    srcset = thumbnails.generar_derivados(f"{UPLOAD_URL_PREFIX}{original.name}")
+    assert len(srcset) == len(thumbnails.ANCHOS)
+    # Otro archivo cuyo nombre empieza igual pero no es una miniatura
+    parecido = uploads / "1761882369_Imagen [1] de prueba_wedding.webp"
+    _webp(parecido)
+
+    db = SessionLocal()
+    try:
+        liberar_imagen(f"{UPLOAD_URL_PREFIX}{original.name}", db)
+    finally:
+        db.close()
+
+    assert not original.exists()
+    assert [p.name for p in uploads.glob("1761882369_*")] == [parecido.name]
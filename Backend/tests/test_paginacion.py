@@ -0,0 +1,41 @@
+# tests/test_paginacion.py
+"""
+Paginación por cursor de las búsquedas: recorrer las páginas siguiendo
+``X-Next-Cursor`` devuelve todos los resultados, sin repetidos ni huecos y
+en el mismo orden por relevancia que la consulta sin cursor.
+"""
+
+import uuid
+
+from app.db.search import fts_disponible
+
+
+def test_busqueda_paginada_por_cursor(client, crear_producto):
+    assert fts_disponible()
+    termino = f"kirigami{uuid.uuid4().hex[:6]}"
+    # Relevancias distintas y empates (mismo nombre y descripción)
+    ids = []
+    for repeticiones in (1, 1, 1, 2, 2, 3, 1, 2, 3, 1, 1):
+        ids.append(crear_producto(
+            nombre=f"Figura {termino}",
+            descripcion=" ".join([termino] * repeticiones),
+        ))
+
+    r = client.get("/api/productos/", params={"q": termino, "limit": 50})
+    assert r.status_code == 200, r.text
+    esperado = [p["id"] for p in r.json()]
+    assert sorted(esperado) == sorted(ids)
+
+    vistos, cursor = [], None
+    for _ in range(len(ids)):
+        params = {"q": termino, "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/api/productos/", params=params)
+        assert r.status_code == 200, r.text
+        vistos += [p["id"] for p in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert vistos == esperado
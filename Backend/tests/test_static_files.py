@@ -0,0 +1,58 @@
+# tests/test_static_files.py
+"""
+``UploadsStaticFiles``: ETag, 304, rangos y variantes precomprimidas.
+"""
+
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+from app.core.static_files import UploadsStaticFiles
+
+CONTENIDO = b"0123456789" * 100
+
+
+@pytest.fixture
+def archivos(tmp_path):
+    (tmp_path / "a.txt").write_bytes(CONTENIDO)
+    (tmp_path / "404.html").write_bytes(b"no existe")
+    app = Starlette()
+    app.mount("/uploads", UploadsStaticFiles(directory=tmp_path, html=True))
+    with TestClient(app) as c:
+        yield c, tmp_path
+
+
+def test_etag_y_304(archivos):
+    c, _ = archivos
+    r = c.get("/uploads/a.txt")
+    assert r.status_code == 200
+    assert r.content == CONTENIDO
+    assert c.get("/uploads/a.txt", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+
+def test_rango(archivos):
+    c, _ = archivos
+    r = c.get("/uploads/a.txt", headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.content == b"0123456789"
+    assert r.headers["content-range"] == "bytes 10-19/1000"
+    assert c.get("/uploads/a.txt", headers={"Range": "bytes=5000-"}).status_code == 416
+
+
+def test_variante_precomprimida(archivos):
+    c, directorio = archivos
+    (directorio / "a.txt.gz").write_bytes(gzip.compress(CONTENIDO))
+    r = c.get("/uploads/a.txt", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.content == CONTENIDO
+
+
+def test_pagina_404_conserva_su_estado(archivos):
+    c, _ = archivos
+    # La página de error se sirve con su estado: sin 206 ni 304 aunque se pidan
+    r = c.get("/uploads/nada.txt", headers={"Range": "bytes=0-1"})
+    assert r.status_code == 404
+    assert r.content == b"no existe"
@@ -0,0 +1,58 @@
+# tests/test_stock_concurrente.py
+"""
+Reserva de stock con checkouts concurrentes (``reservar_stock``): el UPDATE
+condicional garantiza que nunca se vende más de lo que hay.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db.database import SessionLocal
+from app.models.producto import Producto
+
+STOCK = 5
+COMPRAS = 20
+
+
+def _stock(producto_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.get(Producto, producto_id).stock
+    finally:
+        db.close()
+
+
+def test_checkouts_concurrentes_no_dejan_stock_negativo(client, crear_producto):
+    producto_id = crear_producto(stock=STOCK)
+
+    def comprar(i: int) -> int:
+        r = client.post("/api/pedidos/guest", json={
+            "contacto": {"nombre": f"Cliente {i}", "email": f"cliente{i}@example.com"},
+            "items": [{"producto_id": producto_id, "cantidad": 1}],
+        })
+        return r.status_code
+
+    # El TestClient reparte las peticiones de cada hilo en el mismo event loop:
+    # las transacciones de los checkouts se solapan de verdad
+    with ThreadPoolExecutor(max_workers=COMPRAS) as pool:
+        estados = list(pool.map(comprar, range(COMPRAS)))
+
+    assert estados.count(201) == STOCK
+    assert estados.count(409) == COMPRAS - STOCK
+    assert _stock(producto_id) == 0
+
+
+def test_pedido_con_varias_lineas_es_todo_o_nada(client, crear_producto):
+    con_stock = crear_producto(stock=3)
+    agotado = crear_producto(stock=0)
+
+    r = client.post("/api/pedidos/guest", json={
+        "contacto": {"nombre": "Cliente", "email": "cliente@example.com"},
+        "items": [
+            {"producto_id": con_stock, "cantidad": 2},
+            {"producto_id": agotado, "cantidad": 1},
+        ],
+    })
+
+    assert r.status_code == 409
+    assert _stock(con_stock) == 3
+    assert _stock(agotado) == 0
@@ -22,7 +22,7 @@ describe('AdminDashboard - Pedidos Personalizados', () => {
   test('muestra pedidos personalizados al ir a la pestaña', async () => {
     apiGetCustomOrders.mockResolvedValueOnce([
       { id: 21, estado: 'pendiente', contacto_nombre: 'Carlos', contacto_email: 'c@x.com', contacto_telefono: '111' },
-      { id: 22, estado: 'en_proceso', contacto_nombre: 'María', contacto_email: 'm@y.com', contacto_telefono: '222' },
+      { id: 22, estado: 'elaborando', contacto_nombre: 'María', contacto_email: 'm@y.com', contacto_telefono: '222' },
     ]);
 
     render(
@@ -44,7 +44,7 @@ describe('AdminDashboard - Pedidos Personalizados', () => {
     const select = estadoLabel?.closest('div')?.querySelector('select');
     if (select) {
       apiUpdateCustomOrder.mockResolvedValueOnce({ ok: true });
-      await user.selectOptions(select, 'completado');
+      await user.selectOptions(select, 'elaborando');
     }
 
     expect(apiGetCustomOrders).toHaveBeenCalled();
@@ -0,0 +1,23 @@
+import { estiloEstado, etiquetaEstado, normalizarEstado, opcionesEstado } from '@/orderStatus';
+
+describe('orderStatus', () => {
+  test('los nombres antiguos se muestran con el estado nuevo', () => {
+    expect(normalizarEstado('en_proceso')).toBe('elaborando');
+    expect(normalizarEstado('completado')).toBe('terminado');
+    expect(etiquetaEstado('completado')).toBe('Terminado');
+    expect(estiloEstado('completado')).toEqual(estiloEstado('terminado'));
+  });
+
+  test('el selector ofrece el estado actual y sus transiciones', () => {
+    expect(opcionesEstado('pendiente').map((o) => o.value))
+      .toEqual(['pendiente', 'revision', 'elaborando', 'cancelado']);
+    expect(opcionesEstado('terminado').map((o) => o.value))
+      .toEqual(['terminado', 'despachado', 'cancelado']);
+    expect(opcionesEstado('despachado').map((o) => o.value)).toEqual(['despachado']);
+  });
+
+  test('un estado desconocido usa el estilo neutro', () => {
+    expect(etiquetaEstado('enviado')).toBe('Enviado');
+    expect(estiloEstado('enviado')).toEqual({ background: '#f3f4f6', color: '#000' });
+  });
+});
@@ -42,7 +42,7 @@ describe('OrdersPage', () => {
       {
         id: 7,
         tipo: 'personalizado',
-        estado: 'en_proceso',
+        estado: 'elaborando',
         nombre_personalizado: 'Grulla Azul',
         descripcion: 'Papel japonés',
         imagen_referencia: 'data:image/png;base64,AAAA',
@@ -57,6 +57,7 @@ describe('OrdersPage', () => {
     expect(screen.getByText(/Grulla Azul/i)).toBeInTheDocument();
     expect(screen.getByText(/Papel japonés/i)).toBeInTheDocument();
     expect(screen.getByText(/\$50/)).toBeInTheDocument();
+    expect(screen.getByText('Elaborando')).toBeInTheDocument();
     // imagen presente (no validamos render real del <img/> en JSDOM)
   });
 });
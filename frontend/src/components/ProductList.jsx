@@ -142,6 +142,9 @@ export default function ProductsPage() {
                 {product.imagen_url && (
                   <img
                     src={product.imagen_url}
+                    srcSet={product.imagen_srcset ? Object.entries(product.imagen_srcset)
+                      .map(([ancho, url]) => `${url} ${ancho}w`).join(", ") : undefined}
+                    sizes="(max-width: 600px) 100vw, 320px"
                     alt={product.nombre}
                     onError={(e) => { e.target.style.display = 'none'; }}
                     style={{
@@ -0,0 +1,52 @@
+// ============================================
+// ESTADOS DE PEDIDO
+// ============================================
+// Mismo ciclo de vida que el backend (app/core/order_status.py):
+// pendiente -> revision (opcional) -> elaborando -> terminado -> despachado,
+// o cancelado antes de despachar.
+
+export const ESTADOS_PEDIDO = {
+  pendiente: { label: "Pendiente", background: "#fef3c7", color: "#92400e" },
+  revision: { label: "En Revisión", background: "#e0e7ff", color: "#3730a3" },
+  elaborando: { label: "Elaborando", background: "#fed7aa", color: "#9a3412" },
+  terminado: { label: "Terminado", background: "#d1fae5", color: "#065f46" },
+  despachado: { label: "Despachado", background: "#dbeafe", color: "#1e40af" },
+  cancelado: { label: "Cancelado", background: "#fee2e2", color: "#991b1b" },
+};
+
+export const TRANSICIONES_PEDIDO = {
+  pendiente: ["revision", "elaborando", "cancelado"],
+  revision: ["elaborando", "cancelado"],
+  elaborando: ["terminado", "cancelado"],
+  terminado: ["despachado", "cancelado"],
+  despachado: [],
+  cancelado: [],
+};
+
+// Nombres anteriores a la migración 0007
+const ALIAS = { en_proceso: "elaborando", completado: "terminado" };
+
+export function normalizarEstado(estado) {
+  return ALIAS[estado] || estado || "pendiente";
+}
+
+export function etiquetaEstado(estado) {
+  const valor = normalizarEstado(estado);
+  const info = ESTADOS_PEDIDO[valor];
+  return info ? info.label : valor.charAt(0).toUpperCase() + valor.slice(1);
+}
+
+export function estiloEstado(estado) {
+  const info = ESTADOS_PEDIDO[normalizarEstado(estado)];
+  return info
+    ? { background: info.background, color: info.color }
+    : { background: "#f3f4f6", color: "#000" };
+}
+
+// Opciones del selector: el estado actual y los que se pueden alcanzar desde él
+export function opcionesEstado(estado) {
+  const actual = normalizarEstado(estado);
+  return [actual, ...(TRANSICIONES_PEDIDO[actual] || Object.keys(ESTADOS_PEDIDO))]
+    .filter((valor, i, lista) => lista.indexOf(valor) === i)
+    .map((valor) => ({ value: valor, label: etiquetaEstado(valor) }));
+}
@@ -10,6 +10,7 @@ import {
   apiDeleteProduct,
   apiUpdateProduct
 } from "../api";
+import { estiloEstado, etiquetaEstado, normalizarEstado, opcionesEstado } from "../orderStatus";
 import { useNavigate } from "react-router-dom";
 
 export default function AdminDashboard() {
@@ -222,7 +223,7 @@ export default function AdminDashboard() {
         setOrders(prev => prev.map(o =>
           o.pedido_id === orderId ? { ...o, estado: newStatus } : o
         ));
-        alert(`Pedido actualizado a: ${newStatus}`);
+        alert(`Pedido actualizado a: ${etiquetaEstado(newStatus)}`);
       })
       .catch((e) => {
         alert("Error actualizando el pedido");
@@ -819,19 +820,14 @@ const handleEditSubmit = async (e) => {
                       <div style={{ display: "flex", gap: "8px", alignItems: "center" }}>
                         <span
                           style={{
-                            background:
-                              o.estado === "completado" ? "#d1fae5" :
-                              o.estado === "cancelado" ? "#fee2e2" : "#fef3c7",
-                            color:
-                              o.estado === "completado" ? "#065f46" :
-                              o.estado === "cancelado" ? "#991b1b" : "#92400e",
+                            ...estiloEstado(o.estado),
                             padding: "4px 12px",
                             borderRadius: "6px",
                             fontSize: "13px",
                             fontWeight: "500",
                           }}
                         >
-                          {o.estado}
+                          {etiquetaEstado(o.estado)}
                         </span>
                         <span style={{ fontSize: "15px", fontWeight: "600", color: "#059669" }}>
                           ${o.total || 0}
@@ -890,7 +886,7 @@ const handleEditSubmit = async (e) => {
                     Cambiar estado
                   </label>
                   <select
-                    value={o.estado}
+                    value={normalizarEstado(o.estado)}
                     onChange={(e) => changeStatus(o.pedido_id, e.target.value)}
                     style={{
                       padding: "6px 12px",
@@ -899,10 +895,9 @@ const handleEditSubmit = async (e) => {
                       fontSize: "14px",
                     }}
                   >
-                    <option value="pendiente">Pendiente</option>
-                    <option value="en_proceso">En Proceso</option>
-                    <option value="completado">Completado</option>
-                    <option value="cancelado">Cancelado</option>
+                    {opcionesEstado(o.estado).map((opcion) => (
+                      <option key={opcion.value} value={opcion.value}>{opcion.label}</option>
+                    ))}
                   </select>
                 </div>
               </div>
@@ -948,19 +943,14 @@ const handleEditSubmit = async (e) => {
                     <div style={{ display: "flex", gap: "8px", alignItems: "center" }}>
                       <span
                         style={{
-                          background:
-                            o.estado === "completado" ? "#d1fae5" :
-                            o.estado === "cancelado" ? "#fee2e2" : "#fef3c7",
-                          color:
-                            o.estado === "completado" ? "#065f46" :
-                            o.estado === "cancelado" ? "#991b1b" : "#92400e",
+                          ...estiloEstado(o.estado),
                           padding: "4px 12px",
                           borderRadius: "6px",
                           fontSize: "13px",
                           fontWeight: "500",
                         }}
                       >
-                        {o.estado}
+                        {etiquetaEstado(o.estado)}
                       </span>
                       <span style={{ fontSize: "15px", fontWeight: "600", color: "#059669" }}>
                         ${o.precio_personalizado || 0}
@@ -1193,7 +1183,7 @@ const handleEditSubmit = async (e) => {
                     Cambiar estado
                   </label>
                   <select
-                    value={o.estado}
+                    value={normalizarEstado(o.estado)}
                     onChange={(e) => changeStatus(o.pedido_id, e.target.value)}
                     style={{
                       padding: "6px 12px",
@@ -1202,10 +1192,9 @@ const handleEditSubmit = async (e) => {
                       fontSize: "14px",
                     }}
                   >
-                    <option value="pendiente">Pendiente</option>
-                    <option value="en_proceso">En Proceso</option>
-                    <option value="completado">Completado</option>
-                    <option value="cancelado">Cancelado</option>
+                    {opcionesEstado(o.estado).map((opcion) => (
+                      <option key={opcion.value} value={opcion.value}>{opcion.label}</option>
+                    ))}
                   </select>
                 </div>
               </div>
@@ -1,5 +1,6 @@
 import { useEffect, useState } from "react";
 import { apiMyOrders } from "../api";
+import { estiloEstado, etiquetaEstado } from "../orderStatus";
 
 export default function OrdersPage() {
   const [data, setData] = useState([]);
@@ -90,22 +91,12 @@ export default function OrdersPage() {
               <p style={{ margin: "0.25rem 0" }}>
                 <strong>Estado:</strong>{" "}
                 <span style={{
-                  background: 
-                    order.estado === "pendiente" ? "#fef3c7" :
-                    order.estado === "en_proceso" ? "#fed7aa" :
-                    order.estado === "completado" ? "#d1fae5" :
-                    order.estado === "cancelado" ? "#fee2e2" : "#f3f4f6",
+                  ...estiloEstado(order.estado),
                   padding: "0.25rem 0.5rem",
                   borderRadius: "4px",
                   fontSize: "0.9rem",
-                  color:
-                    order.estado === "completado" ? "#065f46" :
-                    order.estado === "cancelado" ? "#991b1b" : "#000"
                 }}>
-                  {order.estado === "en_proceso" ? "En Proceso" :
-                   order.estado === "completado" ? "Completado" :
-                   order.estado === "cancelado" ? "Cancelado" :
-                   order.estado.charAt(0).toUpperCase() + order.estado.slice(1)}
+                  {etiquetaEstado(order.estado)}
                 </span>
               </p>
 
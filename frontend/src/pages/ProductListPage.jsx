@@ -151,6 +151,9 @@ export default function ProductsPage() {
                   {product.imagen_url && (
                     <img
                       src={`${BASE_URL}${product.imagen_url}`}
+                      srcSet={product.imagen_srcset ? Object.entries(product.imagen_srcset)
+                        .map(([ancho, url]) => `${BASE_URL}${url} ${ancho}w`).join(", ") : undefined}
+                      sizes="(max-width: 600px) 100vw, 320px"
                       alt={product.nombre}
                       style={{
                         width: "100%",